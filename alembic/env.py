@@ -1,18 +1,35 @@
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
+from sqlalchemy import inspect
 from sqlalchemy import pool
+from alembic.script import ScriptDirectory
 from app.core.config import settings
 from alembic import context
 from app.db.database import Base
+from app.models.tenant import Tenant
 from app.models.doctor import Doctor
 from app.models.patient import Patient
 from app.models.visit import Visit
+from app.models.prescription import Prescription
+from app.models.attachment import Attachment
+from app.models.token import RevokedToken
+from app.models.audit import AuditEvent
+from app.models.change import ChangeEvent
+from app.models.idempotency import IdempotencyKey
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option('sqlalchemy.url', settings.sync_database_url)
+# Clinics on a dedicated database are migrated one at a time with
+# `alembic -x tenant_id=<id> upgrade head` (or `python -m app.cli migrate-tenants`).
+tenant_id = config.attributes.get("tenant_id", context.get_x_argument(as_dictionary=True).get("tenant_id"))
+if tenant_id is None:
+    config.set_main_option('sqlalchemy.url', settings.sync_database_url)
+elif int(tenant_id) in settings.tenant_sync_database_urls:
+    config.set_main_option('sqlalchemy.url', settings.tenant_sync_database_urls[int(tenant_id)])
+else:
+    raise SystemExit(f"No TENANT_SYNC_DATABASE_URLS entry for tenant {tenant_id}")
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
@@ -61,6 +78,13 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # The migration preflight passes its own connection, already inside a
+    # transaction that it rolls back afterwards.
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_with_connection(connection, external=True)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -68,12 +92,64 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
+        _run_with_connection(connection)
+
+
+def _run_sqlite(connection) -> None:
+    """Embedded deployments and CI.
+
+    The existing revisions use Postgres-only DDL (native enums, partitions,
+    CONCURRENTLY), so a fresh SQLite database is built from the models and
+    stamped at head. Revisions added after that must wrap column changes
+    in op.batch_alter_table(), which SQLite needs for most ALTER TABLEs
+    (render_as_batch only affects autogenerate).
+    """
+    fresh = not inspect(connection).has_table("alembic_version")
+    connection.commit()  # end the inspection's implicit transaction
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=True,
+        transaction_per_migration=True,
+    )
 
-        with context.begin_transaction():
+    with context.begin_transaction():
+        if fresh:
+            target_metadata.create_all(connection)
+            context.get_context().stamp(ScriptDirectory.from_config(config), "heads")
+        else:
             context.run_migrations()
+    # pysqlite autobegins, so Alembic sees the transaction as the caller's
+    # and leaves it open; without this the alembic_version row is lost.
+    connection.commit()
+
+
+def _run_with_connection(connection, external: bool = False) -> None:
+    if connection.dialect.name == "sqlite":
+        _run_sqlite(connection)
+        return
+    if connection.dialect.name == "postgresql":
+        # Session-level, so it also covers autocommit blocks. A DDL statement
+        # waiting on a lock would otherwise queue every write behind it.
+        # The CONCURRENTLY index helpers lift it for their own steps.
+        connection.exec_driver_sql(
+            f"SET lock_timeout = {int(settings.migration_lock_timeout_ms)}"
+        )
+        if not external:
+            # Close the implicit transaction so Alembic manages its own.
+            connection.commit()
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        on_version_apply=config.attributes.get("on_version_apply"),
+        # Commit after each revision so its locks are released before the
+        # next one starts, as MigrationPreflight assumes. Inside the
+        # preflight's own transaction this is a no-op.
+        transaction_per_migration=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
 
 
 if context.is_offline_mode():
@@ -0,0 +1,43 @@
+"""Add tenants table
+
+Revision ID: 8a4f2c6d1e93
+Revises: 3b7c1d9e4f20
+Create Date: 2026-10-19 10:03:27.551902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4f2c6d1e93'
+down_revision: Union[str, None] = '3b7c1d9e4f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('tenants',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('slug', sa.String(length=50), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tenants_id'), 'tenants', ['id'], unique=False)
+    op.create_index(op.f('ix_tenants_slug'), 'tenants', ['slug'], unique=True)
+    op.add_column('doctors', sa.Column('tenant_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_doctors_tenant_id'), 'doctors', ['tenant_id'], unique=False)
+    op.create_foreign_key('fk_doctors_tenant_id_tenants', 'doctors', 'tenants', ['tenant_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_doctors_tenant_id_tenants', 'doctors', type_='foreignkey')
+    op.drop_index(op.f('ix_doctors_tenant_id'), table_name='doctors')
+    op.drop_column('doctors', 'tenant_id')
+    op.drop_index(op.f('ix_tenants_slug'), table_name='tenants')
+    op.drop_index(op.f('ix_tenants_id'), table_name='tenants')
+    op.drop_table('tenants')
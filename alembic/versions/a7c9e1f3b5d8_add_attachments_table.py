@@ -0,0 +1,48 @@
+"""Add attachments table
+
+Revision ID: a7c9e1f3b5d8
+Revises: f5b7d9e1a3c4
+Create Date: 2026-10-19 21:37:54.190826
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.db.migrations import lock_timeout
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c9e1f3b5d8'
+down_revision: Union[str, None] = 'f5b7d9e1a3c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The foreign keys briefly lock visits and doctors against writes.
+    with lock_timeout(5000):
+        op.create_table('attachments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('visit_id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=False),
+        sa.Column('filename', sa.Text(), nullable=True),
+        sa.Column('uploaded_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['visit_id'], ['visits.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['uploaded_by'], ['doctors.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    op.create_index(op.f('ix_attachments_id'), 'attachments', ['id'], unique=False)
+    op.create_index(op.f('ix_attachments_visit_id'), 'attachments', ['visit_id'], unique=False)
+    op.create_index(op.f('ix_attachments_sha256'), 'attachments', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    # Blobs in the blob store are left in place.
+    op.drop_index(op.f('ix_attachments_sha256'), table_name='attachments')
+    op.drop_index(op.f('ix_attachments_visit_id'), table_name='attachments')
+    op.drop_index(op.f('ix_attachments_id'), table_name='attachments')
+    op.drop_table('attachments')
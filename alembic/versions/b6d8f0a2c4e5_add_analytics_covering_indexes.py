@@ -0,0 +1,34 @@
+"""Add covering indexes for analytics
+
+Revision ID: b6d8f0a2c4e5
+Revises: a4c6e8f0b2d3
+Create Date: 2026-10-19 17:35:09.618204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.db.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d8f0a2c4e5'
+down_revision: Union[str, None] = 'a4c6e8f0b2d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index_concurrently(
+        'ix_patients_doctor_id_analytics', 'patients', ['doctor_id'],
+        include=['gender', 'age', 'status', 'disease'],
+    )
+    create_index_concurrently(
+        'ix_visits_patient_id_date_of_visit', 'visits', ['patient_id', 'date_of_visit']
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently('ix_visits_patient_id_date_of_visit', 'visits')
+    drop_index_concurrently('ix_patients_doctor_id_analytics', 'patients')
@@ -0,0 +1,33 @@
+"""Add visit summary columns to patients
+
+Revision ID: c5e81f07a3b2
+Revises: 8a4f2c6d1e93
+Create Date: 2026-10-19 11:20:54.118630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.db.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e81f07a3b2'
+down_revision: Union[str, None] = '8a4f2c6d1e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows start at 0/NULL; populate them with
+    # `python -m app.cli backfill-visit-summary`.
+    op.add_column('patients', sa.Column('visit_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('patients', sa.Column('last_visit_at', sa.DateTime(), nullable=True))
+    create_index_concurrently('ix_visits_patient_id', 'visits', ['patient_id'])
+
+
+def downgrade() -> None:
+    drop_index_concurrently('ix_visits_patient_id', 'visits')
+    op.drop_column('patients', 'last_visit_at')
+    op.drop_column('patients', 'visit_count')
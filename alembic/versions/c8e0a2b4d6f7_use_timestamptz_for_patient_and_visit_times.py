@@ -0,0 +1,55 @@
+"""Use timestamptz with server defaults for patient and visit times
+
+Revision ID: c8e0a2b4d6f7
+Revises: b6d8f0a2c4e5
+Create Date: 2026-10-19 18:12:40.377915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.db.migrations import lock_timeout
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e0a2b4d6f7'
+down_revision: Union[str, None] = 'b6d8f0a2c4e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Values were written with datetime.utcnow(), so they are UTC.
+COLUMNS = [
+    ('patients', 'created_at'),
+    ('patients', 'last_visit_at'),
+    ('visits', 'date_of_visit'),
+]
+
+
+def upgrade() -> None:
+    with lock_timeout(5000):
+        # With the session in UTC, Postgres 12+ converts timestamp to
+        # timestamptz without rewriting the table or rebuilding its indexes;
+        # a USING clause would force a rewrite.
+        op.execute("SET LOCAL timezone = 'UTC'")
+        for table, column in COLUMNS:
+            op.alter_column(
+                table, column,
+                type_=sa.DateTime(timezone=True),
+                existing_type=sa.DateTime(),
+            )
+        op.alter_column('patients', 'created_at', server_default=sa.text('now()'))
+        op.alter_column('visits', 'date_of_visit', server_default=sa.text('now()'))
+
+
+def downgrade() -> None:
+    with lock_timeout(5000):
+        op.execute("SET LOCAL timezone = 'UTC'")
+        op.alter_column('visits', 'date_of_visit', server_default=None)
+        op.alter_column('patients', 'created_at', server_default=None)
+        for table, column in COLUMNS:
+            op.alter_column(
+                table, column,
+                type_=sa.DateTime(),
+                existing_type=sa.DateTime(timezone=True),
+            )
@@ -0,0 +1,100 @@
+"""Add prescriptions table
+
+Revision ID: d2f4a6b8c0e1
+Revises: c5e81f07a3b2
+Create Date: 2026-10-19 12:41:09.377205
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f4a6b8c0e1'
+down_revision: Union[str, None] = 'c5e81f07a3b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+# "Amlodipine 5mg once daily for 30 days" -> name, dose, frequency, duration
+_ITEM_SEPARATOR = re.compile(r"[\n;,]+")
+_DOSE = re.compile(r"\b\d+(?:\.\d+)?\s*(?:mg|mcg|g|ml|iu|units?|tabs?|tablets?|caps?)\b", re.I)
+_DURATION = re.compile(r"\bfor\s+(\d+\s*(?:days?|weeks?|months?))\b", re.I)
+_FREQUENCY = re.compile(
+    r"\b(once|twice|thrice|\d+\s*times)\s+(?:a\s+)?(daily|day|weekly|week)\b"
+    r"|\b(od|bd|bid|tds|tid|qid|qds|prn|daily|nightly|at night)\b",
+    re.I,
+)
+
+
+def parse_medicines(text):
+    items = []
+    for raw in _ITEM_SEPARATOR.split(text or ""):
+        raw = raw.strip()
+        if not raw:
+            continue
+        dose = _DOSE.search(raw)
+        duration = _DURATION.search(raw)
+        frequency = _FREQUENCY.search(raw)
+        first_match = min(
+            [m.start() for m in (dose, duration, frequency) if m] or [len(raw)]
+        )
+        name = raw[:first_match].strip(" -:") or raw
+        items.append({
+            "drug_code": name.upper()[:50],
+            "drug_name": name[:200],
+            "dose": dose.group(0)[:50] if dose else None,
+            "frequency": frequency.group(0)[:50] if frequency else None,
+            "duration": duration.group(1)[:50] if duration else None,
+        })
+    return items
+
+
+def upgrade() -> None:
+    prescriptions = op.create_table('prescriptions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('visit_id', sa.Integer(), nullable=False),
+    sa.Column('drug_code', sa.String(length=50), nullable=False),
+    sa.Column('drug_name', sa.String(length=200), nullable=True),
+    sa.Column('dose', sa.String(length=50), nullable=True),
+    sa.Column('frequency', sa.String(length=50), nullable=True),
+    sa.Column('duration', sa.String(length=50), nullable=True),
+    sa.ForeignKeyConstraint(['visit_id'], ['visits.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_prescriptions_id'), 'prescriptions', ['id'], unique=False)
+    op.create_index(op.f('ix_prescriptions_visit_id'), 'prescriptions', ['visit_id'], unique=False)
+    op.create_index('ix_prescriptions_drug_code_visit_id', 'prescriptions', ['drug_code', 'visit_id'], unique=False)
+
+    # Best-effort parse of the free-text column; the text itself is kept.
+    bind = op.get_bind()
+    visits = sa.table('visits', sa.column('id', sa.Integer), sa.column('medicines_prescribed', sa.Text))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(visits.c.id, visits.c.medicines_prescribed)
+            .where(visits.c.id > last_id, visits.c.medicines_prescribed.isnot(None))
+            .order_by(visits.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        items = [
+            dict(item, visit_id=visit_id)
+            for visit_id, text in rows
+            for item in parse_medicines(text)
+        ]
+        if items:
+            op.bulk_insert(prescriptions, items)
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prescriptions_drug_code_visit_id', table_name='prescriptions')
+    op.drop_index(op.f('ix_prescriptions_visit_id'), table_name='prescriptions')
+    op.drop_index(op.f('ix_prescriptions_id'), table_name='prescriptions')
+    op.drop_table('prescriptions')
@@ -0,0 +1,81 @@
+"""Use native enums for patient gender and status
+
+Revision ID: d9f1b3c5e7a9
+Revises: c8e0a2b4d6f7
+Create Date: 2026-10-19 18:54:03.208771
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from app.db.migrations import batched_backfill, create_index_concurrently, drop_index_concurrently, lock_timeout
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f1b3c5e7a9'
+down_revision: Union[str, None] = 'c8e0a2b4d6f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+gender = postgresql.ENUM('male', 'female', 'other', name='gender', create_type=False)
+patient_status = postgresql.ENUM('active', 'inactive', name='patient_status', create_type=False)
+
+# The old VARCHAR enum stored member names (MALE, ...), not GenderEnum values.
+GENDER_FROM_TEXT = "CAST(lower(gender) AS gender)"
+STATUS_FROM_TEXT = "CAST(lower(coalesce(status, 'active')) AS patient_status)"
+CONVERT = f"gender_code = {GENDER_FROM_TEXT}, status_code = {STATUS_FROM_TEXT}"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    unknown = bind.execute(sa.text(
+        "SELECT DISTINCT status FROM patients "
+        "WHERE lower(status) NOT IN ('active', 'inactive')"
+    )).scalars().all()
+    if unknown:
+        raise RuntimeError(f"Map these patient statuses to active/inactive first: {unknown}")
+
+    gender.create(bind, checkfirst=True)
+    patient_status.create(bind, checkfirst=True)
+    # Fill new columns in batches, then swap them in; an in-place
+    # ALTER COLUMN TYPE would rewrite patients under an exclusive lock.
+    op.add_column('patients', sa.Column('gender_code', gender, nullable=True))
+    op.add_column('patients', sa.Column('status_code', patient_status, nullable=True))
+    batched_backfill('patients', CONVERT, 'status_code IS NULL')
+
+    with lock_timeout(5000):
+        # Rows written since the backfill finished.
+        op.execute(f"UPDATE patients SET {CONVERT} WHERE status_code IS NULL")
+        # Dropping the old columns also drops ix_patients_doctor_id_analytics.
+        op.drop_column('patients', 'gender')
+        op.drop_column('patients', 'status')
+        op.alter_column('patients', 'gender_code', new_column_name='gender')
+        op.alter_column('patients', 'status_code', new_column_name='status', server_default='active')
+
+    create_index_concurrently(
+        'ix_patients_doctor_id_analytics', 'patients', ['doctor_id'],
+        include=['gender', 'age', 'status', 'disease'],
+    )
+    create_index_concurrently(
+        'ix_patients_doctor_id_active', 'patients', ['doctor_id', 'id'],
+        where="status = 'active'",
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently('ix_patients_doctor_id_active', 'patients')
+    op.alter_column('patients', 'status', server_default=None)
+    op.alter_column(
+        'patients', 'status',
+        type_=sa.String(length=30),
+        postgresql_using='status::text',
+    )
+    op.alter_column(
+        'patients', 'gender',
+        type_=sa.Enum('MALE', 'FEMALE', 'OTHER', name='genderenum', native_enum=False),
+        postgresql_using='upper(gender::text)',
+    )
+    patient_status.drop(op.get_bind(), checkfirst=True)
+    gender.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,40 @@
+"""Add patient merge tracking
+
+Revision ID: e1a3c5e7b9d2
+Revises: d9f1b3c5e7a9
+Create Date: 2026-10-19 19:31:27.845013
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from app.db.migrations import add_foreign_key_not_valid, is_preflight, validate_constraint
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a3c5e7b9d2'
+down_revision: Union[str, None] = 'd9f1b3c5e7a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if is_preflight():
+        op.execute("ALTER TYPE patient_status ADD VALUE IF NOT EXISTS 'merged'")
+    else:
+        # A new enum value can't be used in the transaction that adds it.
+        with context.get_context().autocommit_block():
+            op.execute("ALTER TYPE patient_status ADD VALUE IF NOT EXISTS 'merged'")
+    op.add_column('patients', sa.Column('merged_into_id', sa.Integer(), nullable=True))
+    add_foreign_key_not_valid(
+        'patients_merged_into_id_fkey', 'patients', 'patients', ['merged_into_id'], ['id']
+    )
+    validate_constraint('patients', 'patients_merged_into_id_fkey')
+
+
+def downgrade() -> None:
+    # Postgres can't drop an enum value; 'merged' stays in patient_status.
+    op.execute("UPDATE patients SET status = 'inactive' WHERE status = 'merged'")
+    op.drop_constraint('patients_merged_into_id_fkey', 'patients', type_='foreignkey')
+    op.drop_column('patients', 'merged_into_id')
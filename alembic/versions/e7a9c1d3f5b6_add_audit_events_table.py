@@ -0,0 +1,70 @@
+"""Add partitioned audit events table
+
+Revision ID: e7a9c1d3f5b6
+Revises: d2f4a6b8c0e1
+Create Date: 2026-10-19 14:02:33.840512
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a9c1d3f5b6'
+down_revision: Union[str, None] = 'd2f4a6b8c0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INITIAL_MONTHS = 3
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE audit_events (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+            occurred_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            doctor_id INTEGER NOT NULL,
+            tenant_id INTEGER,
+            action VARCHAR(20) NOT NULL,
+            entity_type VARCHAR(20) NOT NULL,
+            entity_id INTEGER,
+            patient_id INTEGER,
+            PRIMARY KEY (id, occurred_at)
+        ) PARTITION BY RANGE (occurred_at)
+    """)
+    op.create_index('ix_audit_events_doctor_id', 'audit_events', ['doctor_id'], unique=False)
+    op.create_index('ix_audit_events_patient_id', 'audit_events', ['patient_id'], unique=False)
+    op.execute("CREATE TABLE audit_events_default PARTITION OF audit_events DEFAULT")
+    first = date.today().replace(day=1)
+    for offset in range(INITIAL_MONTHS):
+        start, end = _add_months(first, offset), _add_months(first, offset + 1)
+        op.execute(
+            f"CREATE TABLE audit_events_{start:%Y_%m} PARTITION OF audit_events "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    # Append-only: reject UPDATE and DELETE at the database level.
+    op.execute("""
+        CREATE FUNCTION audit_events_append_only() RETURNS trigger AS $$
+        BEGIN
+            RAISE EXCEPTION 'audit_events is append-only';
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER audit_events_append_only
+        BEFORE UPDATE OR DELETE ON audit_events
+        FOR EACH ROW EXECUTE FUNCTION audit_events_append_only()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE audit_events CASCADE")
+    op.execute("DROP FUNCTION audit_events_append_only()")
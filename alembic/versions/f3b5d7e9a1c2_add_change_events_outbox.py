@@ -0,0 +1,44 @@
+"""Add change events outbox and updated_at on patients and visits
+
+Revision ID: f3b5d7e9a1c2
+Revises: e7a9c1d3f5b6
+Create Date: 2026-10-19 15:27:46.092381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b5d7e9a1c2'
+down_revision: Union[str, None] = 'e7a9c1d3f5b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('change_events',
+    sa.Column('seq', sa.BigInteger(), sa.Identity(), nullable=False),
+    sa.Column('txid', sa.BigInteger(), server_default=sa.text('txid_current()'), nullable=True),
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('entity_type', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('patient_id', sa.Integer(), nullable=True),
+    sa.Column('operation', sa.String(length=10), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('seq')
+    )
+    op.create_index('ix_change_events_doctor_id_seq', 'change_events', ['doctor_id', 'seq'], unique=False)
+    op.create_index(op.f('ix_change_events_txid'), 'change_events', ['txid'], unique=False)
+    op.add_column('patients', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('visits', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('visits', 'updated_at')
+    op.drop_column('patients', 'updated_at')
+    op.drop_index(op.f('ix_change_events_txid'), table_name='change_events')
+    op.drop_index('ix_change_events_doctor_id_seq', table_name='change_events')
+    op.drop_table('change_events')
@@ -0,0 +1,65 @@
+"""Encrypt patient and visit PHI columns
+
+Revision ID: f5b7d9e1a3c4
+Revises: e1a3c5e7b9d2
+Create Date: 2026-10-19 20:42:11.306157
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.db.migrations import create_index_concurrently, drop_index_concurrently, lock_timeout
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b7d9e1a3c4'
+down_revision: Union[str, None] = 'e1a3c5e7b9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Ciphertext is longer than the old varchar limits allowed.
+WIDENED = [
+    ('contact', sa.String(100)),
+    ('email', sa.String(100)),
+    ('disease', sa.String(200)),
+]
+BLIND_INDEXES = ['email_bidx', 'contact_bidx', 'disease_bidx']
+
+
+def upgrade() -> None:
+    # Schema only: values are encrypted by `python -m app.cli encrypt-phi`,
+    # which needs the application keys. Reads accept plaintext until then.
+    # Batch mode so SQLite can alter the columns; on Postgres it emits
+    # plain ALTER TABLEs.
+    with lock_timeout(5000), op.batch_alter_table('patients') as batch_op:
+        # varchar -> text is binary compatible: no rewrite, no index rebuild.
+        for column, existing_type in WIDENED:
+            batch_op.alter_column(column, type_=sa.Text(), existing_type=existing_type)
+        for column in BLIND_INDEXES:
+            batch_op.add_column(sa.Column(column, sa.String(32), nullable=True))
+    create_index_concurrently('ix_patients_doctor_id_email_bidx', 'patients', ['doctor_id', 'email_bidx'])
+    create_index_concurrently('ix_patients_doctor_id_contact_bidx', 'patients', ['doctor_id', 'contact_bidx'])
+    # Analytics now groups on disease_bidx; ciphertext is useless in the index.
+    drop_index_concurrently('ix_patients_doctor_id_analytics', 'patients')
+    create_index_concurrently(
+        'ix_patients_doctor_id_analytics', 'patients', ['doctor_id'],
+        include=['gender', 'age', 'status', 'disease_bidx'],
+    )
+
+
+def downgrade() -> None:
+    # Run `python -m app.cli encrypt-phi --decrypt` first; ciphertext does
+    # not fit the old column limits.
+    drop_index_concurrently('ix_patients_doctor_id_analytics', 'patients')
+    create_index_concurrently(
+        'ix_patients_doctor_id_analytics', 'patients', ['doctor_id'],
+        include=['gender', 'age', 'status', 'disease'],
+    )
+    drop_index_concurrently('ix_patients_doctor_id_contact_bidx', 'patients')
+    drop_index_concurrently('ix_patients_doctor_id_email_bidx', 'patients')
+    with lock_timeout(5000), op.batch_alter_table('patients') as batch_op:
+        for column in reversed(BLIND_INDEXES):
+            batch_op.drop_column(column)
+        for column, existing_type in WIDENED:
+            batch_op.alter_column(column, type_=existing_type, existing_type=sa.Text())
@@ -0,0 +1,28 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.dependencies import get_tenant_db_session, get_current_doctor
+from app.schemas.analytics_schema import PatientAnalyticsResponse, VisitAnalyticsResponse
+from app.services.analytics_service import analytics_service
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+@router.get("/patients", response_model=PatientAnalyticsResponse)
+async def patient_analytics(
+    top_diseases: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_tenant_db_session),
+    current_doctor=Depends(get_current_doctor),
+):
+    """Patient counts by gender, age bucket, disease and status."""
+    return await analytics_service.patient_breakdown(db, current_doctor, top_diseases)
+
+@router.get("/visits", response_model=VisitAnalyticsResponse)
+async def visit_analytics(
+    interval: Literal["day", "week", "month"] = Query("week"),
+    periods: int = Query(12, ge=1, le=366),
+    db: AsyncSession = Depends(get_tenant_db_session),
+    current_doctor=Depends(get_current_doctor),
+):
+    """Visit counts per period for the last ``periods`` periods."""
+    return await analytics_service.visits_over_time(db, current_doctor, interval, periods)
@@ -0,0 +1,152 @@
+from typing import AsyncIterator, List, Optional
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, status
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.blob_store import blob_store
+from app.core.config import settings
+from app.core.dependencies import get_tenant_db_session, get_current_doctor
+from app.core.file_response import FileRangeResponse, RangeNotSatisfiable, parse_range
+from app.models.attachment import Attachment
+from app.schemas.attachment_schema import AttachmentResponse
+from app.services.attachment_service import attachment_service
+
+router = APIRouter(prefix="/visits", tags=["attachments"])
+
+VISIT_NOT_FOUND = "Visit not found or unauthorized"
+ATTACHMENT_NOT_FOUND = "Attachment not found or unauthorized"
+
+@router.post(
+    "/{visit_id}/attachments",
+    response_model=AttachmentResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/octet-stream": {"schema": {"type": "string", "format": "binary"}},
+                "multipart/form-data": {"schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }},
+            },
+        }
+    },
+)
+async def upload_attachment(
+    visit_id: int,
+    request: Request,
+    filename: Optional[str] = Query(None, max_length=255, description="For raw uploads"),
+    db: AsyncSession = Depends(get_tenant_db_session),
+    current_doctor=Depends(get_current_doctor),
+):
+    """
+    Attach a file to a visit.
+
+    Send the file as the raw body with its Content-Type to have it streamed
+    to the blob store as it arrives. multipart/form-data with a "file"
+    field also works, but the form parser spools it to a temp file first.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.attachment_max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Attachment exceeds {settings.attachment_max_bytes} bytes"
+        )
+    # Check ownership before reading any of the body.
+    visit = await attachment_service.get_visit(db, visit_id, current_doctor)
+    if visit is None:
+        raise HTTPException(status_code=404, detail=VISIT_NOT_FOUND)
+    content_type = request.headers.get("content-type") or "application/octet-stream"
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(status_code=422, detail='Expected a "file" form field')
+        chunks = _read_upload(upload)
+        content_type = upload.content_type or "application/octet-stream"
+        filename = filename or upload.filename
+    else:
+        chunks = request.stream()
+    if len(content_type) > 100:
+        raise HTTPException(status_code=422, detail="Content-Type is too long")
+    return await attachment_service.create_attachment(
+        db, visit, current_doctor, chunks, content_type, filename
+    )
+
+@router.get("/{visit_id}/attachments", response_model=List[AttachmentResponse])
+async def list_attachments(
+    visit_id: int,
+    db: AsyncSession = Depends(get_tenant_db_session),
+    current_doctor=Depends(get_current_doctor),
+):
+    visit = await attachment_service.get_visit(db, visit_id, current_doctor)
+    if visit is None:
+        raise HTTPException(status_code=404, detail=VISIT_NOT_FOUND)
+    return await attachment_service.list_attachments(db, visit, current_doctor)
+
+@router.api_route("/{visit_id}/attachments/{attachment_id}", methods=["GET", "HEAD"])
+async def download_attachment(
+    visit_id: int,
+    attachment_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_tenant_db_session),
+    current_doctor=Depends(get_current_doctor),
+):
+    """Download an attachment; supports single byte ranges, If-Range and If-None-Match."""
+    attachment = await attachment_service.get_attachment(db, visit_id, attachment_id, current_doctor)
+    if attachment is None:
+        raise HTTPException(status_code=404, detail=ATTACHMENT_NOT_FOUND)
+    return _file_response(request, attachment, attachment_service.blob_namespace(current_doctor))
+
+@router.delete("/{visit_id}/attachments/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_attachment(
+    visit_id: int,
+    attachment_id: int,
+    db: AsyncSession = Depends(get_tenant_db_session),
+    current_doctor=Depends(get_current_doctor),
+):
+    success = await attachment_service.delete_attachment(db, visit_id, attachment_id, current_doctor)
+    if not success:
+        raise HTTPException(status_code=404, detail=ATTACHMENT_NOT_FOUND)
+
+async def _read_upload(upload: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await upload.read(settings.attachment_chunk_size):
+        yield chunk
+
+def _file_response(request: Request, attachment: Attachment, namespace: str) -> Response:
+    # Content-addressed, so the digest is a strong validator that never changes.
+    etag = f'"{attachment.sha256}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=86400",
+        "Content-Disposition": "attachment; filename*=UTF-8''" + quote(attachment.filename or f"attachment-{attachment.id}"),
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    size = attachment.size
+    range_header = request.headers.get("range")
+    if request.headers.get("if-range", etag) != etag:
+        # The client's partial copy is of other content; send it all.
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={**headers, "Content-Range": f"bytes */{size}"}
+        )
+    status_code = status.HTTP_200_OK
+    start, end = 0, size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    path = blob_store.local_path(namespace, attachment.sha256)
+    if path is not None:
+        return FileRangeResponse(path, start, end, status_code, headers, attachment.content_type)
+    headers["Content-Length"] = str(end - start + 1)
+    body = blob_store.read(namespace, attachment.sha256, start, end) if request.method != "HEAD" and size else iter(())
+    return StreamingResponse(body, status_code, headers, attachment.content_type)
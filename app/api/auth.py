@@ -1,17 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.dependencies import get_db_session, get_current_doctor
+from app.core.dependencies import get_db_session, get_current_doctor, enforce_login_rate_limit, client_ip, security
+from app.core.rate_limit import login_rate_limiter
+from app.core.fields import sparse_fields, sparse_response
 from app.models.doctor import Doctor
 from app.schemas.doctor_schema import (
     DoctorCreate, 
     DoctorResponse, 
     DoctorLogin, 
     Token, 
-    DoctorUpdate
+    DoctorUpdate,
+    RefreshTokenRequest
 )
 from app.services.doctor import doctor_service
 from app.services.auth import auth_service
-from app.core.exceptions import DuplicateError, DoctorNotFoundError
+from app.services.token_service import token_service
+from app.core.exceptions import DuplicateError, DoctorNotFoundError, ValidationError
 
 router = APIRouter(prefix="/auth",tags=["authentication"])
 
@@ -28,6 +34,11 @@ async def create_doctor_profile(
         status_code=status.HTTP_400_BAD_REQUEST,
         detail=str(e)
     )
+  except ValidationError as e:
+    raise HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=str(e)
+    )
   except Exception as e:
     raise HTTPException(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -36,7 +47,9 @@ async def create_doctor_profile(
     
 @router.post("/login", response_model=Token)
 async def login_doctor(
-    login_data: DoctorLogin,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    login_data: DoctorLogin = Depends(enforce_login_rate_limit),
     db: AsyncSession = Depends(get_db_session)
 ):
     # Authenticate doctor
@@ -47,28 +60,104 @@ async def login_doctor(
     )
     
   if not doctor:
+    await login_rate_limiter.record_failure(client_ip(request), login_data.username)
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid username or password",
         headers={"WWW-Authenticate": "Bearer"},
     )
+  await login_rate_limiter.record_success(client_ip(request), login_data.username)
+  if auth_service.needs_rehash(doctor.hashed_password):
+    background_tasks.add_task(
+        doctor_service.rehash_password_if_needed,
+        doctor.id,
+        login_data.password
+    )
+  return _issue_token_pair(doctor)
+
+def _issue_token_pair(doctor: Doctor) -> Token:
   access_token = auth_service.create_token_for_doctor(
         doctor.id, 
-        doctor.username
+        doctor.username,
+        doctor.tenant_id
     )
-    
-  return Token(access_token=access_token, token_type="bearer")
+  refresh_token = auth_service.create_refresh_token_for_doctor(
+        doctor.id, 
+        doctor.username,
+        doctor.tenant_id
+    )
+  return Token(
+      access_token=access_token,
+      refresh_token=refresh_token,
+      token_type="bearer",
+      expires_in=auth_service.access_token_expire_minutes * 60
+  )
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    refresh_data: RefreshTokenRequest,
+    db: AsyncSession = Depends(get_db_session)
+):
+  """
+  Exchange a refresh token for a new access/refresh token pair.
+  
+  The presented refresh token is revoked (rotation), so each refresh
+  token can be used only once.
+  """
+  invalid_token = HTTPException(
+      status_code=status.HTTP_401_UNAUTHORIZED,
+      detail="Invalid refresh token",
+      headers={"WWW-Authenticate": "Bearer"},
+  )
+  payload = auth_service.verify_token(refresh_data.refresh_token)
+  if payload is None or payload.get("type") != "refresh_token" or "jti" not in payload:
+    raise invalid_token
+  
+  doctor = await doctor_service.get_doctor_by_id(db, payload.get("doctor_id"))
+  if doctor is None or not doctor.is_active:
+    raise invalid_token
+  
+  if not await token_service.revoke_token(db, payload):
+    raise invalid_token
+  return _issue_token_pair(doctor)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout_doctor(
+    refresh_data: RefreshTokenRequest,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_doctor: Doctor = Depends(get_current_doctor),
+    db: AsyncSession = Depends(get_db_session)
+):
+  """
+  Revoke the given refresh token and the access token used for this call.
+
+  Without the access token it would stay usable until it expires.
+  """
+  access_payload = auth_service.verify_token(credentials.credentials)
+  if access_payload is not None and "jti" in access_payload:
+    await token_service.revoke_token(db, access_payload)
+  payload = auth_service.verify_token(refresh_data.refresh_token)
+  if (
+    payload is not None
+    and payload.get("type") == "refresh_token"
+    and payload.get("doctor_id") == current_doctor.id
+  ):
+    await token_service.revoke_token(db, payload)
 
 @router.get("/me", response_model=DoctorResponse)
 async def get_current_doctor_profile(
+    fields: Optional[List[str]] = Depends(sparse_fields(DoctorResponse, Doctor)),
     current_doctor: Doctor = Depends(get_current_doctor)
 ):
     """
     Get the current authenticated doctor's profile.
     
     This endpoint returns the profile information of the currently
-    authenticated doctor based on the JWT token.
+    authenticated doctor based on the JWT token. Use ``?fields=`` to
+    return only some of the profile fields.
     """
+    if fields:
+        return sparse_response({name: getattr(current_doctor, name) for name in fields})
     return current_doctor
   
 @router.put("/me", response_model=DoctorResponse)
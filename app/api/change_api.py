@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.dependencies import get_tenant_db_session, get_current_doctor
+from app.schemas.change_schema import ChangeFeedResponse
+from app.services.change_service import change_service
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+@router.get("/", response_model=ChangeFeedResponse)
+async def list_changes(
+    since: int = Query(0, ge=0, description="Cursor from the previous response"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_tenant_db_session),
+    current_doctor=Depends(get_current_doctor),
+):
+    """Patient and visit changes after ``since``, oldest first."""
+    changes, next_cursor, has_more = await change_service.list_changes(db, current_doctor, since, limit)
+    return ChangeFeedResponse(changes=changes, next_cursor=next_cursor, has_more=has_more)
@@ -0,0 +1,60 @@
+import asyncio
+import json
+import time
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.dependencies import get_streaming_doctor
+from app.services.event_broker import event_broker
+from app.services.token_service import token_service
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    current_doctor=Depends(get_streaming_doctor),
+):
+    """
+    Server-sent events for the current doctor's patient and visit changes.
+    
+    Each event's id is its change-feed cursor; after a reconnect, pass the
+    last seen id to ``GET /changes?since=`` to fetch anything missed.
+    The stream ends once the token expires or is revoked; the client
+    reconnects with a fresh one.
+    """
+    doctor_id = current_doctor.id
+    claims = request.state.token_claims
+
+    def token_still_valid() -> bool:
+        return (
+            claims["exp"] > time.time()
+            and not token_service.revocation_list.is_revoked(claims.get("jti"))
+        )
+
+    async def event_source():
+        async with event_broker.subscribe(doctor_id) as queue:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                if not token_still_valid():
+                    return
+                try:
+                    payload = await asyncio.wait_for(
+                        queue.get(), settings.event_stream_heartbeat_seconds
+                    )
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing the idle connection.
+                    yield ": keep-alive\n\n"
+                    continue
+                yield (
+                    f"id: {payload['id']}\n"
+                    f"event: {payload['entity_type']}.{payload['operation']}\n"
+                    f"data: {json.dumps(payload)}\n\n"
+                )
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
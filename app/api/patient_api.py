@@ -1,28 +1,108 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from app.core.dependencies import get_db_session, get_current_doctor
-from app.schemas.patient_schema import PatientResponse, PatientCreate, PatientUpdate
-from app.models.patient import Patient
+from app.core.dependencies import get_tenant_db_session, get_current_doctor, parse_bulk_payload
+from app.core.fields import sparse_fields, sparse_response
+from app.schemas.patient_schema import (
+  PatientResponse, PatientCreate, PatientUpdate, DuplicateCandidate, PatientMergeRequest, patient_create_list_adapter
+)
+from app.models.patient import Patient, PatientStatusEnum
 from app.services.patient_service import patient_service
+from app.services.idempotency_service import idempotency_service
+from app.services.dedup_service import dedup_service
 
 router = APIRouter(prefix="/patients", tags=["patients"])
 
+@router.get("/", response_model=List[PatientResponse])
+async def list_patients(
+  medication : Optional[str] = Query(None, description="Only patients prescribed this drug code"),
+  patient_status : PatientStatusEnum = Query(PatientStatusEnum.ACTIVE, alias="status"),
+  email : Optional[str] = Query(None, description="Exact email match (case-insensitive)"),
+  contact : Optional[str] = Query(None, description="Exact phone match (digits only are compared)"),
+  skip : int = Query(0, ge=0),
+  limit : int = Query(50, ge=1, le=200),
+  fields : Optional[List[str]] = Depends(sparse_fields(PatientResponse, Patient)),
+  db : AsyncSession = Depends(get_tenant_db_session),
+  current_doctor = Depends(get_current_doctor)
+):
+  patients = await patient_service.list_patients(db, current_doctor, medication, patient_status, skip, limit, fields, email, contact)
+  if fields:
+    return sparse_response(patients)
+  return patients
+
 @router.post("/", response_model=PatientResponse, status_code=status.HTTP_201_CREATED)
 async def create_patient(
+  request : Request,
   patient_data : PatientCreate,
-  db : AsyncSession = Depends(get_db_session),
+  idempotency_key : Optional[str] = Header(None, alias="Idempotency-Key", max_length=100),
+  db : AsyncSession = Depends(get_tenant_db_session),
+  current_doctor = Depends(get_current_doctor)
+):
+  async def create(store_response):
+    async def before_commit(patient):
+      # Stored with the insert, so a crash can't leave one without the other.
+      await store_response(PatientResponse.model_validate(patient))
+    patient = await patient_service.create_patient(
+      db, patient_data, current_doctor, before_commit if store_response else None
+    )
+    return PatientResponse.model_validate(patient)
+  return await idempotency_service.run(
+    db, current_doctor, idempotency_key,
+    idempotency_service.fingerprint(request.url.path, patient_data),
+    create
+  )
+
+@router.post(
+  "/bulk",
+  response_model=List[PatientResponse],
+  status_code=status.HTTP_201_CREATED,
+  openapi_extra={
+    "requestBody": {
+      "required": True,
+      "content": {"application/json": {"schema": {
+        "type": "array", "items": {"$ref": "#/components/schemas/PatientCreate"}
+      }}},
+    }
+  },
+)
+async def create_patients_bulk(
+  request : Request,
+  db : AsyncSession = Depends(get_tenant_db_session),
+  current_doctor = Depends(get_current_doctor)
+):
+  patients_data = await parse_bulk_payload(request, patient_create_list_adapter)
+  return await patient_service.create_patients_bulk(db, patients_data, current_doctor)
+
+# Declared before the /{patient_id} routes so "duplicates" and "merge"
+# are never taken for a patient id.
+@router.get("/duplicates", response_model=List[DuplicateCandidate])
+async def find_duplicate_patients(
+  min_score : float = Query(0.6, ge=0, le=1),
+  limit : int = Query(100, ge=1, le=1000),
+  db : AsyncSession = Depends(get_tenant_db_session),
   current_doctor = Depends(get_current_doctor)
 ):
-  patient = await patient_service.create_patient(db,patient_data, current_doctor)
+  return await dedup_service.find_duplicates(db, current_doctor, min_score, limit)
+
+@router.post("/merge", response_model=PatientResponse)
+async def merge_patients(
+  merge_request : PatientMergeRequest,
+  db : AsyncSession = Depends(get_tenant_db_session),
+  current_doctor = Depends(get_current_doctor)
+):
+  patient = await dedup_service.merge_patients(
+    db, current_doctor, merge_request.survivor_id, merge_request.duplicate_ids
+  )
+  if not patient:
+    raise HTTPException(status_code=404, detail="Patient not found or unauthorized")
   return patient
 
 @router.put("/{patient_id}", response_model=PatientResponse)
 async def update_patient(
   patient_id:int,
   patient_update : PatientUpdate,
-  db: AsyncSession = Depends(get_db_session),
+  db: AsyncSession = Depends(get_tenant_db_session),
   current_doctor=Depends(get_current_doctor),
 ):
   patient = await patient_service.update_patient(db, patient_id, patient_update, current_doctor)
@@ -33,7 +113,7 @@ async def update_patient(
 @router.delete("/{patient_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def soft_delete_patient(
     patient_id: int,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_tenant_db_session),
     current_doctor=Depends(get_current_doctor),
 ):
     success = await patient_service.soft_delete_patient(db, patient_id, current_doctor)
@@ -1,30 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from app.core.dependencies import get_db_session, get_current_doctor
-from app.schemas.visit_schema import VisitCreate, VisitUpdate, VisitResponse
+from app.core.dependencies import get_tenant_db_session, get_current_doctor, parse_bulk_payload
+from app.core.fields import sparse_fields, sparse_response
+from app.models.visit import Visit
+from app.schemas.visit_schema import VisitCreate, VisitUpdate, VisitResponse, visit_create_list_adapter
 from app.services.visit_service import visit_service
+from app.services.idempotency_service import idempotency_service
 
 router = APIRouter(prefix="/visits", tags=["visits"])
 
+@router.get("/patient/{patient_id}", response_model=List[VisitResponse])
+async def list_visits(
+    patient_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    fields: Optional[List[str]] = Depends(sparse_fields(VisitResponse, Visit)),
+    db: AsyncSession = Depends(get_tenant_db_session),
+    current_doctor=Depends(get_current_doctor),
+):
+    visits = await visit_service.list_visits(db, patient_id, current_doctor, skip, limit, fields)
+    if fields:
+        return sparse_response(visits)
+    return visits
+
 @router.post("/patient/{patient_id}", response_model=VisitResponse, status_code=status.HTTP_201_CREATED)
 async def create_visit(
+    request: Request,
     patient_id: int,
     visit_data: VisitCreate,
-    db: AsyncSession = Depends(get_db_session),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=100),
+    db: AsyncSession = Depends(get_tenant_db_session),
     current_doctor=Depends(get_current_doctor),
 ):
-    visit = await visit_service.create_visit(db, patient_id, visit_data, current_doctor)
-    if not visit:
+    async def create(store_response):
+        async def before_commit(visit):
+            # Stored with the insert, so a crash can't leave one without the other.
+            await store_response(VisitResponse.model_validate(visit))
+        visit = await visit_service.create_visit(
+            db, patient_id, visit_data, current_doctor, before_commit if store_response else None
+        )
+        if not visit:
+            raise HTTPException(status_code=404, detail="Patient not found or unauthorized")
+        return VisitResponse.model_validate(visit)
+    return await idempotency_service.run(
+        db, current_doctor, idempotency_key,
+        idempotency_service.fingerprint(request.url.path, visit_data),
+        create
+    )
+
+@router.post(
+    "/patient/{patient_id}/bulk",
+    response_model=List[VisitResponse],
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": {
+                "type": "array", "items": {"$ref": "#/components/schemas/VisitCreate"}
+            }}},
+        }
+    },
+)
+async def create_visits_bulk(
+    patient_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_tenant_db_session),
+    current_doctor=Depends(get_current_doctor),
+):
+    visits_data = await parse_bulk_payload(request, visit_create_list_adapter)
+    visits = await visit_service.create_visits_bulk(db, patient_id, visits_data, current_doctor)
+    if visits is None:
         raise HTTPException(status_code=404, detail="Patient not found or unauthorized")
-    return visit
+    return visits
 
 @router.put("/{visit_id}", response_model=VisitResponse)
 async def update_visit(
     visit_id: int,
     visit_update: VisitUpdate,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_tenant_db_session),
     current_doctor=Depends(get_current_doctor),
 ):
     visit = await visit_service.update_visit(db, visit_id, visit_update, current_doctor)
@@ -35,7 +90,7 @@ async def update_visit(
 @router.delete("/{visit_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_visit(
     visit_id: int,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_tenant_db_session),
     current_doctor=Depends(get_current_doctor),
 ):
     success = await visit_service.delete_visit(db, visit_id, current_doctor)
@@ -0,0 +1,266 @@
+"""
+Management commands.
+
+Usage:
+    python -m app.cli <command> [options]
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Optional
+
+
+async def backfill_visit_summary(batch_size: int, tenant_id: Optional[int]) -> None:
+  from app.db.database import db_manager
+  from app.services.visit_service import visit_service
+  db_manager.init_db()
+  try:
+    async for db in db_manager.get_session(tenant_id):
+      async for done in visit_service.backfill_visit_summary(db, batch_size):
+        print(f"Updated {done} patients")
+  finally:
+    await db_manager.close()
+
+
+async def encrypt_phi(batch_size: int, tenant_id: Optional[int], decrypt: bool) -> None:
+  from app.core.config import settings
+  from app.core.encryption import check_configuration
+  from app.db.database import db_manager
+  from app.services.patient_service import patient_service
+  if decrypt:
+    # With no active key, values are written back as plaintext.
+    settings.field_encryption_active_key = None
+  elif settings.field_encryption_active_key is None:
+    print("FIELD_ENCRYPTION_ACTIVE_KEY is not set", file=sys.stderr)
+    sys.exit(1)
+  else:
+    check_configuration()
+  db_manager.init_db()
+  try:
+    async for db in db_manager.get_session(tenant_id):
+      async for done in patient_service.reencrypt(db, batch_size, tenant_id):
+        print(f"Rewrote {done} patients and their visits")
+  finally:
+    await db_manager.close()
+
+
+async def create_audit_partitions(months_ahead: int) -> None:
+  from app.db.database import db_manager
+  from app.services.audit_service import audit_service
+  db_manager.init_db()
+  try:
+    async for db in db_manager.get_session():
+      for name in await audit_service.create_partitions(db, months_ahead):
+        print(f"Partition ready: {name}")
+  finally:
+    await db_manager.close()
+
+
+async def assign_tenant(doctor_id: int, tenant_id: Optional[int]) -> None:
+  from app.core.exceptions import DoctorDashboardError
+  from app.db.database import db_manager
+  from app.services.doctor import doctor_service
+  db_manager.init_db()
+  try:
+    async for db in db_manager.get_session():
+      try:
+        doctor = await doctor_service.assign_tenant(db, doctor_id, tenant_id)
+      except DoctorDashboardError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+      print(f"Doctor {doctor.id} ({doctor.username}) is now in tenant {doctor.tenant_id}")
+  finally:
+    await db_manager.close()
+
+
+def migrate_tenants(revision: str, tenant_ids: Optional[list]) -> None:
+  """Upgrade every dedicated tenant database (or the listed ones) to a revision."""
+  from alembic import command
+  from alembic.config import Config
+  from app.core.config import settings
+  missing = set(settings.tenant_database_urls) - set(settings.tenant_sync_database_urls)
+  if missing:
+    print(f"TENANT_SYNC_DATABASE_URLS has no entry for tenants {sorted(missing)}", file=sys.stderr)
+    sys.exit(1)
+  for tenant_id in tenant_ids or sorted(settings.tenant_sync_database_urls):
+    print(f"Tenant {tenant_id}: upgrading to {revision}")
+    config = Config("alembic.ini")
+    config.attributes["tenant_id"] = tenant_id
+    command.upgrade(config, revision)
+
+
+def migration_preflight(revision: str, database_url: Optional[str]) -> None:
+  """Estimate per-statement lock time of pending revisions, then roll back."""
+  from app.core.config import settings
+  from app.db.migrations import MigrationPreflight
+  preflight = MigrationPreflight(database_url or settings.sync_database_url)
+  statements = preflight.run(revision)
+  if not statements:
+    print("No pending revisions")
+    return
+  print(f"{'revision':<14} {'ms':>9} {'blocks writes ms':>17}  locks / statement")
+  for statement in statements:
+    locks = ", ".join(f"{name}:{mode}" for name, mode in sorted(statement["locks"].items()))
+    held = f"{statement['held_ms']:.1f}" if statement["held_ms"] is not None else "-"
+    print(f"{statement['revision'] or '?':<14} {statement['duration_ms']:>9.1f} {held:>17}  {locks or '-'}")
+    print(f"{'':<43}{statement['sql']}")
+  for description in preflight.skipped:
+    print(f"not timed (runs online): {description}")
+
+
+_FIRST_REQUEST_SNIPPET = """
+import asyncio, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from httpx import ASGITransport, AsyncClient
+async def first_request():
+    async with AsyncClient(transport=ASGITransport(app=main.app), base_url="http://profile") as client:
+        await client.get("/health")
+asyncio.run(first_request())
+done = time.perf_counter()
+print(f"{(imported - start) * 1000:.1f} {(done - start) * 1000:.1f}")
+"""
+
+
+def profile_startup(module: str, top: int) -> None:
+  """Print an import-time breakdown and time-to-first-request for a module."""
+  # Each measurement runs in a fresh interpreter so nothing is pre-imported.
+  result = subprocess.run(
+    [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+    capture_output=True, text=True
+  )
+  modules = []
+  for line in result.stderr.splitlines():
+    if not line.startswith("import time:"):
+      continue
+    fields = line[len("import time:"):].split("|")
+    if len(fields) != 3 or not fields[0].strip().isdigit():
+      continue
+    modules.append((int(fields[0]), int(fields[1]), fields[2].strip()))
+  if result.returncode != 0:
+    print(result.stderr.splitlines()[-1] if result.stderr else "import failed", file=sys.stderr)
+    sys.exit(result.returncode)
+
+  by_package = defaultdict(int)
+  for self_us, _, name in modules:
+    by_package[name.split(".")[0]] += self_us
+  total_us = sum(by_package.values())
+
+  print(f"Import of {module}: {total_us / 1000:.1f} ms across {len(modules)} modules\n")
+  print(f"{'package':<32} {'self ms':>9} {'share':>7}")
+  for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+    print(f"{package:<32} {self_us / 1000:>9.1f} {self_us / total_us:>7.1%}")
+
+  print(f"\n{'module':<48} {'cumulative ms':>14}")
+  for _, cumulative_us, name in sorted(modules, key=lambda item: -item[1])[:top]:
+    print(f"{name:<48} {cumulative_us / 1000:>14.1f}")
+
+  if module == "main":
+    timing = subprocess.run(
+      [sys.executable, "-c", _FIRST_REQUEST_SNIPPET], capture_output=True, text=True
+    )
+    if timing.returncode == 0:
+      import_ms, first_request_ms = timing.stdout.split()
+      print(f"\nimport main: {import_ms} ms, time to first /health response: {first_request_ms} ms")
+
+
+def main(argv=None) -> None:
+  parser = argparse.ArgumentParser(prog="python -m app.cli")
+  commands = parser.add_subparsers(dest="command", required=True)
+
+  backfill = commands.add_parser(
+    "backfill-visit-summary",
+    help="Populate patients.visit_count and patients.last_visit_at from visits"
+  )
+  backfill.add_argument("--batch-size", type=int, default=1000)
+  backfill.add_argument("--tenant-id", type=int, help="Run against a tenant's dedicated database")
+
+  phi = commands.add_parser(
+    "encrypt-phi",
+    help="Encrypt patient and visit PHI columns with the active key and fill blind indexes"
+  )
+  phi.add_argument("--batch-size", type=int, default=500)
+  phi.add_argument("--tenant-id", type=int, help="Run against a tenant's dedicated database")
+  phi.add_argument("--decrypt", action="store_true", help="Write plaintext back (before downgrading)")
+
+  startup = commands.add_parser(
+    "profile-startup",
+    help="Break down import time and measure time to first request"
+  )
+  startup.add_argument("--module", default="main")
+  startup.add_argument("--top", type=int, default=20)
+
+  partitions = commands.add_parser(
+    "create-audit-partitions",
+    help="Create monthly audit_events partitions ahead of time (run from cron)"
+  )
+  partitions.add_argument("--months-ahead", type=int, default=2)
+
+  serve = commands.add_parser(
+    "serve",
+    help="Run the API with preloaded, multi-process uvicorn workers"
+  )
+  serve.add_argument("--bind", help="host:port (default: settings.web_bind)")
+  serve.add_argument("--workers", type=int, help="default: settings.web_workers, else CPU count (1 on SQLite)")
+  serve.add_argument("--app", default="main:app")
+
+  restart = commands.add_parser(
+    "rolling-restart",
+    help="Replace a running server's workers one at a time"
+  )
+  restart.add_argument("--pid", type=int, required=True, help="PID of the serve master process")
+  restart.add_argument("--workers", type=int, help="default: settings.web_workers, else CPU count (1 on SQLite)")
+  restart.add_argument("--step-seconds", type=float, help="default: settings.web_restart_step_seconds")
+
+  preflight = commands.add_parser(
+    "migration-preflight",
+    help="Run pending migrations in a rolled-back transaction and report lock times"
+  )
+  preflight.add_argument("--revision", default="head")
+  preflight.add_argument(
+    "--database-url",
+    help="Sync DSN of a seeded copy of production (default: settings.sync_database_url)"
+  )
+
+  tenant = commands.add_parser(
+    "assign-tenant",
+    help="Move a doctor into a clinic (tenant); takes effect at their next login"
+  )
+  tenant.add_argument("--doctor-id", type=int, required=True)
+  tenant.add_argument("--tenant-id", type=int, help="Omit to remove the doctor from their clinic")
+
+  migrate = commands.add_parser(
+    "migrate-tenants",
+    help="Run Alembic migrations against each dedicated tenant database"
+  )
+  migrate.add_argument("--revision", default="head")
+  migrate.add_argument("--tenant-id", type=int, action="append", help="Repeatable; default: all")
+
+  args = parser.parse_args(argv)
+  if args.command == "backfill-visit-summary":
+    asyncio.run(backfill_visit_summary(args.batch_size, args.tenant_id))
+  elif args.command == "encrypt-phi":
+    asyncio.run(encrypt_phi(args.batch_size, args.tenant_id, args.decrypt))
+  elif args.command == "profile-startup":
+    profile_startup(args.module, args.top)
+  elif args.command == "create-audit-partitions":
+    asyncio.run(create_audit_partitions(args.months_ahead))
+  elif args.command == "serve":
+    from app.core.server import serve as run_server
+    run_server(args.bind, args.workers, args.app)
+  elif args.command == "rolling-restart":
+    from app.core.server import rolling_restart
+    rolling_restart(args.pid, args.workers, args.step_seconds)
+  elif args.command == "migration-preflight":
+    migration_preflight(args.revision, args.database_url)
+  elif args.command == "assign-tenant":
+    asyncio.run(assign_tenant(args.doctor_id, args.tenant_id))
+  elif args.command == "migrate-tenants":
+    migrate_tenants(args.revision, args.tenant_id)
+
+
+if __name__ == "__main__":
+  main()
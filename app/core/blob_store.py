@@ -0,0 +1,126 @@
+import hashlib
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.exceptions import PayloadTooLargeError
+
+
+@dataclass
+class StoredBlob:
+  sha256: str
+  size: int
+
+
+class BlobStore(ABC):
+  """
+  Content-addressed storage for attachment bodies.
+
+  Blobs are keyed by the SHA-256 of their content, so identical uploads
+  share one stored copy; the database only keeps metadata and the digest.
+  Each namespace is a separate keyspace: reference counts live in one
+  database, so blobs must not be shared across databases.
+  """
+
+  @abstractmethod
+  async def put(self, namespace: str, chunks: AsyncIterator[bytes], max_bytes: int) -> StoredBlob:
+    """Stream chunks into the store, hashing as they arrive."""
+
+  @abstractmethod
+  def read(self, namespace: str, sha256: str, start: int, end: int) -> AsyncIterator[bytes]:
+    """Yield the bytes in [start, end] (inclusive) of a blob."""
+
+  @abstractmethod
+  async def delete(self, namespace: str, sha256: str, min_age_seconds: float = 0) -> None:
+    """
+    Remove a blob; a no-op if it is already gone.
+
+    Blobs written less than ``min_age_seconds`` ago are kept: a concurrent
+    upload of the same content may be about to reference them.
+    """
+
+  def local_path(self, namespace: str, sha256: str) -> Optional[str]:
+    """Filesystem path of the blob, for stores that can serve files directly."""
+    return None
+
+
+class LocalBlobStore(BlobStore):
+  """
+  Blobs as files under ``root``, as <namespace>/ab/cd/<sha256>.
+
+  Uploads are written to root/tmp first and renamed into place once the
+  digest is known, so readers never see a partial blob. File IO runs in
+  the thread pool to keep the event loop free.
+  """
+
+  def __init__(self, root: str, chunk_size: int = 1024 * 1024):
+    self.root = os.path.abspath(root)
+    self.chunk_size = chunk_size
+    self._tmp = os.path.join(self.root, "tmp")
+
+  def local_path(self, namespace: str, sha256: str) -> str:
+    return os.path.join(self.root, namespace, sha256[:2], sha256[2:4], sha256)
+
+  async def put(self, namespace: str, chunks: AsyncIterator[bytes], max_bytes: int) -> StoredBlob:
+    await run_in_threadpool(os.makedirs, self._tmp, exist_ok=True)
+    tmp_path = os.path.join(self._tmp, uuid.uuid4().hex)
+    digest = hashlib.sha256()
+    size = 0
+    f = await run_in_threadpool(open, tmp_path, "wb")
+    try:
+      async for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+          raise PayloadTooLargeError(f"Attachment exceeds {max_bytes} bytes")
+        digest.update(chunk)
+        await run_in_threadpool(f.write, chunk)
+      await run_in_threadpool(f.close)
+      sha256 = digest.hexdigest()
+      path = self.local_path(namespace, sha256)
+      await run_in_threadpool(os.makedirs, os.path.dirname(path), exist_ok=True)
+      # Same content, same name: replacing an existing copy is the dedup.
+      await run_in_threadpool(os.replace, tmp_path, path)
+    except BaseException:
+      await run_in_threadpool(f.close)
+      await run_in_threadpool(_remove, tmp_path)
+      raise
+    return StoredBlob(sha256=sha256, size=size)
+
+  async def read(self, namespace: str, sha256: str, start: int, end: int) -> AsyncIterator[bytes]:
+    f = await run_in_threadpool(open, self.local_path(namespace, sha256), "rb")
+    try:
+      await run_in_threadpool(f.seek, start)
+      remaining = end - start + 1
+      while remaining > 0:
+        chunk = await run_in_threadpool(f.read, min(self.chunk_size, remaining))
+        if not chunk:
+          return
+        remaining -= len(chunk)
+        yield chunk
+    finally:
+      await run_in_threadpool(f.close)
+
+  async def delete(self, namespace: str, sha256: str, min_age_seconds: float = 0) -> None:
+    await run_in_threadpool(_remove, self.local_path(namespace, sha256), min_age_seconds)
+
+
+def _remove(path: str, min_age_seconds: float = 0) -> None:
+  try:
+    if min_age_seconds and time.time() - os.stat(path).st_mtime < min_age_seconds:
+      return
+    os.remove(path)
+  except FileNotFoundError:
+    pass
+
+
+def create_blob_store() -> BlobStore:
+  if settings.blob_store_backend == "local":
+    return LocalBlobStore(settings.blob_store_path, settings.attachment_chunk_size)
+  raise ValueError(f"Unknown blob store backend {settings.blob_store_backend!r}")
+
+
+blob_store = create_blob_store()
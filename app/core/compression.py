@@ -0,0 +1,135 @@
+import zlib
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+  import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+  brotli = None
+
+
+class CompressionMiddleware:
+  """
+  Compress responses with brotli or gzip, picked from Accept-Encoding.
+
+  Bodies smaller than ``minimum_size`` are sent as-is; streaming bodies
+  are compressed chunk by chunk. Event streams, byte-range capable file
+  responses and responses that already carry a Content-Encoding are
+  passed through untouched.
+  """
+
+  def __init__(
+    self,
+    app: ASGIApp,
+    minimum_size: int = 1024,
+    gzip_level: int = 6,
+    brotli_quality: int = 4
+  ):
+    self.app = app
+    self.minimum_size = minimum_size
+    self.gzip_level = gzip_level
+    self.brotli_quality = brotli_quality
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] != "http":
+      await self.app(scope, receive, send)
+      return
+    encoding = self._negotiate(Headers(scope=scope).get("accept-encoding", ""))
+    if encoding is None:
+      await self.app(scope, receive, send)
+      return
+    responder = _CompressionResponder(self, encoding, send)
+    await self.app(scope, receive, responder.send)
+
+  @staticmethod
+  def _negotiate(accept_encoding: str) -> Optional[str]:
+    offered = set()
+    for part in accept_encoding.lower().split(","):
+      name, _, params = part.strip().partition(";")
+      if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+        continue
+      offered.add(name.strip())
+    if brotli is not None and "br" in offered:
+      return "br"
+    if "gzip" in offered:
+      return "gzip"
+    return None
+
+
+class _CompressionResponder:
+  def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+    self.middleware = middleware
+    self.encoding = encoding
+    self._send = send
+    self.start_message: Optional[Message] = None
+    self.passthrough = False
+    self.compressor = None
+
+  async def send(self, message: Message) -> None:
+    if message["type"] == "http.response.start":
+      self.start_message = message
+      self.passthrough = self._is_passthrough(message)
+      if self.passthrough:
+        # Zero-copy file sends are not body messages, so don't hold the start.
+        self.start_message = None
+        await self._send(message)
+      return
+    if message["type"] != "http.response.body":
+      await self._send(message)
+      return
+
+    body = message.get("body", b"")
+    more_body = message.get("more_body", False)
+
+    if self.start_message is not None:
+      start, self.start_message = self.start_message, None
+      if self.passthrough or (not more_body and len(body) < self.middleware.minimum_size):
+        self.passthrough = True
+        await self._send(start)
+        await self._send(message)
+        return
+      self.compressor = self._new_compressor()
+      headers = MutableHeaders(raw=start["headers"])
+      headers["Content-Encoding"] = self.encoding
+      headers.add_vary_header("Accept-Encoding")
+      body = self._compress(body, finish=not more_body)
+      if more_body:
+        del headers["Content-Length"]
+      else:
+        headers["Content-Length"] = str(len(body))
+      await self._send(start)
+      await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+      return
+
+    if self.passthrough:
+      await self._send(message)
+      return
+    body = self._compress(body, finish=not more_body)
+    await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+  @staticmethod
+  def _is_passthrough(start: Message) -> bool:
+    headers = Headers(raw=start["headers"])
+    return (
+      "content-encoding" in headers
+      or headers.get("content-type", "").startswith("text/event-stream")
+      # Byte ranges refer to the stored bytes, not an encoded stream, so
+      # partial and range-capable responses must go out unencoded.
+      or start["status"] == 206
+      or "accept-ranges" in headers
+      or "content-range" in headers
+    )
+
+  def _new_compressor(self):
+    if self.encoding == "br":
+      return brotli.Compressor(quality=self.middleware.brotli_quality)
+    # wbits=31 produces a gzip container
+    return zlib.compressobj(self.middleware.gzip_level, zlib.DEFLATED, 31)
+
+  def _compress(self, data: bytes, finish: bool) -> bytes:
+    if self.encoding == "br":
+      out = self.compressor.process(data)
+      return out + (self.compressor.finish() if finish else self.compressor.flush())
+    out = self.compressor.compress(data)
+    return out + self.compressor.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
@@ -1,4 +1,5 @@
-from typing import Optional
+from typing import Dict, Optional
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -10,11 +11,90 @@ class Settings(BaseSettings):
   api_v1_str: str = "/app/v1"
   database_url:str
   sync_database_url: str
+  # tenant id -> async DSN for clinics sharded onto their own database
+  tenant_database_urls: Dict[int, str] = {}
+  # tenant id -> sync DSN of the same database, for Alembic
+  tenant_sync_database_urls: Dict[int, str] = {}
+  bulk_max_items: int = 10000
+  compression_minimum_size: int = 1024
+  dedup_max_block_size: int = 50
+  #live events
+  event_broker_backend: str = "local"
+  event_channel: str = "dashboard_events"
+  event_stream_queue_size: int = 100
+  event_stream_heartbeat_seconds: int = 15
+  event_listener_reconnect_min_seconds: float = 0.5
+  event_listener_reconnect_max_seconds: float = 30
+  #idempotency keys
+  idempotency_key_ttl_hours: int = 24
+  idempotency_claim_timeout_seconds: int = 120
+  idempotency_eviction_interval_seconds: int = 600
+  #analytics
+  analytics_cache_ttl_seconds: int = 300
+  analytics_cache_max_doctors: int = 10000
+  #audit log
+  audit_queue_size: int = 10000
+  audit_batch_size: int = 500
+  audit_flush_interval_seconds: float = 1.0
+  #database pool; None keeps NullPool (one connection per session)
+  db_pool_size: Optional[int] = None
+  db_max_overflow: int = 0
+  # connections across all workers and every database they open
+  db_connection_budget: int = 80
+  #attachments (blob_store_backend: local)
+  blob_store_backend: str = "local"
+  blob_store_path: str = "./blobs"
+  attachment_max_bytes: int = 50 * 1024 * 1024
+  attachment_chunk_size: int = 1024 * 1024
+  blob_delete_grace_seconds: int = 600
+  #sqlite (database_url = sqlite+aiosqlite:///path.db); run a single worker
+  sqlite_busy_timeout_ms: int = 5000
+  sqlite_cache_size_kib: int = 65536
+  sqlite_mmap_size: int = 268435456
+  #migrations
+  migration_lock_timeout_ms: int = 5000
+  #serve
+  web_bind: str = "0.0.0.0:8000"
+  web_workers: Optional[int] = None
+  web_graceful_timeout: int = 30
+  web_timeout: int = 60
+  web_keepalive: int = 5
+  # Workers restart after this many requests (plus up to 10% jitter, so
+  # they don't all restart together); 0 disables.
+  web_max_requests: int = 10000
+  web_restart_step_seconds: float = 10
   #jwt
   bcrypt_rounds: int = 12
-  jwt_secret_key: str
+  # Only the HS* algorithms use it; the others sign with the key files.
+  jwt_secret_key: Optional[str] = None
   jwt_algorithm: str = "HS256"
-  jwt_access_token_expire_minutes: int = 30
+  jwt_backend: str = "jose"
+  jwt_private_key_path: Optional[str] = None
+  jwt_public_key_path: Optional[str] = None
+  jwt_verify_cache_size: int = 1024
+  jwt_access_token_expire_minutes: int = 15
+  jwt_refresh_token_expire_days: int = 7
+  token_revocation_sync_seconds: int = 30
+  token_revocation_sync_overlap_seconds: int = 300
+  #rate limiting
+  rate_limit_enabled: bool = True
+  rate_limit_backend: str = "memory"
+  login_ip_burst: int = 20
+  login_ip_refill_per_second: float = 0.5
+  login_username_burst: int = 5
+  login_username_refill_per_second: float = 0.1
+  login_failure_limit: int = 10
+  login_failure_window_seconds: int = 900
+  #field encryption (keys are base64 32-byte secrets; key ids must not contain ':')
+  field_encryption_keys: Dict[str, str] = {}
+  field_encryption_active_key: Optional[str] = None
+  blind_index_key: Optional[str] = None
+  
+  @model_validator(mode="after")
+  def require_jwt_secret_key(self) -> "Settings":
+    if self.jwt_algorithm.startswith("HS") and not self.jwt_secret_key:
+      raise ValueError(f"jwt_secret_key is required for {self.jwt_algorithm}")
+    return self
   
   class Config:
     env_file = ".env"
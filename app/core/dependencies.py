@@ -1,33 +1,104 @@
-from typing import AsyncGenerator
-from fastapi import Depends, HTTPException, status
+from contextlib import aclosing
+from typing import AsyncGenerator, List, Optional
+from fastapi import Depends, HTTPException, Query, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError as PydanticValidationError
+from app.core.config import settings
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import db_manager
 from app.models.doctor import Doctor
 from app.services.auth import auth_service
 from app.services.doctor import doctor_service
+from app.services.token_service import token_service
 from app.core.exceptions import AuthenticationError
+from app.core.rate_limit import login_rate_limiter
+from app.core.encryption import current_tenant_id
+from app.schemas.doctor_schema import DoctorLogin
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-async def get_db_session() -> AsyncGenerator[AsyncSession,None]:
-  async for session in db_manager.get_session():
-    yield session
+READ_ONLY_METHODS = {"GET", "HEAD"}
+
+async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession,None]:
+  """
+  The request's session on the default database.
+  
+  FastAPI caches dependencies per request, so get_current_doctor and the
+  endpoint share this one session. GET requests run read-only
+  transactions. The session only checks out a connection on its first
+  query, so a request answered without the database never takes one.
+  """
+  # aclosing: if the endpoint raises, close the inner generator now rather
+  # than leaving its cleanup to the garbage collector.
+  async with aclosing(db_manager.get_session(read_only=request.method in READ_ONLY_METHODS)) as sessions:
+    async for session in sessions:
+      yield session
     
-async def get_current_doctor(
-    credentials: HTTPAuthorizationCredentials= Depends(security),
-    db: AsyncSession=Depends(get_db_session)
-  ) -> Doctor:
+async def get_tenant_db_session(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    default_session: AsyncSession = Depends(get_db_session)
+  ) -> AsyncGenerator[AsyncSession,None]:
+  """Session on the database that holds the caller's clinic (tenant) data."""
+  tenant_id = None
+  if credentials is not None:
+    payload = auth_service.verify_token(credentials.credentials)
+    if payload is not None:
+      tenant_id = payload.get("tenant_id")
+  if not db_manager.has_dedicated_database(tenant_id):
+    # Same database: reuse the request's session rather than opening another.
+    yield default_session
+    return
+  async with aclosing(db_manager.get_session(tenant_id, read_only=request.method in READ_ONLY_METHODS)) as sessions:
+    async for session in sessions:
+      yield session
+    
+async def parse_bulk_payload(request: Request, adapter: TypeAdapter) -> List:
+  """
+  Validate a JSON array body straight from bytes with a prebuilt TypeAdapter.
+
+  The adapter caps the list at ``bulk_max_items`` itself, so an oversized
+  body is rejected without validating every item first.
+  """
+  try:
+    return adapter.validate_json(await request.body())
+  except PydanticValidationError as e:
+    errors = e.errors()
+    if any(error["type"] == "too_long" and error["loc"] == () for error in errors):
+      raise HTTPException(
+          status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+          detail=f"At most {settings.bulk_max_items} items per request"
+      )
+    raise RequestValidationError(errors)
+    
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+    
+async def enforce_login_rate_limit(
+    request: Request,
+    login_data: DoctorLogin
+  ) -> DoctorLogin:
+    """Reject throttled login attempts before any DB or bcrypt work."""
+    await login_rate_limiter.check(client_ip(request), login_data.username)
+    return login_data
+    
+async def authenticate_access_token(token: str, db: AsyncSession) -> Doctor:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-      payload=auth_service.verify_token(credentials.credentials)
+      payload=auth_service.verify_token(token)
       if payload is None:
         raise credentials_exception
       
+      # Revocation is checked against the in-memory list only; no DB hit.
+      if payload.get("type") != "access_token" or token_service.revocation_list.is_revoked(payload.get("jti")):
+        raise credentials_exception
+      
       username:str = payload.get("sub")
       doctor_id: int = payload.get("doctor_id")
         
@@ -42,11 +113,45 @@ async def get_current_doctor(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Doctor account is inactive"
             )
+      # Selects the data key and blind index key for this request's writes.
+      current_tenant_id.set(doctor.tenant_id)
       return doctor
     except Exception as e:
       if isinstance(e, HTTPException):
             raise e
       raise credentials_exception
+    
+async def get_current_doctor(
+    credentials: HTTPAuthorizationCredentials= Depends(security),
+    db: AsyncSession=Depends(get_db_session)
+  ) -> Doctor:
+    return await authenticate_access_token(credentials.credentials, db)
+    
+async def get_streaming_doctor(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    access_token: Optional[str] = Query(None, description="For EventSource clients that cannot send headers")
+  ) -> Doctor:
+    """
+    Authenticate a long-lived streaming request.
+    
+    Uses its own short session so the stream doesn't hold a DB connection
+    open for its whole lifetime, and accepts the token as a query
+    parameter because browser EventSource cannot set headers. The token's
+    claims are kept on ``request.state.token_claims`` so the stream can
+    re-check expiry and revocation while it stays open.
+    """
+    token = credentials.credentials if credentials else access_token
+    if not token:
+      raise HTTPException(
+          status_code=status.HTTP_401_UNAUTHORIZED,
+          detail="Not authenticated",
+          headers={"WWW-Authenticate": "Bearer"},
+      )
+    async with db_manager.get_session_factory()() as db:
+      doctor = await authenticate_access_token(token, db)
+    request.state.token_claims = auth_service.verify_token(token)
+    return doctor
   
 async def get_active_doctor(
     current_doctor:Doctor=Depends(get_current_doctor)
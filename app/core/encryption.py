@@ -0,0 +1,126 @@
+import base64
+import hashlib
+import hmac
+import os
+import re
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
+from app.core.config import settings
+
+PREFIX = "enc1:"
+NONCE_SIZE = 12
+
+# Tenant whose data key encrypts new values and computes blind indexes.
+# Set once the caller is authenticated; None selects the shared default key.
+current_tenant_id: ContextVar[Optional[int]] = ContextVar("current_tenant_id", default=None)
+
+
+def _tenant_label(tenant_id: Optional[int]) -> str:
+  return "default" if tenant_id is None else str(tenant_id)
+
+
+def _derive(master: bytes, info: str) -> bytes:
+  # cryptography is imported on first use, keeping it off the import path
+  # of the app (models import this module).
+  from cryptography.hazmat.primitives import hashes
+  from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+  return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=info.encode()).derive(master)
+
+
+@lru_cache(maxsize=4096)
+def data_key(key_id: str, tenant: str):
+  """
+  AES-256-GCM cipher for one tenant under one master key.
+
+  Data keys are derived with HKDF rather than stored, and the cipher
+  objects are cached, so the per-field cost is one AEAD call with no key
+  schedule or KDF work on the hot path.
+  """
+  from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+  try:
+    master = base64.b64decode(settings.field_encryption_keys[key_id])
+  except KeyError:
+    raise LookupError(f"Unknown field encryption key {key_id!r}")
+  return AESGCM(_derive(master, f"field:{tenant}"))
+
+
+@lru_cache(maxsize=4096)
+def _blind_index_key(tenant: str) -> bytes:
+  # Separate from the encryption keys so rotating those keeps the index valid.
+  if settings.blind_index_key:
+    master = base64.b64decode(settings.blind_index_key)
+  elif encryption_enabled():
+    # An unkeyed hash of an email or phone number can be precomputed, which
+    # would undo the encryption of the column it indexes.
+    raise RuntimeError("BLIND_INDEX_KEY must be set when field encryption is enabled")
+  else:
+    # Values are stored in plaintext anyway; the index only has to be stable.
+    master = bytes(32)
+  return _derive(master, f"blind-index:{tenant}")
+
+
+def encryption_enabled() -> bool:
+  return settings.field_encryption_active_key is not None
+
+
+def check_configuration() -> None:
+  """Fail at startup, not on the first write, if the encryption keys are unusable."""
+  if not encryption_enabled():
+    return
+  if not settings.blind_index_key:
+    raise RuntimeError("BLIND_INDEX_KEY must be set when field encryption is enabled")
+  if settings.field_encryption_active_key not in settings.field_encryption_keys:
+    raise RuntimeError(
+      f"FIELD_ENCRYPTION_ACTIVE_KEY {settings.field_encryption_active_key!r} is not in FIELD_ENCRYPTION_KEYS"
+    )
+  for key_id, key in {**settings.field_encryption_keys, "blind index": settings.blind_index_key}.items():
+    if len(base64.b64decode(key)) != 32:
+      raise RuntimeError(f"Encryption key {key_id!r} must be 32 bytes, base64-encoded")
+
+
+def encrypt(value: Optional[str], aad: bytes) -> Optional[str]:
+  """
+  Encrypt a value with the active key for the current tenant.
+
+  The stored form is "enc1:<key id>:<tenant>:<base64 nonce+ciphertext>",
+  so reads find their key without any tenant context. The aad binds the
+  ciphertext to its column. Values pass through unchanged while no
+  active key is configured.
+  """
+  key_id = settings.field_encryption_active_key
+  if value is None or key_id is None:
+    return value
+  tenant = _tenant_label(current_tenant_id.get())
+  nonce = os.urandom(NONCE_SIZE)
+  sealed = data_key(key_id, tenant).encrypt(nonce, value.encode(), aad)
+  return f"{PREFIX}{key_id}:{tenant}:{base64.b64encode(nonce + sealed).decode('ascii')}"
+
+
+def decrypt(stored: Optional[str], aad: bytes) -> Optional[str]:
+  if stored is None or not stored.startswith(PREFIX):
+    # Written before encryption was enabled; `cli encrypt-phi` converts these.
+    return stored
+  key_id, tenant, payload = stored[len(PREFIX):].split(":", 2)
+  raw = base64.b64decode(payload)
+  return data_key(key_id, tenant).decrypt(raw[:NONCE_SIZE], raw[NONCE_SIZE:], aad).decode()
+
+
+def blind_index(value: Optional[str]) -> Optional[str]:
+  """Keyed hash of an already normalized value for indexable equality lookups."""
+  if not value:
+    return None
+  key = _blind_index_key(_tenant_label(current_tenant_id.get()))
+  return hmac.new(key, value.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def email_blind_index(email: Optional[str]) -> Optional[str]:
+  return blind_index(email.strip().lower() if email else None)
+
+
+def contact_blind_index(contact: Optional[str]) -> Optional[str]:
+  return blind_index(re.sub(r"\D", "", contact) if contact else None)
+
+
+def text_blind_index(value: Optional[str]) -> Optional[str]:
+  return blind_index(" ".join(value.lower().split()) if value else None)
@@ -30,4 +30,15 @@ class ValidationError(DoctorDashboardError):
 
 class DatabaseError(DoctorDashboardError):
     """Exception raised for database-related errors."""
-    pass
\ No newline at end of file
+    pass
+
+class PayloadTooLargeError(DoctorDashboardError):
+    """Exception raised when an uploaded body exceeds its size limit."""
+    pass
+
+class RateLimitExceededError(DoctorDashboardError):
+    """Exception raised when a client exceeds a rate limit."""
+
+    def __init__(self, message: str, retry_after: float = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,48 @@
+from typing import Callable, List, Optional, Type
+from fastapi import HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def selectable_fields(schema: Type[BaseModel], model) -> List[str]:
+  """Response fields that map to a plain column on the model."""
+  # Read the table rather than inspect(model): that would configure the
+  # mappers at import time, before every related model is imported.
+  columns = set(model.__table__.columns.keys())
+  return [name for name in schema.model_fields if name in columns]
+
+
+def sparse_fields(schema: Type[BaseModel], model) -> Callable[..., Optional[List[str]]]:
+  """
+  Build a dependency for a ``?fields=a,b`` sparse-fieldset parameter.
+
+  Resolves to None when the parameter is absent, otherwise to the list of
+  requested columns (always including ``id``), in schema order.
+  """
+  allowed = selectable_fields(schema, model)
+
+  def dependency(
+    fields: Optional[str] = Query(
+      None,
+      description=f"Comma-separated subset of: {', '.join(allowed)}"
+    )
+  ) -> Optional[List[str]]:
+    if not fields:
+      return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+      raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Unknown or non-selectable fields: {', '.join(sorted(unknown))}"
+      )
+    requested.add("id")
+    return [name for name in allowed if name in requested]
+
+  return dependency
+
+
+def sparse_response(rows) -> JSONResponse:
+  """Serialize projected rows directly, bypassing the full response_model."""
+  return JSONResponse(content=jsonable_encoder(rows))
@@ -0,0 +1,92 @@
+from typing import Mapping, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+
+class RangeNotSatisfiable(Exception):
+  pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+  """
+  Resolve a single "bytes=" Range header to an inclusive (start, end).
+
+  Returns None when the whole body should be sent: no header, a malformed
+  one, or multiple ranges (which a server may ignore). Raises
+  RangeNotSatisfiable when the range lies outside the body.
+  """
+  if not header or not header.startswith("bytes=") or "," in header:
+    return None
+  first, dash, last = header[len("bytes="):].strip().partition("-")
+  if not dash:
+    return None
+  try:
+    if not first:
+      # Suffix range: the final N bytes.
+      length = int(last)
+      if length <= 0 or size == 0:
+        raise RangeNotSatisfiable()
+      return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+  except ValueError:
+    return None
+  if start >= size:
+    raise RangeNotSatisfiable()
+  if end < start:
+    return None
+  return start, min(end, size - 1)
+
+
+class FileRangeResponse(Response):
+  """
+  Send bytes [start, end] of a file.
+
+  Uses the ASGI zero-copy send extension (sendfile) when the server
+  offers it; otherwise reads chunks in the thread pool, so memory stays
+  bounded by ``chunk_size`` whatever the file size.
+  """
+
+  chunk_size = 256 * 1024
+
+  def __init__(
+    self,
+    path: str,
+    start: int,
+    end: int,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+    media_type: Optional[str] = None
+  ):
+    self.path = path
+    self.start = start
+    self.end = end
+    self.status_code = status_code
+    self.media_type = media_type
+    self.background = None
+    self.init_headers(headers)
+    self.headers["content-length"] = str(max(0, end - start + 1))
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+    await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+    length = self.end - self.start + 1
+    if scope["method"] == "HEAD" or length <= 0:
+      await send({"type": "http.response.body", "body": b""})
+      return
+    f = await run_in_threadpool(open, self.path, "rb")
+    try:
+      if "http.response.zerocopysend" in scope.get("extensions", {}):
+        await send({"type": "http.response.zerocopysend", "file": f, "offset": self.start, "count": length})
+        return
+      await run_in_threadpool(f.seek, self.start)
+      remaining = length
+      while remaining > 0:
+        chunk = await run_in_threadpool(f.read, min(self.chunk_size, remaining))
+        if not chunk:
+          break
+        remaining -= len(chunk)
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+      await send({"type": "http.response.body", "body": b""})
+    finally:
+      await run_in_threadpool(f.close)
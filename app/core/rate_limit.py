@@ -0,0 +1,260 @@
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.exceptions import RateLimitExceededError
+
+
+class RateLimitStore(ABC):
+  """Storage backend for token buckets and sliding windows."""
+
+  @abstractmethod
+  async def take_token(self, key: str, capacity: int, refill_rate: float) -> float:
+    """Take one token from the bucket; return 0 if allowed, else seconds to wait."""
+
+  @abstractmethod
+  async def peek_token(self, key: str, capacity: int, refill_rate: float) -> float:
+    """Like take_token, but leave the bucket as it is."""
+
+  @abstractmethod
+  async def record_hit(self, key: str, window: int) -> int:
+    """Record a hit in the sliding window and return the hit count."""
+
+  @abstractmethod
+  async def count_hits(self, key: str, window: int) -> int:
+    """Return the number of hits currently inside the sliding window."""
+
+  @abstractmethod
+  async def reset(self, key: str) -> None:
+    """Forget all state stored under the key."""
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+  """Per-process store; state is lost on restart and not shared between workers."""
+
+  def __init__(self, max_keys: int = 100_000):
+    self.max_keys = max_keys
+    self._buckets: Dict[str, Tuple[float, float]] = {}
+    self._windows: Dict[str, Deque[float]] = {}
+
+  async def take_token(self, key: str, capacity: int, refill_rate: float) -> float:
+    now = time.monotonic()
+    # Popped and re-inserted so recently used keys move to the end.
+    state = self._buckets.pop(key, None)
+    if state is None:
+      self._evict(self._buckets)
+      state = (float(capacity), now)
+    tokens = self._refill(state, capacity, refill_rate, now)
+    if tokens < 1:
+      self._buckets[key] = (tokens, now)
+      return (1 - tokens) / refill_rate
+    self._buckets[key] = (tokens - 1, now)
+    return 0.0
+
+  async def peek_token(self, key: str, capacity: int, refill_rate: float) -> float:
+    state = self._buckets.get(key)
+    if state is None:
+      return 0.0
+    tokens = self._refill(state, capacity, refill_rate, time.monotonic())
+    return 0.0 if tokens >= 1 else (1 - tokens) / refill_rate
+
+  async def record_hit(self, key: str, window: int) -> int:
+    now = time.monotonic()
+    hits = self._windows.pop(key, None)
+    if hits is None:
+      self._evict(self._windows)
+      hits = deque()
+    self._windows[key] = hits
+    hits.append(now)
+    self._trim(hits, now - window)
+    return len(hits)
+
+  async def count_hits(self, key: str, window: int) -> int:
+    hits = self._windows.get(key)
+    if not hits:
+      return 0
+    self._trim(hits, time.monotonic() - window)
+    return len(hits)
+
+  async def reset(self, key: str) -> None:
+    self._buckets.pop(key, None)
+    self._windows.pop(key, None)
+
+  @staticmethod
+  def _refill(state: Tuple[float, float], capacity: int, refill_rate: float, now: float) -> float:
+    tokens, last = state
+    return min(float(capacity), tokens + (now - last) * refill_rate)
+
+  @staticmethod
+  def _trim(hits: Deque[float], cutoff: float) -> None:
+    while hits and hits[0] <= cutoff:
+      hits.popleft()
+
+  def _evict(self, table: dict) -> None:
+    # Dicts keep insertion order and used keys are re-inserted, so the
+    # first keys are the least recently used.
+    while len(table) >= self.max_keys:
+      table.pop(next(iter(table)))
+
+
+class LocalKeyValueClient:
+  """In-process stand-in for a shared key/value server (get/set/incr with TTL)."""
+
+  def __init__(self):
+    self._data: Dict[str, Tuple[str, float]] = {}
+
+  async def get(self, key: str) -> Optional[str]:
+    item = self._data.get(key)
+    if item is None:
+      return None
+    if item[1] <= time.time():
+      del self._data[key]
+      return None
+    return item[0]
+
+  async def set(self, key: str, value: str, ttl: int) -> None:
+    self._data[key] = (value, time.time() + ttl)
+
+  async def incr(self, key: str, ttl: int) -> int:
+    value = int(await self.get(key) or 0) + 1
+    expires = self._data[key][1] if key in self._data else time.time() + ttl
+    self._data[key] = (str(value), expires)
+    return value
+
+  async def delete(self, key: str) -> None:
+    self._data.pop(key, None)
+
+
+class SharedRateLimitStore(RateLimitStore):
+  """
+  Store backed by a shared key/value client so limits hold across workers.
+
+  Sliding windows use the two-bucket sliding window counter, which only needs
+  INCR with expiry and stays O(1) per key.
+  """
+
+  def __init__(self, client, prefix: str = "ratelimit"):
+    self.client = client
+    self.prefix = prefix
+
+  async def take_token(self, key: str, capacity: int, refill_rate: float) -> float:
+    bucket_key = f"{self.prefix}:bucket:{key}"
+    now = time.time()
+    tokens = await self._tokens(bucket_key, capacity, refill_rate, now)
+    ttl = int(capacity / refill_rate) + 1
+    if tokens < 1:
+      await self.client.set(bucket_key, f"{tokens}:{now}", ttl)
+      return (1 - tokens) / refill_rate
+    await self.client.set(bucket_key, f"{tokens - 1}:{now}", ttl)
+    return 0.0
+
+  async def peek_token(self, key: str, capacity: int, refill_rate: float) -> float:
+    tokens = await self._tokens(f"{self.prefix}:bucket:{key}", capacity, refill_rate, time.time())
+    return 0.0 if tokens >= 1 else (1 - tokens) / refill_rate
+
+  async def record_hit(self, key: str, window: int) -> int:
+    now = time.time()
+    current = int(now // window)
+    await self.client.incr(self._window_key(key, current), window * 2)
+    # Lets reset() find the window counters without knowing the window.
+    await self.client.set(f"{self.prefix}:window-size:{key}", str(window), window * 2)
+    return await self._weighted_count(key, window, now)
+
+  async def count_hits(self, key: str, window: int) -> int:
+    return await self._weighted_count(key, window, time.time())
+
+  async def reset(self, key: str) -> None:
+    await self.client.delete(f"{self.prefix}:bucket:{key}")
+    window = await self.client.get(f"{self.prefix}:window-size:{key}")
+    if window is not None:
+      current = int(time.time() // int(window))
+      await self.client.delete(self._window_key(key, current))
+      await self.client.delete(self._window_key(key, current - 1))
+      await self.client.delete(f"{self.prefix}:window-size:{key}")
+
+  async def _tokens(self, bucket_key: str, capacity: int, refill_rate: float, now: float) -> float:
+    raw = await self.client.get(bucket_key)
+    if raw is None:
+      return float(capacity)
+    tokens_str, last_str = raw.split(":")
+    return min(float(capacity), float(tokens_str) + (now - float(last_str)) * refill_rate)
+
+  def _window_key(self, key: str, index: int) -> str:
+    return f"{self.prefix}:window:{key}:{index}"
+
+  async def _weighted_count(self, key: str, window: int, now: float) -> int:
+    current = int(now // window)
+    elapsed = (now % window) / window
+    this_window = int(await self.client.get(self._window_key(key, current)) or 0)
+    last_window = int(await self.client.get(self._window_key(key, current - 1)) or 0)
+    return int(this_window + last_window * (1 - elapsed))
+
+
+class LoginRateLimiter:
+  """
+  Throttles login attempts per client IP and per username.
+
+  Failed attempts are counted per (username, client IP), so repeated
+  failures lock out that client only; anyone could otherwise lock any
+  account by guessing wrong. Spreading guesses over many IPs is still
+  bounded by the per-username bucket, which only failed attempts drain,
+  so the owner's own sign-ins never use it up.
+  """
+
+  def __init__(self, store: RateLimitStore):
+    self.store = store
+
+  async def check(self, ip: str, username: str) -> None:
+    """Raise RateLimitExceededError if this attempt must be rejected."""
+    if not settings.rate_limit_enabled:
+      return
+    username = username.lower()
+    failures = await self.store.count_hits(
+      self._failure_key(ip, username), settings.login_failure_window_seconds
+    )
+    if failures >= settings.login_failure_limit:
+      raise RateLimitExceededError(
+        "Too many failed login attempts",
+        retry_after=settings.login_failure_window_seconds
+      )
+    retry_after = (
+      await self.store.take_token(f"login:ip:{ip}", settings.login_ip_burst, settings.login_ip_refill_per_second)
+      or await self.store.peek_token(self._username_key(username), *self._username_bucket())
+    )
+    if retry_after:
+      raise RateLimitExceededError("Too many login attempts", retry_after=retry_after)
+
+  async def record_failure(self, ip: str, username: str) -> None:
+    if settings.rate_limit_enabled:
+      username = username.lower()
+      await self.store.record_hit(
+        self._failure_key(ip, username), settings.login_failure_window_seconds
+      )
+      await self.store.take_token(self._username_key(username), *self._username_bucket())
+
+  async def record_success(self, ip: str, username: str) -> None:
+    username = username.lower()
+    await self.store.reset(self._username_key(username))
+    await self.store.reset(self._failure_key(ip, username))
+
+  @staticmethod
+  def _failure_key(ip: str, username: str) -> str:
+    return f"login:fail:{username}:{ip}"
+
+  @staticmethod
+  def _username_key(username: str) -> str:
+    return f"login:user:{username}"
+
+  @staticmethod
+  def _username_bucket() -> Tuple[int, float]:
+    return settings.login_username_burst, settings.login_username_refill_per_second
+
+
+def create_rate_limit_store() -> RateLimitStore:
+  if settings.rate_limit_backend == "shared":
+    return SharedRateLimitStore(LocalKeyValueClient())
+  return InMemoryRateLimitStore()
+
+
+login_rate_limiter = LoginRateLimiter(create_rate_limit_store())
@@ -0,0 +1,132 @@
+"""
+Production launcher: gunicorn master with uvicorn workers.
+
+The app is imported once in the master before forking, so workers share
+its memory copy-on-write. Each worker runs the lifespan hook itself and
+builds its own DB engines after the fork, with pools sized so that all
+workers together stay within settings.db_connection_budget on every
+database server.
+
+Workers restart one at a time: each is gracefully replaced after
+settings.web_max_requests requests, with jitter so they drift apart, and
+rolling_restart() steps through all of them on demand with TTIN/TTOU.
+HUP instead replaces every worker at once. New workers fork from the
+preloaded master, so none of these load new code: to deploy, send USR2
+to start a new master, then QUIT to the old master once the new one is
+up.
+
+SQLite runs a single worker: its writers are serialized by a lock inside
+each process, so a second worker would bring back "database is locked".
+"""
+import gc
+import os
+import signal
+import time
+from collections import Counter
+from typing import Optional
+from gunicorn.app.base import BaseApplication
+from sqlalchemy.engine import make_url
+from uvicorn.workers import UvicornWorker
+from app.core.config import settings
+
+
+class TunedUvicornWorker(UvicornWorker):
+  CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+
+def uses_sqlite() -> bool:
+  return make_url(settings.database_url).get_backend_name() == "sqlite"
+
+
+def default_worker_count() -> int:
+  if settings.web_workers:
+    return settings.web_workers
+  if uses_sqlite():
+    return 1
+  return os.cpu_count() or 1
+
+
+def pool_size_per_worker(workers: int) -> int:
+  # Each worker opens a pool per database: the default one and every
+  # dedicated tenant database. settings.db_connection_budget applies to
+  # each database server, shared by the databases it hosts; overflow
+  # connections count as well.
+  database_urls = [settings.database_url, *settings.tenant_database_urls.values()]
+  servers = Counter((url.host, url.port) for url in map(make_url, database_urls))
+  pools = workers * max(servers.values())
+  pool_size = settings.db_connection_budget // pools - settings.db_max_overflow
+  if pool_size < 1:
+    raise ValueError(
+      f"db_connection_budget={settings.db_connection_budget} cannot fit {pools} pools on one "
+      f"database server with db_max_overflow={settings.db_max_overflow}; "
+      "raise the budget or run fewer workers."
+    )
+  return pool_size
+
+
+def rolling_restart(
+  master_pid: int,
+  workers: Optional[int] = None,
+  step_seconds: Optional[float] = None
+) -> None:
+  """
+  Replace a running master's workers one at a time.
+
+  TTIN adds a worker; once it has had ``step_seconds`` to boot, TTOU makes
+  the master gracefully stop its oldest one, so capacity never drops
+  below ``workers``.
+  """
+  workers = workers or default_worker_count()
+  if step_seconds is None:
+    step_seconds = settings.web_restart_step_seconds
+  for _ in range(workers):
+    os.kill(master_pid, signal.SIGTTIN)
+    time.sleep(step_seconds)
+    os.kill(master_pid, signal.SIGTTOU)
+
+
+class Server(BaseApplication):
+  def __init__(self, app_path: str, options: dict):
+    self.app_path = app_path
+    self.options = options
+    super().__init__()
+
+  def load_config(self) -> None:
+    for key, value in self.options.items():
+      if value is not None:
+        self.cfg.set(key, value)
+
+  def load(self):
+    module_name, _, attr = self.app_path.partition(":")
+    module = __import__(module_name, fromlist=[attr])
+    app = getattr(module, attr)
+    # Move everything allocated during import into the permanent
+    # generation so the GC doesn't touch (and un-share) those pages.
+    gc.freeze()
+    return app
+
+
+def serve(
+  bind: Optional[str] = None,
+  workers: Optional[int] = None,
+  app_path: str = "main:app"
+) -> None:
+  workers = workers or default_worker_count()
+  if workers > 1 and uses_sqlite():
+    raise ValueError(
+      f"SQLite supports a single worker (got {workers}); its write lock is per process. "
+      "Use PostgreSQL to run more workers."
+    )
+  # Set before the app is imported so every worker's init_db() sees it.
+  settings.db_pool_size = pool_size_per_worker(workers)
+  Server(app_path, {
+    "bind": bind or settings.web_bind,
+    "workers": workers,
+    "worker_class": "app.core.server.TunedUvicornWorker",
+    "preload_app": True,
+    "graceful_timeout": settings.web_graceful_timeout,
+    "timeout": settings.web_timeout,
+    "keepalive": settings.web_keepalive,
+    "max_requests": settings.web_max_requests,
+    "max_requests_jitter": settings.web_max_requests // 10 or None,
+  }).run()
@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+from sqlalchemy.orm import make_transient_to_detached
+
+
+class SingleFlight:
+  """
+  Coalesce concurrent identical reads within this worker.
+
+  The first caller for a key runs the query; callers arriving while it is
+  in flight await the same result instead of issuing their own. Nothing
+  is cached once the call finishes. Results are shared between callers,
+  so ``fn`` must return plain data, not ORM instances bound to the
+  leader's session.
+
+  Keys are grouped by scope (the doctor id) so a write can ``forget`` the
+  scope: later callers then start a fresh query instead of joining one
+  that began before the write committed.
+  """
+
+  registry: List["SingleFlight"] = []
+
+  def __init__(self, name: str):
+    self.name = name
+    self.executions = 0
+    self.coalesced = 0
+    self._calls: Dict[Hashable, Dict[Hashable, asyncio.Future]] = {}
+    SingleFlight.registry.append(self)
+
+  async def do(self, scope: Hashable, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+    while True:
+      calls = self._calls.setdefault(scope, {})
+      future = calls.get(key)
+      if future is None:
+        return await self._lead(scope, key, calls, fn)
+      self.coalesced += 1
+      try:
+        return await asyncio.shield(future)
+      except asyncio.CancelledError:
+        if not future.cancelled():
+          raise
+        # The leader was cancelled, not us: run the query again.
+        self.coalesced -= 1
+
+  async def _lead(self, scope, key, calls: dict, fn) -> Any:
+    future = asyncio.get_running_loop().create_future()
+    calls[key] = future
+    self.executions += 1
+    try:
+      result = await fn()
+    except asyncio.CancelledError:
+      future.cancel()
+      raise
+    except BaseException as exc:
+      future.set_exception(exc)
+      # Followers retrieve it; mark it retrieved so an unshared failure isn't logged.
+      future.exception()
+      raise
+    else:
+      future.set_result(result)
+      return result
+    finally:
+      if calls.get(key) is future:
+        del calls[key]
+      if not calls and self._calls.get(scope) is calls:
+        del self._calls[scope]
+
+  def forget(self, scope: Hashable) -> None:
+    self._calls.pop(scope, None)
+
+  def stats(self) -> dict:
+    return {"executions": self.executions, "coalesced": self.coalesced, "in_flight": sum(len(c) for c in self._calls.values())}
+
+
+def single_flight_stats() -> Dict[str, dict]:
+  return {flight.name: flight.stats() for flight in SingleFlight.registry}
+
+
+async def attach(db, model, values: dict):
+  """Turn a shared row into an instance of ``model`` in the caller's session, without a query."""
+  instance = model(**values)
+  make_transient_to_detached(instance)
+  return await db.merge(instance, load=False)
@@ -1,4 +1,7 @@
-from typing import AsyncGenerator, Optional
+import asyncio
+from typing import AsyncGenerator, Dict, Optional
+from sqlalchemy import Delete, Insert, TextClause, Update, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
   AsyncEngine,
   AsyncSession,
@@ -9,32 +12,201 @@ from sqlalchemy.pool import NullPool
 from app.core.config import settings
 from sqlalchemy.orm import declarative_base
 
+
+def sqlite_pragmas() -> list:
+  return [
+    # Readers don't block the writer and vice versa.
+    "PRAGMA journal_mode=WAL",
+    # Safe with WAL; only the last commits can be lost on power failure.
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+    f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}",
+    f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+    "PRAGMA temp_store=MEMORY",
+  ]
+
+
+class SQLiteSession(AsyncSession):
+  """
+  Session that joins the database's single-writer queue before writing.
+
+  SQLite allows one writer at a time, and concurrent writers otherwise
+  fail with "database is locked". The session waits its turn (FIFO) on
+  its first write: a flush with pending changes, an INSERT/UPDATE/DELETE,
+  a SELECT ... FOR UPDATE or a text() statement. It keeps its turn until
+  commit, rollback or close, so a locked-for-update read and the write
+  that follows it can't interleave with another writer.
+  """
+
+  def __init__(self, *args, write_lock: asyncio.Lock, **kwargs):
+    super().__init__(*args, **kwargs)
+    self._write_lock = write_lock
+    self._writing = False
+
+  async def _begin_write(self) -> None:
+    if not self._writing:
+      await self._write_lock.acquire()
+      self._writing = True
+
+  def _end_write(self) -> None:
+    if self._writing:
+      self._writing = False
+      self._write_lock.release()
+
+  def _has_pending(self) -> bool:
+    return bool(self.sync_session.new or self.sync_session.dirty or self.sync_session.deleted)
+
+  @staticmethod
+  def _writes(statement) -> bool:
+    return (
+      isinstance(statement, (Insert, Update, Delete, TextClause))
+      or getattr(statement, "_for_update_arg", None) is not None
+    )
+
+  async def execute(self, statement, *args, **kwargs):
+    if self._writes(statement):
+      await self._begin_write()
+    return await super().execute(statement, *args, **kwargs)
+
+  async def scalar(self, statement, *args, **kwargs):
+    if self._writes(statement):
+      await self._begin_write()
+    return await super().scalar(statement, *args, **kwargs)
+
+  async def flush(self, objects=None) -> None:
+    if self._has_pending():
+      await self._begin_write()
+    await super().flush(objects)
+
+  async def commit(self) -> None:
+    if self._has_pending():
+      await self._begin_write()
+    await super().commit()
+    self._end_write()
+
+  async def rollback(self) -> None:
+    try:
+      await super().rollback()
+    finally:
+      self._end_write()
+
+  async def close(self) -> None:
+    try:
+      await super().close()
+    finally:
+      self._end_write()
+
+
 class DatabaseManager:
   def __init__(self):
     self.engine: Optional[AsyncEngine] = None
     self.session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+    # Tenants listed in settings.tenant_database_urls get their own engine;
+    # every other tenant shares the default one.
+    self.tenant_engines: Dict[int, AsyncEngine] = {}
+    self.tenant_session_factories: Dict[int, async_sessionmaker[AsyncSession]] = {}
+    # Engine copies whose transactions start as BEGIN READ ONLY; keyed like
+    # tenant_engines, with None for the default database.
+    self.read_only_engines: Dict[Optional[int], AsyncEngine] = {}
     
     
-  def init_db(self) -> None:
-    self.engine = create_async_engine(
-      settings.database_url,
-      poolclass = NullPool,
+  def init_db(self, database_url: Optional[str] = None) -> None:
+    self.engine = self._create_engine(database_url or settings.database_url)
+    self.session_factory = self._create_session_factory(self.engine)
+    
+  def _create_engine(self, database_url: str) -> AsyncEngine:
+    if make_url(database_url).get_backend_name() == "sqlite":
+      return self._create_sqlite_engine(database_url)
+    if settings.db_pool_size:
+      pool_options = dict(
+        pool_size = settings.db_pool_size,
+        max_overflow = settings.db_max_overflow,
+        pool_pre_ping = True
+      )
+    else:
+      pool_options = dict(poolclass = NullPool)
+    return create_async_engine(
+      database_url,
+      echo = settings.debug,
+      future = True,
+      **pool_options
+    )
+    
+  def _create_sqlite_engine(self, database_url: str) -> AsyncEngine:
+    # The default pool keeps connections (and their page cache) open.
+    engine = create_async_engine(
+      database_url,
       echo = settings.debug,
-      future = True
+      connect_args = {"timeout": settings.sqlite_busy_timeout_ms / 1000}
     )
-    self.session_factory = async_sessionmaker(
-      bind = self.engine,
-      class_ = AsyncSession,
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+      cursor = dbapi_connection.cursor()
+      for pragma in sqlite_pragmas():
+        cursor.execute(pragma)
+      cursor.close()
+
+    return engine
+
+  def _create_session_factory(self, engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    if engine.dialect.name == "sqlite":
+      # One writer queue per database file.
+      options = dict(class_ = SQLiteSession, write_lock = asyncio.Lock())
+    else:
+      options = dict(class_ = AsyncSession)
+    return async_sessionmaker(
+      bind = engine,
       expire_on_commit = False,
       autocommit = False,
-      autoflush = False
+      autoflush = False,
+      **options
     )
     
-  async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
+  def has_dedicated_database(self, tenant_id: Optional[int]) -> bool:
+    return tenant_id is not None and tenant_id in settings.tenant_database_urls
+    
+  def get_session_factory(self, tenant_id: Optional[int] = None) -> async_sessionmaker[AsyncSession]:
     if not self.session_factory:
       raise RuntimeError("Database not initialized. Call init_db() first.")
+    if not self.has_dedicated_database(tenant_id):
+      return self.session_factory
+    # Tenant engines are built on the first request for that tenant, so
+    # startup cost doesn't grow with the number of sharded clinics.
+    if tenant_id not in self.tenant_session_factories:
+      engine = self._create_engine(settings.tenant_database_urls[tenant_id])
+      self.tenant_engines[tenant_id] = engine
+      self.tenant_session_factories[tenant_id] = self._create_session_factory(engine)
+    return self.tenant_session_factories[tenant_id]
+    
+  def get_read_only_engine(self, tenant_id: Optional[int] = None) -> Optional[AsyncEngine]:
+    """Engine whose transactions are read-only, or None if the backend has no such mode."""
+    session_factory = self.get_session_factory(tenant_id)
+    key = tenant_id if self.has_dedicated_database(tenant_id) else None
+    if key not in self.read_only_engines:
+      engine = session_factory.kw["bind"]
+      if engine.dialect.name != "postgresql":
+        return None
+      # asyncpg folds this into its BEGIN, so it costs no extra round trip,
+      # and the pool resets it when the connection is returned.
+      self.read_only_engines[key] = engine.execution_options(postgresql_readonly=True)
+    return self.read_only_engines[key]
+    
+  async def get_session(
+    self,
+    tenant_id: Optional[int] = None,
+    read_only: bool = False
+  ) -> AsyncGenerator[AsyncSession, None]:
+    session_factory = self.get_session_factory(tenant_id)
+    options = {}
+    if read_only:
+      read_only_engine = self.get_read_only_engine(tenant_id)
+      if read_only_engine is not None:
+        options["bind"] = read_only_engine
     
-    async with self.session_factory() as session:
+    # No connection is checked out until the session's first query.
+    async with session_factory(**options) as session:
       try:
         yield session
       except Exception as e:
@@ -46,6 +218,11 @@ class DatabaseManager:
   async def close(self) -> None:
     if self.engine:
       await self.engine.dispose()
+    for engine in self.tenant_engines.values():
+      await engine.dispose()
+    self.tenant_engines.clear()
+    self.tenant_session_factories.clear()
+    self.read_only_engines.clear()
       
 db_manager = DatabaseManager()
 Base = declarative_base()
@@ -0,0 +1,298 @@
+"""
+Helpers for online, lock-safe Alembic revisions.
+
+Use these in alembic/versions/ instead of the plain ``op`` calls when a
+revision touches a large table:
+
+    from app.db.migrations import create_index_concurrently, batched_backfill
+
+Statements that would block writes for long are split into short
+transactions or run CONCURRENTLY. On SQLite the index helpers and
+lock_timeout fall back to the plain operations; the constraint helpers
+are Postgres-only. During a preflight run (see
+``python -m app.cli migration-preflight``) CONCURRENTLY steps are
+recorded but not executed, because they can't run inside the preflight's
+rolled-back transaction.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence
+from alembic import context, op
+import sqlalchemy as sa
+
+logger = logging.getLogger("alembic.online")
+
+
+def is_preflight() -> bool:
+  return bool(context.config.attributes.get("preflight"))
+
+
+def is_postgresql() -> bool:
+  return op.get_bind().dialect.name == "postgresql"
+
+
+def _record_skipped(description: str) -> None:
+  skipped = context.config.attributes.setdefault("preflight_skipped", [])
+  skipped.append(description)
+
+
+@contextmanager
+def lock_timeout(timeout_ms: int, statement_timeout_ms: Optional[int] = None) -> Iterator[None]:
+  """Fail fast instead of queueing behind (and blocking) other transactions."""
+  if is_postgresql():
+    op.execute(f"SET LOCAL lock_timeout = {int(timeout_ms)}")
+    if statement_timeout_ms is not None:
+      op.execute(f"SET LOCAL statement_timeout = {int(statement_timeout_ms)}")
+  yield
+
+
+def create_index_concurrently(
+  index_name: str,
+  table_name: str,
+  columns: Sequence[str],
+  unique: bool = False,
+  where: Optional[str] = None,
+  include: Optional[Sequence[str]] = None
+) -> None:
+  """CREATE INDEX CONCURRENTLY: takes SHARE UPDATE EXCLUSIVE, so writes continue."""
+  if not is_postgresql():
+    op.create_index(
+      index_name, table_name, list(columns), unique=unique,
+      sqlite_where=sa.text(where) if where else None,
+    )
+    return
+  if is_preflight():
+    _record_skipped(f"CREATE INDEX CONCURRENTLY {index_name} ON {table_name}")
+    return
+  with context.get_context().autocommit_block(), _without_lock_timeout():
+    valid = op.get_bind().execute(_INDEX_IS_VALID, {"name": index_name}).scalar()
+    if valid:
+      return
+    if valid is not None:
+      # A failed or cancelled build leaves an INVALID index that is never
+      # used for reads but still slows every write; IF NOT EXISTS would
+      # keep it. Drop it and build again.
+      logger.warning("rebuilding invalid index %s", index_name)
+      op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True)
+    op.create_index(
+      index_name, table_name, list(columns),
+      unique=unique,
+      postgresql_concurrently=True,
+      postgresql_where=sa.text(where) if where else None,
+      postgresql_include=list(include or []),
+    )
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+  if not is_postgresql():
+    op.drop_index(index_name, table_name=table_name)
+    return
+  if is_preflight():
+    _record_skipped(f"DROP INDEX CONCURRENTLY {index_name}")
+    return
+  with context.get_context().autocommit_block(), _without_lock_timeout():
+    op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+
+
+_INDEX_IS_VALID = sa.text(
+  "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+  "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+)
+
+
+@contextmanager
+def _without_lock_timeout() -> Iterator[None]:
+  """
+  Lift the session lock_timeout set in env.py for a CONCURRENTLY step.
+
+  These take only SHARE UPDATE EXCLUSIVE, which blocks no reads or
+  writes, but wait for every open transaction on the table. A timeout
+  there cancels the step halfway and leaves the index INVALID.
+  """
+  bind = op.get_bind()
+  previous = bind.exec_driver_sql("SHOW lock_timeout").scalar()
+  bind.exec_driver_sql("SET lock_timeout = 0")
+  try:
+    yield
+  finally:
+    bind.exec_driver_sql(f"SET lock_timeout = '{previous}'")
+
+
+def add_foreign_key_not_valid(
+  constraint_name: str,
+  source_table: str,
+  referent_table: str,
+  local_cols: List[str],
+  remote_cols: List[str],
+  ondelete: Optional[str] = None
+) -> None:
+  """Add a foreign key without scanning existing rows; follow with validate_constraint()."""
+  on_delete = f" ON DELETE {ondelete}" if ondelete else ""
+  op.execute(
+    f"ALTER TABLE {source_table} ADD CONSTRAINT {constraint_name} "
+    f"FOREIGN KEY ({', '.join(local_cols)}) REFERENCES {referent_table} ({', '.join(remote_cols)})"
+    f"{on_delete} NOT VALID"
+  )
+
+
+def add_check_constraint_not_valid(constraint_name: str, table_name: str, condition: str) -> None:
+  op.execute(f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} CHECK ({condition}) NOT VALID")
+
+
+def validate_constraint(table_name: str, constraint_name: str) -> None:
+  """VALIDATE CONSTRAINT scans under SHARE UPDATE EXCLUSIVE, in its own transaction."""
+  if is_preflight():
+    _record_skipped(f"VALIDATE CONSTRAINT {constraint_name} ON {table_name}")
+    return
+  with context.get_context().autocommit_block():
+    op.execute(f"ALTER TABLE {table_name} VALIDATE CONSTRAINT {constraint_name}")
+
+
+def batched_backfill(
+  table_name: str,
+  set_clause: str,
+  where: str,
+  batch_size: int = 5000,
+  key: str = "id",
+  pause_seconds: float = 0.0
+) -> int:
+  """
+  UPDATE rows matching ``where`` in key-ordered batches, one commit each.
+
+  ``where`` must stop matching once a row is updated (e.g.
+  ``new_col IS NULL``), otherwise the loop never ends. Row locks are
+  held for one batch at a time. Progress is logged per batch.
+  """
+  statement = sa.text(
+    f"UPDATE {table_name} SET {set_clause} WHERE {key} IN ("
+    f"SELECT {key} FROM {table_name} WHERE {where} ORDER BY {key} LIMIT :batch_size"
+    f")"
+  )
+  bind = op.get_bind()
+  if is_preflight():
+    # Time a single batch inside the preflight transaction.
+    bind.execute(statement, {"batch_size": batch_size})
+    _record_skipped(f"remaining batches of backfill on {table_name}")
+    return 0
+  total = 0
+  started = time.monotonic()
+  with context.get_context().autocommit_block():
+    while True:
+      updated = bind.execute(statement, {"batch_size": batch_size}).rowcount
+      if not updated:
+        break
+      total += updated
+      logger.info(
+        "backfill %s: %d rows (%.0f rows/s)",
+        table_name, total, total / max(time.monotonic() - started, 1e-6)
+      )
+      if pause_seconds:
+        time.sleep(pause_seconds)
+  return total
+
+
+# Lock modes that block INSERT/UPDATE/DELETE on the relation.
+WRITE_BLOCKING_LOCKS = {"ShareLock", "ShareRowExclusiveLock", "ExclusiveLock", "AccessExclusiveLock"}
+
+_LOCK_STRENGTH = [
+  "AccessShareLock", "RowShareLock", "RowExclusiveLock", "ShareUpdateExclusiveLock",
+  "ShareLock", "ShareRowExclusiveLock", "ExclusiveLock", "AccessExclusiveLock",
+]
+
+def _lock_rank(mode: str) -> int:
+  return _LOCK_STRENGTH.index(mode) if mode in _LOCK_STRENGTH else 0
+
+
+_HELD_LOCKS = sa.text(
+  "SELECT c.relname, l.mode FROM pg_locks l JOIN pg_class c ON c.oid = l.relation "
+  "WHERE l.pid = pg_backend_pid() AND l.granted AND c.relkind IN ('r', 'p', 'i')"
+)
+
+
+class MigrationPreflight:
+  """
+  Run pending revisions inside one transaction, time every statement and
+  record the relation locks it takes, then roll everything back.
+
+  Point it at a seeded copy of production: timings only mean something
+  with realistic row counts. Because Postgres holds DDL locks until
+  commit, a write-blocking lock is reported as held from the statement
+  that took it until the end of its revision.
+  """
+
+  def __init__(self, database_url: str):
+    self.database_url = database_url
+    self.statements: List[dict] = []
+    self.skipped: List[str] = []
+    self._held: dict = {}
+    self._started: float = 0.0
+    self._inspecting = False
+
+  def run(self, revision: str = "head", config_path: str = "alembic.ini") -> List[dict]:
+    from alembic import command
+    from alembic.config import Config
+    engine = sa.create_engine(self.database_url, poolclass=sa.pool.NullPool)
+    if engine.dialect.name != "postgresql":
+      raise ValueError("Migration preflight needs a PostgreSQL database")
+    config = Config(config_path)
+    config.attributes["preflight"] = True
+    config.attributes["on_version_apply"] = self._mark_revision
+    try:
+      with engine.connect() as connection:
+        sa.event.listen(connection, "before_cursor_execute", self._before)
+        sa.event.listen(connection, "after_cursor_execute", self._after)
+        transaction = connection.begin()
+        try:
+          config.attributes["connection"] = connection
+          command.upgrade(config, revision)
+        finally:
+          transaction.rollback()
+    finally:
+      engine.dispose()
+    self.skipped = config.attributes.get("preflight_skipped", [])
+    return self.statements
+
+  def _mark_revision(self, step, **kwargs) -> None:
+    # Called by Alembic after each revision. Locks are only released at
+    # commit, and in production each revision commits on its own, so
+    # charge write-blocking locks up to the end of this revision.
+    now = time.monotonic()
+    for statement in self.statements:
+      if statement["revision"] is None:
+        statement["revision"] = step.up_revision_id
+        if statement["blocking"]:
+          statement["held_ms"] = (now - statement["at"]) * 1000
+
+  def _before(self, conn, cursor, statement, parameters, context_, executemany):
+    if not self._inspecting:
+      self._started = time.monotonic()
+
+  def _after(self, conn, cursor, statement, parameters, context_, executemany):
+    if self._inspecting:
+      return
+    elapsed_ms = (time.monotonic() - self._started) * 1000
+    self._inspecting = True
+    try:
+      held = {}
+      for relname, mode in conn.execute(_HELD_LOCKS):
+        if relname not in held or _lock_rank(mode) > _lock_rank(held[relname]):
+          held[relname] = mode
+    finally:
+      self._inspecting = False
+    acquired = {
+      relname: mode for relname, mode in held.items()
+      if relname not in self._held or _lock_rank(mode) > _lock_rank(self._held[relname])
+    }
+    self._held = held
+    if not acquired and elapsed_ms < 1:
+      return
+    self.statements.append({
+      "revision": None,
+      "sql": " ".join(statement.split())[:120],
+      "duration_ms": elapsed_ms,
+      "locks": acquired,
+      "blocking": any(mode in WRITE_BLOCKING_LOCKS for mode in acquired.values()),
+      "at": self._started,
+      "held_ms": None,
+    })
@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+from sqlalchemy import DateTime, Text
+from sqlalchemy.types import TypeDecorator
+from app.core.encryption import decrypt, encrypt
+
+
+class UTCDateTime(TypeDecorator):
+  """
+  timestamptz that always comes back timezone-aware, in UTC.
+
+  Postgres already returns aware values; SQLite stores no offset, so
+  values are normalized to UTC on the way in and tagged UTC on the way
+  out. Services can then compare against datetime.now(timezone.utc) on
+  either backend.
+  """
+
+  impl = DateTime(timezone=True)
+  cache_ok = True
+
+  def process_bind_param(self, value, dialect):
+    if isinstance(value, datetime) and value.tzinfo is not None:
+      value = value.astimezone(timezone.utc)
+      if dialect.name == "sqlite":
+        value = value.replace(tzinfo=None)
+    return value
+
+  def process_result_value(self, value, dialect):
+    if isinstance(value, datetime) and value.tzinfo is None:
+      value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class EncryptedText(TypeDecorator):
+  """
+  Text stored AES-GCM encrypted under the current tenant's data key.
+
+  Encryption is randomized, so the column cannot be compared, grouped or
+  sorted in SQL; pair it with a blind index column for equality lookups.
+  The label is authenticated with each value so ciphertexts cannot be
+  moved between columns.
+  """
+
+  impl = Text
+  cache_ok = True
+
+  def __init__(self, label: str):
+    super().__init__()
+    self.label = label
+    self._aad = label.encode()
+
+  def process_bind_param(self, value, dialect):
+    return encrypt(value, self._aad)
+
+  def process_result_value(self, value, dialect):
+    return decrypt(value, self._aad)
@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey
+from sqlalchemy.sql import func
+from app.db.database import Base
+from app.db.types import EncryptedText, UTCDateTime
+
+class Attachment(Base):
+    """Metadata of a file attached to a visit; the bytes live in the blob store."""
+    __tablename__ = "attachments"
+    id = Column(Integer, primary_key=True, index=True)
+    visit_id = Column(Integer, ForeignKey("visits.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Content address in the blob store; shared by identical uploads.
+    sha256 = Column(String(64), nullable=False, index=True)
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String(100), nullable=False)
+    filename = Column(EncryptedText("attachments.filename"), nullable=True)
+    uploaded_by = Column(Integer, ForeignKey("doctors.id"), nullable=True)
+    created_at = Column(UTCDateTime, server_default=func.now())
+
+    # Fetch server-side defaults with INSERT ... RETURNING instead of a reload.
+    __mapper_args__ = {"eager_defaults": True}
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Identity
+from sqlalchemy.sql import func
+from app.db.database import Base
+from app.db.types import UTCDateTime
+
+
+class AuditEvent(Base):
+   """Append-only record of who viewed or changed which patient/visit.
+
+   Range-partitioned by month on occurred_at (see the migration); rows are
+   written only by AuditService in batches.
+   """
+   __tablename__ = "audit_events"
+   # The migration's primary key is (id, occurred_at), as partitioning
+   # requires; id alone is unique, which is all the mapper needs, and lets
+   # SQLite's create_all make it an auto-increment rowid.
+   id = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True)
+   occurred_at = Column(UTCDateTime, nullable=False, server_default=func.now())
+   doctor_id = Column(Integer, nullable=False, index=True)
+   tenant_id = Column(Integer, nullable=True)
+   action = Column(String(20), nullable=False)
+   entity_type = Column(String(20), nullable=False)
+   entity_id = Column(Integer, nullable=True)
+   patient_id = Column(Integer, nullable=True, index=True)
+
+   __table_args__ = {"postgresql_partition_by": "RANGE (occurred_at)"}
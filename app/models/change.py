@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Identity, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+from app.db.types import UTCDateTime
+
+
+class ChangeEvent(Base):
+   """Outbox row written in the same transaction as each patient/visit change.
+
+   ``seq`` is the feed cursor. Inserts are serialized per doctor until
+   commit (change_service._lock_doctor_feeds), so within a doctor's feed
+   seq order is commit order and a cursor never skips a change that
+   commits late. ``txid`` (filled by the database) records the writing
+   transaction for diagnostics.
+   """
+   __tablename__ = "change_events"
+   # SQLite only auto-increments an INTEGER PRIMARY KEY.
+   seq = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True)
+   txid = Column(BigInteger, nullable=True, index=True)
+   doctor_id = Column(Integer, nullable=False)
+   entity_type = Column(String(20), nullable=False)
+   entity_id = Column(Integer, nullable=False)
+   patient_id = Column(Integer, nullable=True)
+   operation = Column(String(10), nullable=False)
+   changed_at = Column(UTCDateTime, server_default=func.now(), nullable=False)
+
+   __table_args__ = (
+       Index("ix_change_events_doctor_id_seq", "doctor_id", "seq"),
+   )
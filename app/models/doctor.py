@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, text, DateTime,  Boolean
+from sqlalchemy import Column, Integer, String, text,  Boolean, ForeignKey
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
+from app.db.types import UTCDateTime
+from app.models.tenant import Tenant
 
 
 
@@ -16,7 +18,9 @@ class Doctor(Base):
    phone_number = Column(String(20), nullable=True)
    specialization = Column(String(100), nullable=False)
    is_active = Column(Boolean, default=True, nullable=False)
-   created_at = Column(DateTime(timezone=True), server_default=func.now())
-   updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+   tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=True, index=True)
+   created_at = Column(UTCDateTime, server_default=func.now())
+   updated_at = Column(UTCDateTime, onupdate=func.now())
 
-   patients = relationship("Patient", back_populates="doctor")
\ No newline at end of file
+   patients = relationship("Patient", back_populates="doctor")
+   tenant = relationship("Tenant", back_populates="doctors")
\ No newline at end of file
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy.sql import func
+from app.db.database import Base
+from app.db.types import UTCDateTime
+
+
+class IdempotencyKey(Base):
+   """Stored outcome of a create request sent with an Idempotency-Key header.
+
+   A row with no response_body marks a request that is still running.
+   """
+   __tablename__ = "idempotency_keys"
+   doctor_id = Column(Integer, primary_key=True)
+   key = Column(String(100), primary_key=True)
+   request_hash = Column(String(64), nullable=False)
+   status_code = Column(Integer, nullable=True)
+   response_body = Column(Text, nullable=True)
+   created_at = Column(UTCDateTime, server_default=func.now())
+   expires_at = Column(UTCDateTime, nullable=False, index=True)
@@ -1,27 +1,86 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Index, event, inspect, text
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.sql import func
+from app.core.encryption import contact_blind_index, email_blind_index, text_blind_index
 from app.db.database import Base
+from app.db.types import EncryptedText, UTCDateTime
 import enum
 
 class GenderEnum(str,enum.Enum):
   MALE = "male"
   FEMALE = "female"
   OTHER = "other"
+
+class PatientStatusEnum(str,enum.Enum):
+  ACTIVE = "active"
+  INACTIVE = "inactive"
+  MERGED = "merged"
+
+def _enum_values(enum_class):
+  # Store the lower-case values the API uses, not the member names.
+  return [member.value for member in enum_class]
   
 class Patient(Base):
   __tablename__ = "patients"
   id = Column(Integer, primary_key=True, index=True)
   name = Column(String(100), nullable=False)  
-  contact = Column(String(100),nullable=True)
-  email = Column(String(100), nullable=True)
+  contact = Column(EncryptedText("patients.contact"), nullable=True)
+  email = Column(EncryptedText("patients.email"), nullable=True)
   age = Column(Integer, nullable=True)
-  gender = Column(Enum(GenderEnum, native_enum=False), default=GenderEnum.OTHER)
-  disease = Column(String(200), nullable=True)
+  gender = Column(Enum(GenderEnum, name="gender", values_callable=_enum_values), default=GenderEnum.OTHER)
+  disease = Column(EncryptedText("patients.disease"), nullable=True)
   doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
-  created_at = Column(DateTime, default=datetime.utcnow)
-  status = Column(String(30), default="active")
+  created_at = Column(UTCDateTime, server_default=func.now())
+  updated_at = Column(UTCDateTime, onupdate=func.now())
+  status = Column(
+    Enum(PatientStatusEnum, name="patient_status", values_callable=_enum_values),
+    default=PatientStatusEnum.ACTIVE,
+    server_default=PatientStatusEnum.ACTIVE.value
+  )
+  # Maintained by VisitService so list pages need no aggregation over visits.
+  visit_count = Column(Integer, nullable=False, default=0, server_default="0")
+  last_visit_at = Column(UTCDateTime, nullable=True)
+  # Set when this record was merged into another one as a duplicate.
+  merged_into_id = Column(Integer, ForeignKey("patients.id"), nullable=True)
+  # Blind indexes (keyed hashes) of the encrypted columns, for equality
+  # lookups and grouping; kept in sync by _refresh_blind_indexes.
+  email_bidx = Column(String(32), nullable=True)
+  contact_bidx = Column(String(32), nullable=True)
+  disease_bidx = Column(String(32), nullable=True)
   
   doctor = relationship("Doctor", back_populates="patients")
   visits = relationship("Visit", back_populates="patient", cascade="all, delete-orphan")
-  
\ No newline at end of file
+
+  __table_args__ = (
+    # Covers the per-doctor GROUP BYs in AnalyticsService (index-only scans).
+    Index(
+      "ix_patients_doctor_id_analytics", "doctor_id",
+      postgresql_include=["gender", "age", "status", "disease_bidx"]
+    ),
+    Index("ix_patients_doctor_id_email_bidx", "doctor_id", "email_bidx"),
+    Index("ix_patients_doctor_id_contact_bidx", "doctor_id", "contact_bidx"),
+    # The default patient list only shows active patients.
+    Index(
+      "ix_patients_doctor_id_active", "doctor_id", "id",
+      postgresql_where=text("status = 'active'"),
+      sqlite_where=text("status = 'active'")
+    ),
+  )
+
+  # Fetch server-side defaults with INSERT ... RETURNING instead of a reload.
+  __mapper_args__ = {"eager_defaults": True}
+
+
+_BLIND_INDEXES = (
+  ("email", "email_bidx", email_blind_index),
+  ("contact", "contact_bidx", contact_blind_index),
+  ("disease", "disease_bidx", text_blind_index),
+)
+
+@event.listens_for(Patient, "before_insert")
+@event.listens_for(Patient, "before_update")
+def _refresh_blind_indexes(mapper, connection, target):
+  state = inspect(target)
+  for source, index, compute in _BLIND_INDEXES:
+    if state.attrs[source].history.has_changes():
+      setattr(target, index, compute(getattr(target, source)))
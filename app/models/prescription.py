@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+
+class Prescription(Base):
+    __tablename__ = "prescriptions"
+    id = Column(Integer, primary_key=True, index=True)
+    visit_id = Column(Integer, ForeignKey("visits.id", ondelete="CASCADE"), nullable=False, index=True)
+    drug_code = Column(String(50), nullable=False)
+    drug_name = Column(String(200), nullable=True)
+    dose = Column(String(50), nullable=True)
+    frequency = Column(String(50), nullable=True)
+    duration = Column(String(50), nullable=True)
+
+    visit = relationship("Visit", back_populates="prescriptions")
+
+    __table_args__ = (
+        # Covers "which visits prescribed drug X" without touching the heap.
+        Index("ix_prescriptions_drug_code_visit_id", "drug_code", "visit_id"),
+    )
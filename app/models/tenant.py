@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+from app.db.types import UTCDateTime
+
+
+class Tenant(Base):
+   __tablename__ = "tenants"
+   id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+   name = Column(String(200), nullable=False)
+   slug = Column(String(50), unique=True, index=True, nullable=False)
+   is_active = Column(Boolean, default=True, nullable=False)
+   created_at = Column(UTCDateTime, server_default=func.now())
+
+   doctors = relationship("Doctor", back_populates="tenant")
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy.sql import func
+from app.db.database import Base
+from app.db.types import UTCDateTime
+
+
+class RevokedToken(Base):
+   __tablename__ = "revoked_tokens"
+   jti = Column(String(32), primary_key=True)
+   doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
+   token_type = Column(String(20), nullable=False)
+   expires_at = Column(UTCDateTime, nullable=False, index=True)
+   revoked_at = Column(UTCDateTime, server_default=func.now(), nullable=False, index=True)
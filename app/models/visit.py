@@ -1,15 +1,32 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.sql import func
 from app.db.database import Base
+from app.db.types import EncryptedText, UTCDateTime
+from app.models.prescription import Prescription
 
 class Visit(Base):
     __tablename__ = "visits"
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
-    date_of_visit = Column(DateTime, default=datetime.utcnow)
-    observation = Column(Text, nullable=True)
-    medicines_prescribed = Column(Text, nullable=True)
-    comments = Column(Text, nullable=True)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
+    date_of_visit = Column(UTCDateTime, server_default=func.now())
+    observation = Column(EncryptedText("visits.observation"), nullable=True)
+    medicines_prescribed = Column(EncryptedText("visits.medicines_prescribed"), nullable=True)
+    comments = Column(EncryptedText("visits.comments"), nullable=True)
+    updated_at = Column(UTCDateTime, onupdate=func.now())
 
-    patient = relationship("Patient", back_populates="visits")
\ No newline at end of file
+    patient = relationship("Patient", back_populates="visits")
+    prescriptions = relationship(
+        "Prescription",
+        back_populates="visit",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin",
+    )
+
+    __table_args__ = (
+        Index("ix_visits_patient_id_date_of_visit", "patient_id", "date_of_visit"),
+    )
+
+    # Fetch server-side defaults with INSERT ... RETURNING instead of a reload.
+    __mapper_args__ = {"eager_defaults": True}
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+class Breakdown(BaseModel):
+    """Parallel arrays: ``counts[i]`` patients have value ``keys[i]``."""
+    keys: List[Optional[str]]
+    counts: List[int]
+
+class PatientAnalyticsResponse(BaseModel):
+    total: int
+    gender: Breakdown
+    age: Breakdown = Field(..., description="Age buckets such as 18-29; null when age is unknown")
+    disease: Breakdown = Field(..., description="Most common diseases, largest first")
+    status: Breakdown
+
+class VisitAnalyticsResponse(BaseModel):
+    interval: str = Field(..., description="day, week or month")
+    periods: List[datetime] = Field(..., description="Start of each period, oldest first")
+    counts: List[int]
+    total: int
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional
+from datetime import datetime
+
+
+class AttachmentResponse(BaseModel):
+    id: int
+    visit_id: int
+    sha256: str = Field(..., description="SHA-256 of the content; also the download ETag")
+    size: int
+    content_type: str
+    filename: Optional[str] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
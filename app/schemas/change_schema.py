@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+class ChangeResponse(BaseModel):
+    seq: int
+    operation: str = Field(..., description="insert, update or delete")
+    entity_type: str = Field(..., description="patient, visit or attachment")
+    entity_id: int
+    patient_id: Optional[int]
+    changed_at: datetime
+    data: Optional[Dict[str, Any]] = Field(None, description="Current state; null once deleted")
+
+class ChangeFeedResponse(BaseModel):
+    changes: List[ChangeResponse]
+    next_cursor: int = Field(..., description="Pass as ?since= on the next call")
+    has_more: bool
@@ -1,6 +1,40 @@
+import re
 from datetime import datetime
-from pydantic import BaseModel, EmailStr, validator, Field
-from typing import Optional
+from pydantic import AfterValidator, BaseModel, ConfigDict, EmailStr, Field, ValidationInfo, field_validator
+from typing import Annotated, Optional
+
+# Compiled once at import; each check is a single C-level regex scan
+# instead of a Python loop over the characters.
+_DIGIT_RE = re.compile(r"\d")
+_SPECIAL_RE = re.compile(r"[!@#$%^&*()_+\-=\[\]{}|;:,.<>?]")
+# \w is Unicode letters, digits and "_"; at least one letter or digit.
+_USERNAME_RE = re.compile(r"[\w-]*[^\W_][\w-]*")
+_TEN_DIGITS_RE = re.compile(r"(?:\D*\d){10}")
+
+
+def _validate_password_strength(v: str) -> str:
+    if len(v) < 4:
+        raise ValueError('Password must be at least 4 characters long')
+    # map() keeps the Unicode-aware str methods without a generator frame.
+    if not any(map(str.isupper, v)):
+        raise ValueError('Password must contain at least one uppercase letter')
+    if not any(map(str.islower, v)):
+        raise ValueError('Password must contain at least one lowercase letter')
+    if not _DIGIT_RE.search(v):
+        raise ValueError('Password must contain at least one digit')
+    if not _SPECIAL_RE.search(v):
+        raise ValueError('Password must contain at least one special character')
+    return v
+
+
+def _validate_phone_number(v: str) -> str:
+    if not _TEN_DIGITS_RE.match(v):
+        raise ValueError('Phone number must contain at least 10 digits')
+    return v
+
+
+Password = Annotated[str, AfterValidator(_validate_password_strength)]
+PhoneNumber = Annotated[str, AfterValidator(_validate_phone_number)]
 
 class DoctorBase(BaseModel):
   username:str = Field(..., min_length=3, max_length=25, description="Unique username")
@@ -11,39 +45,20 @@ class DoctorBase(BaseModel):
   specialization: str = Field(..., min_length=1, max_length=100, description="Medical specialization")
   
 class DoctorCreate(DoctorBase):
-  password: str = Field(..., min_length=4, description="Password for the account")
-  @validator('password')
-  def validate_password(cls, v):
-        if len(v) < 4:
-            raise ValueError('Password must be at least 4 characters long')
-        if not any(c.isupper() for c in v):
-            raise ValueError('Password must contain at least one uppercase letter')
-        if not any(c.islower() for c in v):
-            raise ValueError('Password must contain at least one lowercase letter')
-        if not any(c.isdigit() for c in v):
-            raise ValueError('Password must contain at least one digit')
-        if not any(c in '!@#$%^&*()_+-=[]{}|;:,.<>?' for c in v):
-            raise ValueError('Password must contain at least one special character')
-        return v
+  password: Password = Field(..., min_length=4, description="Password for the account")
+  phone_number: Optional[PhoneNumber] = Field(None, max_length=20, description="Contact phone number")
     
-  @validator('username')
+  @field_validator('username')
+  @classmethod
   def validate_username(cls, v):
         if len(v) < 3:
             raise ValueError('Username must be at least 3 characters long')
-        if not v.replace('_', '').replace('-', '').isalnum():
+        if not _USERNAME_RE.fullmatch(v):
             raise ValueError('Username can only contain letters, numbers, hyphens, and underscores')
         return v.lower()
     
-  @validator('phone_number')
-  def validate_phone(cls, v):
-        if v is not None:
-            # Remove all non-digit characters for validation
-            digits_only = ''.join(filter(str.isdigit, v))
-            if len(digits_only) < 10:
-                raise ValueError('Phone number must contain at least 10 digits')
-        return v
-  class Config:
-        schema_extra = {
+  model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "username": "drjohnsmith",
                 "email": "john.smith@hospital.com",
@@ -54,23 +69,16 @@ class DoctorCreate(DoctorBase):
                 "specialization": "Cardiology"
             }
         }
+  )
 
 
 class DoctorUpdate(BaseModel):
 
     first_name: Optional[str] = Field(None, min_length=1, max_length=100)
     last_name: Optional[str] = Field(None, min_length=1, max_length=100)
-    phone_number: Optional[str] = Field(None, max_length=20)
+    phone_number: Optional[PhoneNumber] = Field(None, max_length=20)
     specialization: Optional[str] = Field(None, min_length=1, max_length=100)
     
-    @validator('phone_number')
-    def validate_phone(cls, v):
-        if v is not None:
-            digits_only = ''.join(filter(str.isdigit, v))
-            if len(digits_only) < 10:
-                raise ValueError('Phone number must contain at least 10 digits')
-        return v
-    
 
 
 
@@ -78,12 +86,13 @@ class DoctorResponse(DoctorBase):
     """Schema for doctor response (excludes sensitive information)."""
     id: int = Field(..., description="Unique doctor ID")
     is_active: bool = Field(..., description="Account active status")
+    tenant_id: Optional[int] = Field(None, description="Clinic (tenant) ID")
     created_at: datetime = Field(..., description="Account creation timestamp")
     updated_at: Optional[datetime] = Field(None, description="Last update timestamp")
     
-    class Config:
-        from_attributes = True  # For SQLAlchemy 2.0 compatibility
-        schema_extra = {
+    model_config = ConfigDict(
+        from_attributes=True,  # For SQLAlchemy 2.0 compatibility
+        json_schema_extra={
             "example": {
                 "id": 1,
                 "username": "drjohnsmith",
@@ -97,6 +106,7 @@ class DoctorResponse(DoctorBase):
                 "updated_at": "2025-08-27T18:10:00.000Z"
             }
         }
+    )
 
 
 class DoctorLogin(BaseModel):
@@ -104,13 +114,14 @@ class DoctorLogin(BaseModel):
     username: str = Field(..., description="Doctor's username")
     password: str = Field(..., description="Doctor's password")
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "username": "drjohnsmith",
                 "password": "SecurePass123!"
             }
         }
+    )
 
 
 class DoctorPublicProfile(BaseModel):
@@ -119,24 +130,31 @@ class DoctorPublicProfile(BaseModel):
     first_name: str
     last_name: str
     specialization: str    
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Token(BaseModel):
     """Schema for JWT token response."""
     access_token: str = Field(..., description="JWT access token")
+    refresh_token: Optional[str] = Field(None, description="JWT refresh token")
     token_type: str = Field(default="bearer", description="Token type")
     expires_in: Optional[int] = Field(None, description="Token expiration time in seconds")
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
+                "refresh_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
                 "token_type": "bearer",
-                "expires_in": 1800
+                "expires_in": 900
             }
         }
+    )
+
+
+class RefreshTokenRequest(BaseModel):
+    """Schema for exchanging a refresh token for a new token pair."""
+    refresh_token: str = Field(..., description="JWT refresh token")
 
 
 class TokenData(BaseModel):
@@ -149,26 +167,13 @@ class TokenData(BaseModel):
 class PasswordChange(BaseModel):
     """Schema for changing password."""
     current_password: str = Field(..., description="Current password")
-    new_password: str = Field(..., min_length=8, description="New password")
+    new_password: Password = Field(..., min_length=8, description="New password")
     confirm_password: str = Field(..., description="Confirm new password")
     
-    @validator('new_password')
-    def validate_new_password(cls, v):
-        if len(v) < 4:
-            raise ValueError('Password must be at least 4 characters long')
-        if not any(c.isupper() for c in v):
-            raise ValueError('Password must contain at least one uppercase letter')
-        if not any(c.islower() for c in v):
-            raise ValueError('Password must contain at least one lowercase letter')
-        if not any(c.isdigit() for c in v):
-            raise ValueError('Password must contain at least one digit')
-        if not any(c in '!@#$%^&*()_+-=[]{}|;:,.<>?' for c in v):
-            raise ValueError('Password must contain at least one special character')
-        return v
-    
-    @validator('confirm_password')
-    def passwords_match(cls, v, values):
-        if 'new_password' in values and v != values['new_password']:
+    @field_validator('confirm_password')
+    @classmethod
+    def passwords_match(cls, v, info: ValidationInfo):
+        if 'new_password' in info.data and v != info.data['new_password']:
             raise ValueError('Passwords do not match')
         return v
 
@@ -181,8 +186,8 @@ class DoctorStats(BaseModel):
     pending_appointments: int = 0
     years_of_experience: Optional[int] = None
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "total_patients": 150,
                 "total_appointments": 500,
@@ -191,4 +196,5 @@ class DoctorStats(BaseModel):
                 "years_of_experience": 15
             }
         }
+    )
   
\ No newline at end of file
@@ -1,29 +1,58 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, TypeAdapter, field_validator
+from typing import Annotated, Optional, List
 from datetime import datetime
+from app.core.config import settings
+from app.models.patient import GenderEnum, PatientStatusEnum
 
 class PatientBase(BaseModel):
   name:str
   contact:Optional[str]
   email: Optional[EmailStr]
   age: Optional[int]
-  gender: Optional[str]
+  gender: Optional[GenderEnum]
   disease: Optional[str]
+
+  @field_validator('gender', mode='before')
+  @classmethod
+  def lower_gender(cls, v):
+    # Older clients sent the member names (MALE, FEMALE, OTHER).
+    return v.lower() if isinstance(v, str) else v
   
 class PatientCreate(PatientBase):
     pass
 
 class PatientUpdate(PatientBase):
-    status: Optional[str]
+    status: Optional[PatientStatusEnum]
+
+    @field_validator('status')
+    @classmethod
+    def not_merged(cls, v):
+        # Only a merge sets it, together with merged_into_id.
+        if v == PatientStatusEnum.MERGED:
+            raise ValueError('Use POST /patients/merge to merge patients')
+        return v
 
 class PatientResponse(PatientBase):
     id: int
     doctor_id: int
     created_at: datetime
-    status: str
+    updated_at: Optional[datetime] = None
+    status: PatientStatusEnum
+    visit_count: int = 0
+    last_visit_at: Optional[datetime] = None
+    merged_into_id: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
 
-    class Config:
-        orm_mode = True
+class DuplicateCandidate(BaseModel):
+    patient_id: int
+    duplicate_id: int
+    score: float = Field(..., description="0-1; higher is more likely the same person")
+    reasons: List[str] = Field(..., description="Signals behind the score, e.g. email, phone, name, age_conflict")
+
+class PatientMergeRequest(BaseModel):
+    survivor_id: int = Field(..., description="Patient that keeps all visits")
+    duplicate_ids: List[int] = Field(..., min_length=1, max_length=50)
         
 class VisitResponse(BaseModel):
     id: int
@@ -32,6 +61,12 @@ class VisitResponse(BaseModel):
     medicines_prescribed: Optional[str]
     comments: Optional[str]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+# Validates a whole list in one pydantic-core call; validate_json() on the raw
+# request body also skips building intermediate Python dicts. max_length
+# stops validation at the first item over the bulk limit.
+patient_create_list_adapter = TypeAdapter(
+  Annotated[List[PatientCreate], Field(max_length=settings.bulk_max_items)]
+)
   
\ No newline at end of file
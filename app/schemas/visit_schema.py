@@ -1,6 +1,31 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
+from typing import Annotated, List, Optional
 from datetime import datetime
+from app.core.config import settings
+
+
+def normalize_drug_code(code: str) -> str:
+    return code.strip().upper()
+
+
+class PrescriptionItem(BaseModel):
+    drug_code: str = Field(..., min_length=1, max_length=50, description="Drug code, stored upper-cased")
+    drug_name: Optional[str] = Field(None, max_length=200)
+    dose: Optional[str] = Field(None, max_length=50, description="e.g. 5mg")
+    frequency: Optional[str] = Field(None, max_length=50, description="e.g. twice daily")
+    duration: Optional[str] = Field(None, max_length=50, description="e.g. 7 days")
+
+    @field_validator('drug_code')
+    @classmethod
+    def normalize_code(cls, v):
+        return normalize_drug_code(v)
+
+
+class PrescriptionResponse(PrescriptionItem):
+    id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
 
 class VisitBase(BaseModel):
     observation: Optional[str]
@@ -8,7 +33,7 @@ class VisitBase(BaseModel):
     comments: Optional[str]
 
 class VisitCreate(VisitBase):
-    pass
+    prescriptions: List[PrescriptionItem] = []
 
 class VisitUpdate(VisitBase):
     pass
@@ -16,6 +41,11 @@ class VisitUpdate(VisitBase):
 class VisitResponse(VisitBase):
     id: int
     date_of_visit: datetime
+    updated_at: Optional[datetime] = None
+    prescriptions: List[PrescriptionResponse] = []
+
+    model_config = ConfigDict(from_attributes=True)
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+visit_create_list_adapter = TypeAdapter(
+    Annotated[List[VisitCreate], Field(max_length=settings.bulk_max_items)]
+)
\ No newline at end of file
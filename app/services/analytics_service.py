@@ -0,0 +1,165 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Tuple
+from sqlalchemy import and_, case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.models.doctor import Doctor
+from app.models.patient import Patient, PatientStatusEnum
+from app.models.visit import Visit
+from app.services.event_broker import event_broker
+
+# (label, lowest age, highest age)
+AGE_BUCKETS = [
+  ("0-17", 0, 17),
+  ("18-29", 18, 29),
+  ("30-44", 30, 44),
+  ("45-64", 45, 64),
+  ("65+", 65, None),
+]
+
+_INTERVAL_DAYS = {"day": 1, "week": 7, "month": 31}
+
+
+def _age_bucket():
+  return case(
+    *[
+      (Patient.age <= high if high is not None else Patient.age >= low, label)
+      for label, low, high in AGE_BUCKETS
+    ],
+    else_=None,
+  )
+
+
+def _period_start(moment: datetime, interval: str) -> datetime:
+  start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+  if interval == "week":
+    start -= timedelta(days=start.weekday())
+  elif interval == "month":
+    start = start.replace(day=1)
+  return start
+
+
+def _period(dialect: str, interval: str):
+  if dialect == "postgresql":
+    return func.date_trunc(interval, Visit.date_of_visit)
+  # SQLite: the period's first day as text; weeks start on Monday, as in Postgres.
+  if interval == "day":
+    return func.date(Visit.date_of_visit)
+  if interval == "week":
+    return func.date(Visit.date_of_visit, "-6 days", "weekday 1")
+  return func.strftime("%Y-%m-01", Visit.date_of_visit)
+
+
+def _as_datetime(value) -> datetime:
+  if isinstance(value, str):
+    value = datetime.fromisoformat(value)
+  return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class AnalyticsService:
+  """
+  Per-doctor aggregates over patients and visits, computed in the database.
+
+  Results are cached per doctor until that doctor's next committed write
+  (seen through the event broker, so other workers' writes count too with
+  the postgres backend) or until analytics_cache_ttl_seconds passes.
+  """
+
+  def __init__(self):
+    self._cache: Dict[int, Dict[tuple, Tuple[float, dict]]] = {}
+    # Bumped on every write; a result computed across a bump is not cached.
+    self._generations: Dict[int, int] = {}
+
+  def invalidate(self, doctor_id: int) -> None:
+    self._generations[doctor_id] = self._generations.get(doctor_id, 0) + 1
+    self._cache.pop(doctor_id, None)
+
+  def _on_change(self, payload: dict) -> None:
+    self.invalidate(payload["doctor_id"])
+
+  async def patient_breakdown(self, db: AsyncSession, doctor: Doctor, top_diseases: int = 20) -> dict:
+    return await self._cached(doctor.id, ("patients", top_diseases), lambda: self._patient_breakdown(db, doctor, top_diseases))
+
+  async def visits_over_time(self, db: AsyncSession, doctor: Doctor, interval: str = "week", periods: int = 12) -> dict:
+    return await self._cached(doctor.id, ("visits", interval, periods), lambda: self._visits_over_time(db, doctor, interval, periods))
+
+  async def _cached(self, doctor_id: int, key: tuple, compute) -> dict:
+    entries = self._cache.get(doctor_id)
+    if entries is not None and key in entries:
+      expires_at, result = entries[key]
+      if expires_at > time.monotonic():
+        return result
+    generation = self._generations.get(doctor_id, 0)
+    result = await compute()
+    if self._generations.get(doctor_id, 0) == generation:
+      if doctor_id not in self._cache and len(self._cache) >= settings.analytics_cache_max_doctors:
+        self._cache.pop(next(iter(self._cache)))
+      self._cache.setdefault(doctor_id, {})[key] = (
+        time.monotonic() + settings.analytics_cache_ttl_seconds, result
+      )
+    return result
+
+  async def _patient_breakdown(self, db: AsyncSession, doctor: Doctor, top_diseases: int) -> dict:
+    # Each GROUP BY is an index-only scan of ix_patients_doctor_id_analytics.
+    # A merged duplicate is the same person as its survivor; count them once.
+    mine = and_(Patient.doctor_id == doctor.id, Patient.status != PatientStatusEnum.MERGED)
+    breakdown = {}
+    for name, column in (
+      ("gender", Patient.gender),
+      ("age", _age_bucket()),
+      ("status", Patient.status),
+    ):
+      result = await db.execute(
+        select(column.label("key"), func.count()).where(mine).group_by("key").order_by("key")
+      )
+      breakdown[name] = self._columns(result.all())
+    # disease is encrypted, so group on its blind index and decrypt one
+    # sample value per group for the label.
+    result = await db.execute(
+      select(Patient.disease_bidx, func.count().label("n")).where(mine)
+      .group_by(Patient.disease_bidx).order_by(func.count().desc(), Patient.disease_bidx)
+      .limit(top_diseases)
+    )
+    groups = result.all()
+    labels = {}
+    if any(bidx is not None for bidx, _ in groups):
+      result = await db.execute(
+        select(Patient.disease_bidx, func.min(Patient.disease))
+        .where(mine, Patient.disease_bidx.in_([bidx for bidx, _ in groups if bidx is not None]))
+        .group_by(Patient.disease_bidx)
+      )
+      labels = dict(result.all())
+    breakdown["disease"] = self._columns([(labels.get(bidx), count) for bidx, count in groups])
+    breakdown["total"] = sum(breakdown["status"]["counts"])
+    return breakdown
+
+  async def _visits_over_time(self, db: AsyncSession, doctor: Doctor, interval: str, periods: int) -> dict:
+    since = _period_start(datetime.now(timezone.utc) - timedelta(days=_INTERVAL_DAYS[interval] * periods), interval)
+    period = _period(db.bind.dialect.name, interval).label("period")
+    # Index-only scans of ix_visits_patient_id_date_of_visit, one range per patient.
+    result = await db.execute(
+      select(period, func.count())
+      .join(Patient, Patient.id == Visit.patient_id)
+      .where(Patient.doctor_id == doctor.id, Visit.date_of_visit >= since)
+      .group_by(period)
+      .order_by(period)
+    )
+    rows = result.all()
+    return {
+      "interval": interval,
+      "periods": [_as_datetime(row[0]) for row in rows],
+      "counts": [row[1] for row in rows],
+      "total": sum(row[1] for row in rows),
+    }
+
+  @staticmethod
+  def _columns(rows) -> dict:
+    return {
+      "keys": [key.value if hasattr(key, "value") else key for key, _ in rows],
+      "counts": [count for _, count in rows],
+    }
+
+analytics_service = AnalyticsService()
+event_broker.on_publish(analytics_service._on_change)
@@ -0,0 +1,136 @@
+from typing import AsyncIterator, Iterable, List, Optional
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.blob_store import blob_store
+from app.core.config import settings
+from app.db.database import db_manager
+from app.models.attachment import Attachment
+from app.models.doctor import Doctor
+from app.models.patient import Patient, PatientStatusEnum
+from app.models.visit import Visit
+from app.services.audit_service import audit_service
+from app.services.change_service import change_service
+
+class AttachmentService:
+  def blob_namespace(self, doctor: Doctor) -> str:
+    """
+    Blob store namespace for the database holding the doctor's attachments.
+
+    Blobs are only shared within one database, where delete_attachment
+    can count every reference to them.
+    """
+    if db_manager.has_dedicated_database(doctor.tenant_id):
+      return f"tenant-{doctor.tenant_id}"
+    return "default"
+
+  async def get_visit(self, db: AsyncSession, visit_id: int, doctor: Doctor) -> Optional[Row]:
+    """(id, patient_id) of the doctor's visit, or None; check this before reading an upload."""
+    result = await db.execute(
+      select(Visit.id, Visit.patient_id).join(Patient)
+      .where(
+        Visit.id == visit_id,
+        Patient.doctor_id == doctor.id,
+        Patient.status != PatientStatusEnum.MERGED,
+      )
+    )
+    return result.first()
+
+  async def create_attachment(
+    self,
+    db : AsyncSession,
+    visit : Row,
+    doctor : Doctor,
+    chunks : AsyncIterator[bytes],
+    content_type : str,
+    filename : Optional[str] = None
+  ) -> Attachment:
+    """Stream the body into the blob store, then record its metadata."""
+    # Nothing is written yet; end the transaction so the connection goes
+    # back to the pool while a large body uploads.
+    await db.commit()
+    blob = await blob_store.put(self.blob_namespace(doctor), chunks, settings.attachment_max_bytes)
+    attachment = Attachment(
+      visit_id=visit.id,
+      sha256=blob.sha256,
+      size=blob.size,
+      content_type=content_type,
+      filename=filename,
+      uploaded_by=doctor.id,
+    )
+    db.add(attachment)
+    await db.flush()
+    change_service.track(db, doctor, "insert", "attachment", attachment.id, visit.patient_id)
+    await db.commit()
+    await audit_service.record(doctor, "create", "attachment", attachment.id, visit.patient_id)
+    return attachment
+
+  async def list_attachments(self, db: AsyncSession, visit: Row, doctor: Doctor) -> List[Attachment]:
+    result = await db.execute(
+      select(Attachment).where(Attachment.visit_id == visit.id).order_by(Attachment.id)
+    )
+    attachments = list(result.scalars().all())
+    for attachment in attachments:
+      await audit_service.record(doctor, "view", "attachment", attachment.id, visit.patient_id)
+    return attachments
+
+  async def get_attachment(
+    self,
+    db : AsyncSession,
+    visit_id : int,
+    attachment_id : int,
+    doctor : Doctor
+  ) -> Optional[Attachment]:
+    attachment, patient_id = await self._get(db, visit_id, attachment_id, doctor)
+    if attachment is not None:
+      await audit_service.record(doctor, "view", "attachment", attachment.id, patient_id)
+    return attachment
+
+  async def delete_attachment(
+    self,
+    db : AsyncSession,
+    visit_id : int,
+    attachment_id : int,
+    doctor : Doctor
+  ) -> bool:
+    attachment, patient_id = await self._get(db, visit_id, attachment_id, doctor)
+    if attachment is None:
+      return False
+    sha256 = attachment.sha256
+    await db.delete(attachment)
+    change_service.track(db, doctor, "delete", "attachment", attachment_id, patient_id)
+    await db.commit()
+    await audit_service.record(doctor, "delete", "attachment", attachment_id, patient_id)
+    await self.release_blobs(db, doctor, [sha256])
+    return True
+
+  async def release_blobs(self, db: AsyncSession, doctor: Doctor, sha256s: Iterable[str]) -> None:
+    """
+    Delete the blobs no attachment references any more; call after commit.
+
+    Identical uploads in one database share a blob, so it goes with its
+    last reference.
+    """
+    sha256s = set(sha256s)
+    if not sha256s:
+      return
+    result = await db.execute(
+      select(Attachment.sha256).where(Attachment.sha256.in_(sha256s)).distinct()
+    )
+    for sha256 in sha256s - set(result.scalars()):
+      await blob_store.delete(self.blob_namespace(doctor), sha256, settings.blob_delete_grace_seconds)
+
+  async def _get(self, db: AsyncSession, visit_id: int, attachment_id: int, doctor: Doctor):
+    result = await db.execute(
+      select(Attachment, Visit.patient_id)
+      .join(Visit, Visit.id == Attachment.visit_id)
+      .join(Patient, Patient.id == Visit.patient_id)
+      .where(
+        Attachment.id == attachment_id,
+        Attachment.visit_id == visit_id,
+        Patient.doctor_id == doctor.id,
+      )
+    )
+    return result.first() or (None, None)
+
+attachment_service = AttachmentService()
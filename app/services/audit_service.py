@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timezone
+from typing import List, Optional
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.database import db_manager
+from app.models.audit import AuditEvent
+from app.models.doctor import Doctor
+
+logger = logging.getLogger(__name__)
+
+_COPY_COLUMNS = ["occurred_at", "doctor_id", "tenant_id", "action", "entity_type", "entity_id", "patient_id"]
+
+
+class AuditService:
+  """
+  Buffers audit events in memory and writes them in batches.
+
+  Services call record() after their own commit; a background task
+  flushes when a batch fills or the flush interval passes. When the queue
+  is full, record() waits, which slows writers down instead of dropping
+  events. stop() drains the queue before the database is closed.
+  """
+
+  def __init__(self):
+    self._queue: Optional[asyncio.Queue] = None
+    self._flusher: Optional[asyncio.Task] = None
+    self._retry: List[dict] = []
+
+  @property
+  def running(self) -> bool:
+    return self._flusher is not None and not self._flusher.done()
+
+  async def start(self) -> None:
+    self._queue = asyncio.Queue(maxsize=settings.audit_queue_size)
+    self._flusher = asyncio.create_task(self._run())
+
+  async def stop(self) -> None:
+    if not self.running:
+      return
+    await self._queue.put(None)  # sentinel: flush what's queued, then exit
+    await self._flusher
+    self._flusher = None
+
+  async def record(
+    self,
+    doctor: Doctor,
+    action: str,
+    entity_type: str,
+    entity_id: Optional[int] = None,
+    patient_id: Optional[int] = None
+  ) -> None:
+    if not self.running:
+      return
+    await self._queue.put({
+      "occurred_at": datetime.now(timezone.utc),
+      "doctor_id": doctor.id,
+      "tenant_id": doctor.tenant_id,
+      "action": action,
+      "entity_type": entity_type,
+      "entity_id": entity_id,
+      "patient_id": patient_id,
+    })
+
+  async def _run(self) -> None:
+    stopping = False
+    while not stopping:
+      batch = self._retry
+      self._retry = []
+      deadline = time.monotonic() + settings.audit_flush_interval_seconds
+      while len(batch) < settings.audit_batch_size:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+          break
+        try:
+          event = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+          break
+        if event is None:
+          stopping = True
+          # Take everything already queued without waiting further.
+          while not self._queue.empty():
+            event = self._queue.get_nowait()
+            if event is not None:
+              batch.append(event)
+          break
+        batch.append(event)
+      if batch:
+        await self._flush(batch, final=stopping)
+
+  async def _flush(self, batch: List[dict], final: bool) -> None:
+    try:
+      async for db in db_manager.get_session():
+        connection = await db.connection()
+        if connection.dialect.name == "postgresql" and connection.dialect.driver == "asyncpg":
+          raw = await connection.get_raw_connection()
+          await raw.driver_connection.copy_records_to_table(
+            AuditEvent.__tablename__,
+            records=[tuple(event[c] for c in _COPY_COLUMNS) for event in batch],
+            columns=_COPY_COLUMNS,
+          )
+        else:
+          await db.execute(insert(AuditEvent), batch)
+        await db.commit()
+    except Exception:
+      if final or len(batch) > settings.audit_queue_size:
+        logger.exception("Dropping %d audit events after failed flush", len(batch))
+      else:
+        logger.exception("Audit flush failed; retrying %d events", len(batch))
+        self._retry = batch
+        await asyncio.sleep(settings.audit_flush_interval_seconds)
+
+  async def create_partitions(self, db: AsyncSession, months_ahead: int) -> List[str]:
+    """
+    Create monthly audit_events partitions from this month on; returns their names.
+
+    Postgres refuses a new partition while the default partition holds rows
+    in its range (when this ran late). Those rows are moved into it: the
+    default partition is detached, the month's rows are moved, and it is
+    re-attached, all in one transaction that blocks audit writes meanwhile.
+    """
+    if db.bind.dialect.name != "postgresql":
+      return []  # only the Postgres table is partitioned
+    first = date.today().replace(day=1)
+    names = []
+    for offset in range(months_ahead + 1):
+      month = first.month - 1 + offset
+      start = date(first.year + month // 12, month % 12 + 1, 1)
+      month += 1
+      end = date(first.year + month // 12, month % 12 + 1, 1)
+      name = f"audit_events_{start:%Y_%m}"
+      names.append(name)
+      if await db.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is not None:
+        continue
+      in_range = "occurred_at >= :start AND occurred_at < :end"
+      bounds = {"start": start, "end": end}
+      stranded = await db.scalar(
+        text(f"SELECT count(*) FROM audit_events_default WHERE {in_range}"), bounds
+      )
+      if stranded:
+        logger.warning("Moving %d audit events from audit_events_default into %s", stranded, name)
+        await db.execute(text("ALTER TABLE audit_events DETACH PARTITION audit_events_default"))
+      await db.execute(text(
+        f"CREATE TABLE {name} PARTITION OF audit_events "
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+      ))
+      if stranded:
+        await db.execute(text(f"INSERT INTO {name} SELECT * FROM audit_events_default WHERE {in_range}"), bounds)
+        await db.execute(text(f"DELETE FROM audit_events_default WHERE {in_range}"), bounds)
+        await db.execute(text("ALTER TABLE audit_events ATTACH PARTITION audit_events_default DEFAULT"))
+    await db.commit()
+    return names
+
+audit_service = AuditService()
@@ -1,20 +1,164 @@
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.exceptions import AuthenticationError
+
+ASYMMETRIC_ALGORITHMS = {"ES256", "ES384", "ES512", "RS256", "RS384", "RS512", "EdDSA"}
+
+
+@lru_cache(maxsize=None)
+def _read_key_file(path: str) -> str:
+  with open(path) as key_file:
+    return key_file.read()
+
+
+class JWTBackend(ABC):
+  """
+  Signs and verifies JWTs with one algorithm.
+
+  Keys are parsed once in the constructor and reused for every call. For
+  asymmetric algorithms the signing key is optional, so a service holding
+  only the public key can verify tokens but not issue them.
+  """
+  name = ""
+  
+  def __init__(self, algorithm: str, signing_key: Optional[str], verifying_key: str):
+    self.algorithm = algorithm
+    self.signing_key = self.prepare_key(signing_key) if signing_key else None
+    self.verifying_key = self.prepare_key(verifying_key)
+  
+  def prepare_key(self, key: str):
+    return key
+  
+  @abstractmethod
+  def encode(self, claims: dict) -> str:
+    """Sign the claims; needs a signing key."""
+  
+  @abstractmethod
+  def decode(self, token: str) -> dict:
+    """Return the verified claims or raise AuthenticationError."""
+  
+  def _require_signing_key(self):
+    if self.signing_key is None:
+      raise AuthenticationError(f"No signing key configured for {self.algorithm}")
+    return self.signing_key
+
+
+class JoseJWTBackend(JWTBackend):
+  """python-jose backend (HS*, RS*, ES*; no EdDSA support)."""
+  name = "jose"
+  
+  def prepare_key(self, key: str):
+    from jose import jwk
+    return jwk.construct(key, self.algorithm)
+  
+  def encode(self, claims: dict) -> str:
+    from jose import jwt
+    return jwt.encode(claims, self._require_signing_key(), algorithm=self.algorithm)
+  
+  def decode(self, token: str) -> dict:
+    from jose import JWTError, jwt
+    try:
+      return jwt.decode(token, self.verifying_key, algorithms=[self.algorithm])
+    except JWTError as e:
+      raise AuthenticationError(str(e))
+
+
+class PyJWTBackend(JWTBackend):
+  """PyJWT backend; faster than jose and supports EdDSA."""
+  name = "pyjwt"
+  
+  def prepare_key(self, key: str):
+    from jwt.algorithms import get_default_algorithms
+    return get_default_algorithms()[self.algorithm].prepare_key(key)
+  
+  def encode(self, claims: dict) -> str:
+    import jwt
+    return jwt.encode(claims, self._require_signing_key(), algorithm=self.algorithm)
+  
+  def decode(self, token: str) -> dict:
+    import jwt
+    try:
+      return jwt.decode(token, self.verifying_key, algorithms=[self.algorithm])
+    except jwt.PyJWTError as e:
+      raise AuthenticationError(str(e))
+
+
+JWT_BACKENDS = {
+  JoseJWTBackend.name: JoseJWTBackend,
+  PyJWTBackend.name: PyJWTBackend,
+}
+
+
+def create_jwt_backend(
+  name: str,
+  algorithm: str,
+  secret_key: Optional[str] = None,
+  private_key_path: Optional[str] = None,
+  public_key_path: Optional[str] = None
+) -> JWTBackend:
+  if name not in JWT_BACKENDS:
+    raise ValueError(f"Unknown JWT backend: {name}")
+  if algorithm in ASYMMETRIC_ALGORITHMS:
+    if not public_key_path:
+      raise ValueError(f"{algorithm} requires jwt_public_key_path")
+    signing_key = _read_key_file(private_key_path) if private_key_path else None
+    verifying_key = _read_key_file(public_key_path)
+  else:
+    if not secret_key:
+      raise ValueError(f"{algorithm} requires jwt_secret_key")
+    signing_key = verifying_key = secret_key
+  return JWT_BACKENDS[name](algorithm, signing_key, verifying_key)
+
 
 class AuthService:
   
   def __init__(self):
-    self.pwd_context = CryptContext(
-      schemes=["bcrypt"],
-      deprecated="auto",
-      bcrypt__rounds=settings.bcrypt_rounds
-    )
+    # passlib/bcrypt and the JWT library (with its crypto backend) are
+    # imported on first use rather than when the app module is imported.
+    self._pwd_context = None
+    self._jwt_backend: Optional[JWTBackend] = None
+    self._dummy_hash: Optional[str] = None
     self.secret_key=settings.jwt_secret_key
     self.algorithm=settings.jwt_algorithm
+    # Verified payloads keyed by token; a repeat request with the same
+    # bearer token skips signature verification until the token expires.
+    self._verified_tokens: "OrderedDict[str, dict]" = OrderedDict()
+    self.verify_cache_size = settings.jwt_verify_cache_size
     self.access_token_expire_minutes = settings.jwt_access_token_expire_minutes
+    self.refresh_token_expire_days = settings.jwt_refresh_token_expire_days
+    
+  @property
+  def pwd_context(self):
+    if self._pwd_context is None:
+      from passlib.context import CryptContext
+      self._pwd_context = CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=settings.bcrypt_rounds,
+        # Hashes outside this range are flagged by needs_update() and
+        # rehashed on the next successful login.
+        bcrypt__min_rounds=settings.bcrypt_rounds,
+        bcrypt__max_rounds=settings.bcrypt_rounds
+      )
+    return self._pwd_context
+  
+  @property
+  def jwt_backend(self) -> JWTBackend:
+    if self._jwt_backend is None:
+      self._jwt_backend = create_jwt_backend(
+        settings.jwt_backend,
+        settings.jwt_algorithm,
+        secret_key=settings.jwt_secret_key,
+        private_key_path=settings.jwt_private_key_path,
+        public_key_path=settings.jwt_public_key_path
+      )
+    return self._jwt_backend
     
   def hash_passwords(self, password:str) -> str:
     return self.pwd_context.hash(password)
@@ -22,6 +166,23 @@ class AuthService:
   def verify_password(self, plain_password:str, hashed_password:str) ->bool:
     return self.pwd_context.verify(plain_password,hashed_password)
   
+  def build_dummy_hash(self) -> None:
+    """
+    Hash verified against when a user does not exist, so every login pays
+    one bcrypt verify. Built at startup; otherwise the first unknown
+    username would pay a hash and a verify and be told apart by timing.
+    """
+    self._dummy_hash = self.pwd_context.hash("dummy-password-for-unknown-users")
+  
+  @property
+  def dummy_hash(self) -> str:
+    if self._dummy_hash is None:
+      self.build_dummy_hash()
+    return self._dummy_hash
+  
+  def needs_rehash(self, hashed_password:str) -> bool:
+    return self.pwd_context.needs_update(hashed_password)
+  
   def create_access_token(
     self,
     data:dict,
@@ -32,31 +193,47 @@ class AuthService:
       expire = datetime.now(timezone.utc) + expires_delta
     else:
       expire = datetime.now(timezone.utc) + timedelta(minutes=self.access_token_expire_minutes)
-    to_encode.update({"exp":expire})
-    encoded_jwt = jwt.encode(
-      to_encode,
-      self.secret_key,
-      algorithm=self.algorithm
-    )
+    to_encode.update({"exp":expire, "jti":uuid.uuid4().hex})
+    encoded_jwt = self.jwt_backend.encode(to_encode)
     return encoded_jwt
   
   def verify_token(self, token:str) -> Optional[dict]:
+    payload = self._verified_tokens.get(token)
+    if payload is not None:
+      if payload.get("exp", 0) > time.time():
+        self._verified_tokens.move_to_end(token)
+        return dict(payload)
+      del self._verified_tokens[token]
     try:
-      payload=jwt.decode(
-        token,
-        self.secret_key,
-        algorithms=[self.algorithm]
-      )
-      return payload
-    except JWTError:
+      payload=self.jwt_backend.decode(token)
+    except AuthenticationError:
       return None
-  def create_token_for_doctor(self, doctor_id:int, username:str)->str:
+    if self.verify_cache_size:
+      self._verified_tokens[token] = payload
+      if len(self._verified_tokens) > self.verify_cache_size:
+        self._verified_tokens.popitem(last=False)
+    return dict(payload)
+  
+  def create_token_for_doctor(self, doctor_id:int, username:str, tenant_id:Optional[int]=None)->str:
     token_data={
       "sub":username,
       "doctor_id":doctor_id,
+      "tenant_id":tenant_id,
       "type":"access_token"
     }
     return self.create_access_token(data=token_data)
   
+  def create_refresh_token_for_doctor(self, doctor_id:int, username:str, tenant_id:Optional[int]=None)->str:
+    token_data={
+      "sub":username,
+      "doctor_id":doctor_id,
+      "tenant_id":tenant_id,
+      "type":"refresh_token"
+    }
+    return self.create_access_token(
+      data=token_data,
+      expires_delta=timedelta(days=self.refresh_token_expire_days)
+    )
+  
 auth_service = AuthService()
     
\ No newline at end of file
@@ -0,0 +1,115 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import event, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session
+from app.models.change import ChangeEvent
+from app.models.doctor import Doctor
+from app.models.patient import Patient
+from app.models.visit import Visit
+from app.schemas.patient_schema import PatientResponse
+from app.schemas.visit_schema import VisitResponse
+from app.services.event_broker import queue_change_event
+
+# Namespace (first key) of the per-doctor pg_advisory_xact_lock.
+_FEED_LOCK_NAMESPACE = 0x636867
+
+
+class ChangeService:
+  def track(
+    self,
+    db: AsyncSession,
+    doctor: Doctor,
+    operation: str,
+    entity_type: str,
+    entity_id: int,
+    patient_id: Optional[int] = None
+  ) -> None:
+    """Add an outbox row to the caller's transaction; call before commit.
+
+    The row is also published to live event streams once the transaction
+    commits.
+    """
+    change_event = ChangeEvent(
+      doctor_id=doctor.id,
+      entity_type=entity_type,
+      entity_id=entity_id,
+      patient_id=patient_id,
+      operation=operation,
+    )
+    db.add(change_event)
+    queue_change_event(db.sync_session, change_event)
+
+  async def list_changes(
+    self,
+    db: AsyncSession,
+    doctor: Doctor,
+    since: int = 0,
+    limit: int = 100
+  ) -> Tuple[List[dict], int, bool]:
+    """Return (changes, next_cursor, has_more) for changes after ``since``.
+
+    Each change carries the entity's current state, or None if it has
+    since been deleted.
+    """
+    query = select(ChangeEvent).where(
+      ChangeEvent.doctor_id == doctor.id,
+      ChangeEvent.seq > since,
+    )
+    # Within one doctor's feed seq order is commit order (see
+    # _lock_doctor_feeds), so a visible seq never has an unseen lower one.
+    result = await db.execute(query.order_by(ChangeEvent.seq).limit(limit + 1))
+    events = list(result.scalars().all())
+    has_more = len(events) > limit
+    events = events[:limit]
+
+    patients = await self._load(db, Patient, PatientResponse, events, "patient")
+    visits = await self._load(db, Visit, VisitResponse, events, "visit")
+    current = {"patient": patients, "visit": visits}
+    changes = [
+      {
+        "seq": event.seq,
+        "operation": event.operation,
+        "entity_type": event.entity_type,
+        "entity_id": event.entity_id,
+        "patient_id": event.patient_id,
+        "changed_at": event.changed_at,
+        "data": current[event.entity_type].get(event.entity_id),
+      }
+      for event in events
+    ]
+    next_cursor = events[-1].seq if events else since
+    return changes, next_cursor, has_more
+
+  async def _load(self, db: AsyncSession, model, schema, events: List[ChangeEvent], entity_type: str) -> dict:
+    ids = {event.entity_id for event in events if event.entity_type == entity_type}
+    if not ids:
+      return {}
+    result = await db.execute(select(model).where(model.id.in_(ids)))
+    return {
+      row.id: schema.model_validate(row).model_dump(mode="json")
+      for row in result.scalars().all()
+    }
+
+
+@event.listens_for(Session, "before_flush")
+def _lock_doctor_feeds(session: Session, flush_context, instances) -> None:
+  """
+  Serialize outbox inserts per doctor until commit on Postgres.
+
+  Sequence values are taken at INSERT but become visible at COMMIT, so
+  two open transactions could commit seq 8 before seq 7 and a reader
+  would move its cursor past 7. Holding a transaction-scoped lock on the
+  doctor's feed from before the INSERT until commit makes seq order
+  commit order. SQLiteSession already serializes writers.
+  """
+  doctor_ids = sorted({obj.doctor_id for obj in session.new if isinstance(obj, ChangeEvent)})
+  if not doctor_ids:
+    return
+  connection = session.connection()
+  if connection.dialect.name != "postgresql":
+    return
+  for doctor_id in doctor_ids:
+    connection.execute(select(func.pg_advisory_xact_lock(_FEED_LOCK_NAMESPACE, doctor_id)))
+
+change_service = ChangeService()
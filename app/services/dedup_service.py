@@ -0,0 +1,218 @@
+import re
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.core.exceptions import ValidationError
+from app.models.doctor import Doctor
+from app.models.patient import Patient, PatientStatusEnum
+from app.models.visit import Visit
+from app.services.audit_service import audit_service
+from app.services.change_service import change_service
+
+_SOUNDEX_CODES = {
+  **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"),
+  **dict.fromkeys("dt", "3"), "l": "4", **dict.fromkeys("mn", "5"), "r": "6",
+}
+
+# Fields copied from a duplicate when the survivor has no value.
+_FILLABLE = ("contact", "email", "age", "gender", "disease")
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+  if not email or "@" not in email:
+    return None
+  local, _, domain = email.strip().lower().partition("@")
+  return f"{local.split('+', 1)[0]}@{domain}"
+
+
+def phone_digits(contact: Optional[str]) -> Optional[str]:
+  digits = re.sub(r"\D", "", contact or "")
+  # Compare the national number so +91 98... and 098... still match.
+  return digits[-10:] if len(digits) >= 7 else None
+
+
+def soundex(word: str) -> str:
+  word = re.sub(r"[^a-z]", "", word.lower())
+  if not word:
+    return ""
+  code, last = word[0].upper(), _SOUNDEX_CODES.get(word[0], "")
+  for char in word[1:]:
+    digit = _SOUNDEX_CODES.get(char, "")
+    if digit and digit != last:
+      code += digit
+    if char not in "hw":
+      last = digit
+  return (code + "000")[:4]
+
+
+def name_key(name: Optional[str]) -> Optional[str]:
+  """Phonetic key that ignores word order: "Jon Smyth" and "Smith John" agree."""
+  codes = sorted(filter(None, (soundex(part) for part in (name or "").split())))
+  return " ".join(codes) or None
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+  words = re.sub(r"[^a-z0-9 ]", "", (text or "").lower()).split()
+  grams = set()
+  for word in words:
+    padded = f"  {word} "
+    grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+  return grams
+
+
+def name_similarity(a: Optional[str], b: Optional[str]) -> float:
+  """Trigram (Jaccard) similarity, as pg_trgm's similarity()."""
+  grams_a, grams_b = trigrams(a), trigrams(b)
+  if not grams_a or not grams_b:
+    return 0.0
+  return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+class DedupService:
+  """
+  Finds likely duplicate patients of one doctor and merges them.
+
+  Candidates come from blocking: each patient gets a few keys (normalized
+  email, phone digits, phonetic name) and only patients sharing a key are
+  compared, so the work grows with the number of patients rather than
+  its square. Blocks larger than dedup_max_block_size (a very common
+  name) are skipped.
+  """
+
+  def blocking_keys(self, patient) -> List[Tuple[str, str]]:
+    keys = [
+      ("email", normalize_email(patient.email)),
+      ("phone", phone_digits(patient.contact)),
+      ("name", name_key(patient.name)),
+    ]
+    return [(kind, value) for kind, value in keys if value]
+
+  def score(self, a, b) -> Tuple[float, List[str]]:
+    reasons = []
+    score = 0.0
+    if normalize_email(a.email) and normalize_email(a.email) == normalize_email(b.email):
+      score += 0.45
+      reasons.append("email")
+    if phone_digits(a.contact) and phone_digits(a.contact) == phone_digits(b.contact):
+      score += 0.35
+      reasons.append("phone")
+    similarity = name_similarity(a.name, b.name)
+    score += 0.4 * similarity
+    if similarity >= 0.5:
+      reasons.append("name")
+    # Conflicting demographics make a match much less likely.
+    if a.age is not None and b.age is not None and abs(a.age - b.age) > 1:
+      score *= 0.5
+      reasons.append("age_conflict")
+    if a.gender is not None and b.gender is not None and a.gender != b.gender:
+      score *= 0.5
+      reasons.append("gender_conflict")
+    return min(score, 1.0), reasons
+
+  def candidate_pairs(self, patients: Iterable) -> Set[Tuple[int, int]]:
+    blocks: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    for patient in patients:
+      for key in self.blocking_keys(patient):
+        blocks[key].append(patient.id)
+    pairs = set()
+    for ids in blocks.values():
+      if 1 < len(ids) <= settings.dedup_max_block_size:
+        pairs.update(combinations(sorted(ids), 2))
+    return pairs
+
+  async def find_duplicates(
+    self,
+    db: AsyncSession,
+    doctor: Doctor,
+    min_score: float = 0.6,
+    limit: int = 100
+  ) -> List[dict]:
+    """Scored candidate pairs among the doctor's active patients, best first."""
+    result = await db.execute(
+      select(Patient.id, Patient.name, Patient.email, Patient.contact, Patient.age, Patient.gender)
+      .where(Patient.doctor_id == doctor.id, Patient.status == PatientStatusEnum.ACTIVE)
+    )
+    patients = {row.id: row for row in result.all()}
+    duplicates = []
+    for first_id, second_id in self.candidate_pairs(patients.values()):
+      score, reasons = self.score(patients[first_id], patients[second_id])
+      if score >= min_score:
+        duplicates.append({
+          "patient_id": first_id,
+          "duplicate_id": second_id,
+          "score": round(score, 3),
+          "reasons": reasons,
+        })
+    duplicates.sort(key=lambda pair: (-pair["score"], pair["patient_id"], pair["duplicate_id"]))
+    return duplicates[:limit]
+
+  async def merge_patients(
+    self,
+    db: AsyncSession,
+    doctor: Doctor,
+    survivor_id: int,
+    duplicate_ids: List[int]
+  ) -> Optional[Patient]:
+    """
+    Move the duplicates' visits to the survivor and retire the duplicates,
+    in one transaction. Returns None if any patient isn't the doctor's.
+    """
+    duplicate_ids = sorted(set(duplicate_ids))
+    if survivor_id in duplicate_ids:
+      raise ValidationError("A patient cannot be merged into itself")
+    ids = sorted([survivor_id, *duplicate_ids])
+    # Lock in id order so concurrent merges can't deadlock, and so visit
+    # writes (which lock the patient row) wait for the merge.
+    result = await db.execute(
+      select(Patient)
+      .where(Patient.id.in_(ids), Patient.doctor_id == doctor.id)
+      .order_by(Patient.id)
+      .with_for_update()
+      .execution_options(populate_existing=True)
+    )
+    patients = {patient.id: patient for patient in result.scalars().all()}
+    if len(patients) != len(ids):
+      return None
+    survivor = patients[survivor_id]
+    duplicates = [patients[patient_id] for patient_id in duplicate_ids]
+    if any(patient.status == PatientStatusEnum.MERGED for patient in patients.values()):
+      raise ValidationError("Patient has already been merged")
+
+    moved = await db.execute(
+      update(Visit)
+      .where(Visit.patient_id.in_(duplicate_ids))
+      .values(patient_id=survivor_id)
+      .returning(Visit.id)
+      .execution_options(synchronize_session=False)
+    )
+    moved_visit_ids = moved.scalars().all()
+
+    for duplicate in duplicates:
+      for field in _FILLABLE:
+        if getattr(survivor, field) is None and getattr(duplicate, field) is not None:
+          setattr(survivor, field, getattr(duplicate, field))
+      duplicate.status = PatientStatusEnum.MERGED
+      duplicate.merged_into_id = survivor_id
+      duplicate.visit_count = 0
+      duplicate.last_visit_at = None
+
+    summary = await db.execute(
+      select(func.count(Visit.id), func.max(Visit.date_of_visit)).where(Visit.patient_id == survivor_id)
+    )
+    survivor.visit_count, survivor.last_visit_at = summary.one()
+
+    for visit_id in moved_visit_ids:
+      change_service.track(db, doctor, "update", "visit", visit_id, survivor_id)
+    for patient in (survivor, *duplicates):
+      change_service.track(db, doctor, "update", "patient", patient.id, patient.id)
+    await db.commit()
+    await db.refresh(survivor)
+    for duplicate in duplicates:
+      await audit_service.record(doctor, "merge", "patient", duplicate.id, survivor_id)
+    return survivor
+
+dedup_service = DedupService()
@@ -1,11 +1,18 @@
 from typing import Optional
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError
 from app.models.doctor import Doctor
 from app.schemas.doctor_schema import DoctorCreate, DoctorUpdate
 from app.services.auth import auth_service
-from app.core.exceptions import DoctorNotFoundError, DuplicateError
+from app.db.database import db_manager
+from app.core.exceptions import DoctorNotFoundError, DuplicateError, ValidationError
+from app.core.single_flight import SingleFlight, attach
+from app.services.patient_service import patient_service
+
+# Every authenticated request loads its doctor; tabs opened together share the query.
+doctor_reads = SingleFlight("doctor_by_id")
 
 class DoctorService:
   async def create_doctor(
@@ -24,6 +31,8 @@ class DoctorService:
         phone_number=doctor_data.phone_number,
         specialization=doctor_data.specialization,   
       )
+      # Self-registered doctors start on the shared database; a clinic is
+      # assigned by an operator with assign_tenant().
       db.add(db_doctor)
       await db.commit()
       await db.refresh(db_doctor)
@@ -53,11 +62,18 @@ class DoctorService:
         db: AsyncSession, 
         doctor_id: int
     ) -> Optional[Doctor]:
-        """Get a doctor by ID."""
+        """Get a doctor by ID; concurrent lookups of the same ID share one query."""
+        values = await doctor_reads.do(doctor_id, "by_id", lambda: self._fetch_doctor(db, doctor_id))
+        if values is None:
+            return None
+        return await attach(db, Doctor, values)
+
+  async def _fetch_doctor(self, db: AsyncSession, doctor_id: int) -> Optional[dict]:
         result = await db.execute(
-            select(Doctor).where(Doctor.id == doctor_id)
+            select(Doctor.__table__).where(Doctor.id == doctor_id)
         )
-        return result.scalar_one_or_none()
+        row = result.mappings().first()
+        return dict(row) if row is not None else None
     
   async def get_doctor_by_email(
         self, 
@@ -79,17 +95,37 @@ class DoctorService:
         """Authenticate a doctor with username and password."""
         doctor = await self.get_doctor_by_username(db, username)
         
-        if not doctor:
-            return None
+        # Always run exactly one verify so unknown usernames cost the same
+        # as wrong passwords.
+        hashed_password = doctor.hashed_password if doctor else auth_service.dummy_hash
+        # bcrypt is CPU-bound for tens of milliseconds; keep it off the event loop.
+        password_ok = await run_in_threadpool(auth_service.verify_password, password, hashed_password)
         
-        if not doctor.is_active:
+        if not doctor or not password_ok:
             return None
         
-        if not auth_service.verify_password(password, doctor.hashed_password):
+        if not doctor.is_active:
             return None
         
         return doctor
       
+  async def rehash_password_if_needed(
+        self, 
+        doctor_id: int, 
+        password: str
+    ) -> None:
+        """Re-hash a doctor's password with the current bcrypt settings.
+        
+        Runs as a background task after a successful login, so it uses its
+        own session instead of the request one.
+        """
+        async for db in db_manager.get_session():
+            doctor = await self.get_doctor_by_id(db, doctor_id)
+            if doctor and auth_service.needs_rehash(doctor.hashed_password):
+                doctor.hashed_password = await run_in_threadpool(auth_service.hash_passwords, password)
+                await db.commit()
+                doctor_reads.forget(doctor_id)
+      
   async def update_doctor(
         self, 
         db: AsyncSession, 
@@ -103,16 +139,74 @@ class DoctorService:
             raise DoctorNotFoundError("Doctor not found")
         
         # Update only provided fields
-        update_data = doctor_update.dict(exclude_unset=True)
+        update_data = doctor_update.model_dump(exclude_unset=True)
         
         for field, value in update_data.items():
             setattr(doctor, field, value)
         
         await db.commit()
+        doctor_reads.forget(doctor_id)
         await db.refresh(doctor)
+        await self.mirror_to_tenant_database(doctor)
         
         return doctor
       
+  async def assign_tenant(
+        self,
+        db: AsyncSession,
+        doctor_id: int,
+        tenant_id: Optional[int]
+    ) -> Doctor:
+        """Move a doctor into a clinic (tenant), or back to none.
+        
+        Patient data stays in its database, but data keys and blind index
+        keys are per tenant, so the doctor's patients there are rewritten
+        under the new tenant's keys; otherwise email and contact lookups
+        and disease grouping would miss them. The rewrite commits in
+        batches; if it is interrupted, run the command again. Tokens carry
+        the tenant, so requests route to the new database from the
+        doctor's next login or refresh.
+        """
+        doctor = await self.get_doctor_by_id(db, doctor_id)
+        if not doctor:
+            raise DoctorNotFoundError("Doctor not found")
+        doctor.tenant_id = tenant_id
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise ValidationError("Tenant does not exist")
+        doctor_reads.forget(doctor_id)
+        async for _ in patient_service.reencrypt(db, doctor_id=doctor_id):
+            pass
+        doctor = await self.get_doctor_by_id(db, doctor_id)
+        await self.mirror_to_tenant_database(doctor)
+        return doctor
+      
+  async def mirror_to_tenant_database(self, doctor: Doctor) -> None:
+        """Copy a doctor row to its tenant's dedicated database, if it has one.
+        
+        Doctors live in the default database for login, but patients on a
+        tenant database reference them by foreign key, so the row must
+        exist there too. The copy has no tenant_id because the tenants
+        table exists only in the default database.
+        """
+        if not db_manager.has_dedicated_database(doctor.tenant_id):
+            return
+        async for tenant_db in db_manager.get_session(doctor.tenant_id):
+            await tenant_db.merge(Doctor(
+                id=doctor.id,
+                username=doctor.username,
+                email=doctor.email,
+                hashed_password=doctor.hashed_password,
+                first_name=doctor.first_name,
+                last_name=doctor.last_name,
+                phone_number=doctor.phone_number,
+                specialization=doctor.specialization,
+                is_active=doctor.is_active,
+            ))
+            await tenant_db.commit()
+      
 doctor_service = DoctorService()
   
   
\ No newline at end of file
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Set
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "pending_change_events"
+
+
+class EventBroker:
+  """
+  Fans out patient/visit change events to live subscribers, per doctor.
+
+  Events are only published once the writing transaction commits. With
+  the "local" backend they go straight to this worker's subscribers; with
+  "postgres" they are sent with pg_notify inside the transaction and every
+  worker LISTENs, so subscribers on any worker receive them. A dropped
+  LISTEN connection is re-opened with exponential backoff; events sent
+  while it was down are only reachable through GET /changes.
+  """
+
+  def __init__(self):
+    self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+    # database url -> its LISTEN connection
+    self._listeners: Dict[str, object] = {}
+    self._reconnects: Dict[str, asyncio.Task] = {}
+    self._callbacks: List[Callable[[dict], None]] = []
+    self._stopping = False
+
+  @property
+  def subscriber_count(self) -> int:
+    return sum(len(queues) for queues in self._subscribers.values())
+
+  @asynccontextmanager
+  async def subscribe(self, doctor_id: int) -> AsyncIterator[asyncio.Queue]:
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.event_stream_queue_size)
+    self._subscribers.setdefault(doctor_id, set()).add(queue)
+    try:
+      yield queue
+    finally:
+      queues = self._subscribers.get(doctor_id)
+      if queues is not None:
+        queues.discard(queue)
+        if not queues:
+          del self._subscribers[doctor_id]
+
+  def on_publish(self, callback: Callable[[dict], None]) -> None:
+    """Call ``callback`` with every committed event this worker receives."""
+    self._callbacks.append(callback)
+
+  def publish_local(self, payload: dict) -> None:
+    for callback in self._callbacks:
+      callback(payload)
+    for queue in self._subscribers.get(payload["doctor_id"], ()):
+      if queue.full():
+        # Slow client: drop its oldest event. Event ids are change-feed
+        # cursors, so it can catch up through GET /changes.
+        queue.get_nowait()
+      queue.put_nowait(payload)
+
+  async def start(self) -> None:
+    if settings.event_broker_backend != "postgres":
+      return
+    self._stopping = False
+    database_urls = [settings.database_url, *settings.tenant_database_urls.values()]
+    for database_url in database_urls:
+      self._listeners[database_url] = await self._listen(database_url)
+
+  async def stop(self) -> None:
+    self._stopping = True
+    for task in self._reconnects.values():
+      task.cancel()
+    self._reconnects.clear()
+    for connection in self._listeners.values():
+      await connection.close()
+    self._listeners.clear()
+
+  async def _listen(self, database_url: str):
+    import asyncpg
+    dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+    connection = await asyncpg.connect(dsn)
+    await connection.add_listener(settings.event_channel, self._on_notify)
+    connection.add_termination_listener(lambda _connection: self._on_terminated(database_url))
+    return connection
+
+  def _on_terminated(self, database_url: str) -> None:
+    if self._stopping or database_url in self._reconnects:
+      return
+    logger.warning("Event listener for %s lost its connection; reconnecting", make_url(database_url).database)
+    self._listeners.pop(database_url, None)
+    self._reconnects[database_url] = asyncio.get_running_loop().create_task(self._reconnect(database_url))
+
+  async def _reconnect(self, database_url: str) -> None:
+    delay = settings.event_listener_reconnect_min_seconds
+    try:
+      while not self._stopping:
+        try:
+          self._listeners[database_url] = await self._listen(database_url)
+          logger.info("Event listener for %s reconnected", make_url(database_url).database)
+          return
+        except Exception as exc:
+          logger.warning("Event listener reconnect failed (%s); retrying in %.1fs", exc, delay)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, settings.event_listener_reconnect_max_seconds)
+    finally:
+      self._reconnects.pop(database_url, None)
+
+  def _on_notify(self, connection, pid, channel, payload: str) -> None:
+    try:
+      self.publish_local(json.loads(payload))
+    except Exception:
+      logger.exception("Bad event payload on %s", channel)
+
+
+def queue_change_event(session, change_event) -> None:
+  """Queue a ChangeEvent (added to ``session``) for publishing on commit."""
+  session.info.setdefault(_PENDING_KEY, []).append(change_event)
+
+
+def _payload(change_event) -> dict:
+  return {
+    "id": change_event.seq,
+    "doctor_id": change_event.doctor_id,
+    "entity_type": change_event.entity_type,
+    "entity_id": change_event.entity_id,
+    "patient_id": change_event.patient_id,
+    "operation": change_event.operation,
+  }
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_before_commit(session: Session) -> None:
+  pending = session.info.get(_PENDING_KEY)
+  if not pending or settings.event_broker_backend != "postgres":
+    return
+  session.flush()  # assign seq to the pending rows
+  for change_event in pending:
+    # NOTIFY is transactional: listeners only see it if the commit succeeds.
+    session.execute(select(func.pg_notify(settings.event_channel, json.dumps(_payload(change_event)))))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+  pending = session.info.pop(_PENDING_KEY, None)
+  if pending and settings.event_broker_backend != "postgres":
+    for change_event in pending:
+      event_broker.publish_local(_payload(change_event))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+  session.info.pop(_PENDING_KEY, None)
+
+
+event_broker = EventBroker()
@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.db.database import db_manager
+from app.models.doctor import Doctor
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+# Handed to an operation, which awaits it with its response after flushing
+# the create and before committing it.
+StoreResponse = Callable[[BaseModel], Awaitable[None]]
+
+
+class IdempotencyService:
+  """
+  Replays stored responses for retried create requests.
+
+  The key is claimed with an insert before the operation runs, so a
+  concurrent retry sees the claim (409) instead of creating a duplicate.
+  Once the operation succeeds its response is stored; later retries with
+  the same key and payload get that response back without running any
+  service logic. The response is written in the same transaction as the
+  create, so a claim without one means nothing was committed, and once
+  it is older than ``idempotency_claim_timeout_seconds`` (a worker died
+  mid-request) a retry can take it over.
+  """
+
+  @staticmethod
+  def fingerprint(path: str, payload: BaseModel) -> str:
+    return hashlib.sha256(f"{path}\n{payload.model_dump_json()}".encode()).hexdigest()
+
+  async def run(
+    self,
+    db: AsyncSession,
+    doctor: Doctor,
+    key: Optional[str],
+    request_hash: str,
+    operation: Callable[[Optional[StoreResponse]], Awaitable[BaseModel]],
+    status_code: int = status.HTTP_201_CREATED
+  ):
+    if key is None:
+      return await operation(None)
+
+    # Read before any rollback expires the doctor.
+    doctor_id = doctor.id
+    claimed_at = datetime.now(timezone.utc)
+    existing = await self._claim(db, doctor, key, request_hash, claimed_at)
+    if existing is not None:
+      if existing.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request"
+        )
+      if existing.response_body is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress"
+        )
+      return JSONResponse(
+          status_code=existing.status_code,
+          content=json.loads(existing.response_body),
+          headers={"Idempotent-Replayed": "true"}
+      )
+
+    async def store_response(response: BaseModel) -> None:
+      stored = await db.execute(
+        self._owned(doctor_id, key, claimed_at, update(IdempotencyKey))
+        .values(status_code=status_code, response_body=response.model_dump_json())
+        .execution_options(synchronize_session=False)
+      )
+      if not stored.rowcount:
+        # A retry took the claim over after the timeout; let it create.
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress"
+        )
+
+    try:
+      result = await operation(store_response)
+    except Exception:
+      await db.rollback()
+      await self._release(db, doctor_id, key, claimed_at)
+      raise
+    return JSONResponse(status_code=status_code, content=result.model_dump(mode="json"))
+
+  @staticmethod
+  def _owned(doctor_id: int, key: str, claimed_at: datetime, statement):
+    return statement.where(
+      IdempotencyKey.doctor_id == doctor_id,
+      IdempotencyKey.key == key,
+      IdempotencyKey.created_at == claimed_at,
+    )
+
+  async def _claim(
+    self,
+    db: AsyncSession,
+    doctor: Doctor,
+    key: str,
+    request_hash: str,
+    now: datetime
+  ) -> Optional[IdempotencyKey]:
+    """Insert a claim for the key; return the existing record if it is taken."""
+    doctor_id = doctor.id
+    expires_at = now + timedelta(hours=settings.idempotency_key_ttl_hours)
+    for _ in range(2):
+      # created_at is set here rather than by the server so it identifies
+      # this claim exactly.
+      db.add(IdempotencyKey(
+        doctor_id=doctor_id,
+        key=key,
+        request_hash=request_hash,
+        created_at=now,
+        expires_at=expires_at,
+      ))
+      try:
+        await db.commit()
+        return None
+      except IntegrityError:
+        await db.rollback()
+        if doctor in db:
+          # The rollback expired the doctor the operation will read.
+          await db.refresh(doctor)
+      existing = await db.get(IdempotencyKey, (doctor_id, key), populate_existing=True)
+      if existing is None:
+        continue
+      stale = now - timedelta(seconds=settings.idempotency_claim_timeout_seconds)
+      if existing.response_body is None and existing.created_at <= stale:
+        # Take the abandoned claim over. Matching on its created_at makes
+        # this a compare-and-swap, so only one retry wins it.
+        result = await db.execute(
+          self._owned(doctor_id, key, existing.created_at, update(IdempotencyKey))
+          .where(IdempotencyKey.response_body.is_(None))
+          .values(request_hash=request_hash, created_at=now, expires_at=expires_at)
+          .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if result.rowcount:
+          return None
+        continue
+      if existing.expires_at > now:
+        return existing
+      # Expired but not yet evicted: treat the key as unused.
+      await db.delete(existing)
+      await db.commit()
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still in progress"
+    )
+
+  async def _release(self, db: AsyncSession, doctor_id: int, key: str, claimed_at: datetime) -> None:
+    await db.execute(self._owned(doctor_id, key, claimed_at, delete(IdempotencyKey)))
+    await db.commit()
+
+  async def purge_expired(self, db: AsyncSession, batch_size: int = 1000) -> int:
+    """Delete expired keys in small batches; returns how many were removed."""
+    removed = 0
+    while True:
+      expired = (
+        select(IdempotencyKey.doctor_id, IdempotencyKey.key)
+        .where(IdempotencyKey.expires_at < datetime.now(timezone.utc))
+        .limit(batch_size)
+      )
+      result = await db.execute(
+        delete(IdempotencyKey)
+        .where(tuple_(IdempotencyKey.doctor_id, IdempotencyKey.key).in_(expired))
+        .execution_options(synchronize_session=False)
+      )
+      await db.commit()
+      if not result.rowcount:
+        return removed
+      removed += result.rowcount
+
+  async def run_eviction(self, interval: int) -> None:
+    while True:
+      await asyncio.sleep(interval)
+      for tenant_id in [None, *settings.tenant_database_urls]:
+        try:
+          async for db in db_manager.get_session(tenant_id):
+            await self.purge_expired(db)
+        except Exception:
+          logger.exception("Idempotency key eviction failed")
+
+idempotency_service = IdempotencyService()
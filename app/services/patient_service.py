@@ -1,43 +1,206 @@
+from collections import defaultdict
+from typing import AsyncGenerator, Awaitable, Callable, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.models.patient import Patient
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import flag_modified
+from app.models.patient import Patient, PatientStatusEnum
+from app.models.visit import Visit
+from app.models.prescription import Prescription
 from app.schemas.patient_schema import PatientCreate, PatientUpdate
+from app.schemas.visit_schema import normalize_drug_code
 from app.models.doctor import Doctor
+from app.services.audit_service import audit_service
+from app.services.change_service import change_service
+from app.services.event_broker import event_broker
+from app.core.single_flight import SingleFlight, attach
+from app.core.encryption import contact_blind_index, current_tenant_id, email_blind_index
+
+# Dashboard tabs opened together request the same first page.
+patient_reads = SingleFlight("patient_list")
+event_broker.on_publish(lambda payload: patient_reads.forget(payload["doctor_id"]))
+
 class PatientService:
   async def create_patient(
     self,
     db : AsyncSession,
     patient_data : PatientCreate,
-    doctor :  Doctor 
+    doctor :  Doctor,
+    before_commit : Optional[Callable[[Patient], Awaitable[None]]] = None
   ) -> Patient:
     patient = Patient(**patient_data.model_dump(),doctor_id =doctor.id)
     db.add(patient)
+    await db.flush()
+    change_service.track(db, doctor, "insert", "patient", patient.id, patient.id)
+    if before_commit is not None:
+      await before_commit(patient)
     await db.commit()
     await db.refresh(patient)
+    await audit_service.record(doctor, "create", "patient", patient.id, patient.id)
     return patient
 
+  async def create_patients_bulk(
+    self,
+    db : AsyncSession,
+    patients_data : List[PatientCreate],
+    doctor :  Doctor 
+  ) -> List[Patient]:
+    patients = [Patient(**data.model_dump(), doctor_id=doctor.id) for data in patients_data]
+    db.add_all(patients)
+    await db.flush()
+    for patient in patients:
+      change_service.track(db, doctor, "insert", "patient", patient.id, patient.id)
+    await db.commit()
+    for patient in patients:
+      await audit_service.record(doctor, "create", "patient", patient.id, patient.id)
+    return patients
+
+  async def list_patients(
+    self,
+    db : AsyncSession,
+    doctor : Doctor,
+    medication : Optional[str] = None,
+    status : Optional[PatientStatusEnum] = PatientStatusEnum.ACTIVE,
+    skip : int = 0,
+    limit : int = 50,
+    fields : Optional[List[str]] = None,
+    email : Optional[str] = None,
+    contact : Optional[str] = None
+  ) -> List[Patient] | List[dict]:
+    """List the doctor's patients; with ``fields``, select only those columns and return dicts."""
+    query = select(Patient).where(Patient.doctor_id == doctor.id)
+    # email and contact are encrypted; match on their blind indexes instead.
+    lookups = (("email", email_blind_index(email)), ("contact", contact_blind_index(contact)))
+    for name, bidx in lookups:
+      if bidx is not None:
+        query = query.where(getattr(Patient, f"{name}_bidx") == bidx)
+    if status is not None:
+      # Active patients come from the partial ix_patients_doctor_id_active.
+      query = query.where(Patient.status == status)
+    if medication:
+      # Resolved through ix_prescriptions_drug_code_visit_id and
+      # ix_visits_patient_id; no scan of visit text.
+      on_drug = (
+        select(Visit.patient_id)
+        .join(Prescription, Prescription.visit_id == Visit.id)
+        .where(Prescription.drug_code == normalize_drug_code(medication))
+      )
+      query = query.where(Patient.id.in_(on_drug))
+    query = query.order_by(Patient.id).offset(skip).limit(limit)
+    columns = [getattr(Patient, f) for f in fields] if fields else list(Patient.__table__.columns)
+    key = (status, medication and normalize_drug_code(medication), lookups, skip, limit, tuple(fields or ()))
+    rows = await patient_reads.do(doctor.id, key, lambda: self._fetch_rows(db, query.with_only_columns(*columns)))
+    if fields:
+      patients = [dict(row) for row in rows]
+    else:
+      patients = [await attach(db, Patient, row) for row in rows]
+    patient_ids = [row["id"] for row in rows]
+    for patient_id in patient_ids:
+      await audit_service.record(doctor, "view", "patient", patient_id, patient_id)
+    return patients
+
+  async def _fetch_rows(self, db: AsyncSession, query) -> List[dict]:
+    result = await db.execute(query)
+    return [dict(row) for row in result.mappings()]
+
   async def update_patient(self,db: AsyncSession, patient_id: int, patient_update: PatientUpdate, doctor: Doctor) -> Patient | None:
+      # A merged duplicate is retired; its record is read-only.
       q = await db.execute(
-          select(Patient).where(Patient.id == patient_id, Patient.doctor_id == doctor.id)
+          select(Patient).where(
+              Patient.id == patient_id,
+              Patient.doctor_id == doctor.id,
+              Patient.status != PatientStatusEnum.MERGED,
+          )
       )
       patient = q.scalars().first()
       if not patient:
           return None
       for field, value in patient_update.model_dump(exclude_unset=True).items():
           setattr(patient, field, value)
+      change_service.track(db, doctor, "update", "patient", patient.id, patient.id)
       await db.commit()
       await db.refresh(patient)
+      await audit_service.record(doctor, "update", "patient", patient.id, patient.id)
       return patient
     
   async def soft_delete_patient(self,db: AsyncSession, patient_id: int, doctor: Doctor) -> bool:
       q = await db.execute(
-          select(Patient).where(Patient.id == patient_id, Patient.doctor_id == doctor.id)
+          select(Patient).where(
+              Patient.id == patient_id,
+              Patient.doctor_id == doctor.id,
+              Patient.status != PatientStatusEnum.MERGED,
+          )
       )
       patient = q.scalars().first()
       if not patient:
           return False
-      patient.status = "inactive"
+      patient.status = PatientStatusEnum.INACTIVE
+      change_service.track(db, doctor, "update", "patient", patient.id, patient.id)
       await db.commit()
+      await audit_service.record(doctor, "delete", "patient", patient.id, patient.id)
       return True
-  
+
+  async def reencrypt(
+    self,
+    db : AsyncSession,
+    batch_size : int = 500,
+    tenant_id : Optional[int] = None,
+    doctor_id : Optional[int] = None
+  ) -> AsyncGenerator[int, None]:
+    """
+    Rewrite patients' and their visits' encrypted columns with the active key.
+
+    Converts rows written before encryption was enabled, moves rows onto a
+    new key after rotation and fills the blind indexes. Each patient is
+    written under its doctor's tenant key, or under ``tenant_id`` on a
+    tenant's dedicated database (whose doctor copies carry no tenant).
+    ``doctor_id`` limits it to one doctor's patients. Commits per
+    id-ordered batch and yields the patients done so far.
+    """
+    last_id = 0
+    done = 0
+    patients_query = select(Patient, Doctor.tenant_id).join(Doctor, Doctor.id == Patient.doctor_id)
+    if doctor_id is not None:
+      patients_query = patients_query.where(Patient.doctor_id == doctor_id)
+    while True:
+      result = await db.execute(
+        patients_query
+        .where(Patient.id > last_id)
+        .order_by(Patient.id)
+        .limit(batch_size)
+        .options(selectinload(Patient.visits))
+      )
+      rows = result.all()
+      if not rows:
+        return
+      by_tenant = defaultdict(list)
+      for patient, doctor_tenant_id in rows:
+        by_tenant[doctor_tenant_id if tenant_id is None else tenant_id].append(patient)
+      for tenant, patients in by_tenant.items():
+        token = current_tenant_id.set(tenant)
+        try:
+          for patient in patients:
+            _rewrite(patient, _ENCRYPTED_PATIENT_COLUMNS)
+            for visit in patient.visits:
+              _rewrite(visit, _ENCRYPTED_VISIT_COLUMNS)
+          await db.flush()
+        finally:
+          current_tenant_id.reset(token)
+      await db.commit()
+      last_id = rows[-1][0].id
+      done += len(rows)
+      # Sessions don't expire on commit; drop the batch so memory stays flat.
+      db.expunge_all()
+      yield done
+
+
+_ENCRYPTED_PATIENT_COLUMNS = ("contact", "email", "disease")
+_ENCRYPTED_VISIT_COLUMNS = ("observation", "medicines_prescribed", "comments")
+
+def _rewrite(instance, columns) -> None:
+  # Unchanged values are only written when flagged; updated_at is flagged
+  # too so the rewrite doesn't count as an edit.
+  for column in (*columns, "updated_at"):
+    flag_modified(instance, column)
+
 patient_service = PatientService()
\ No newline at end of file
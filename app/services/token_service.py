@@ -0,0 +1,111 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.db.database import db_manager
+from app.models.token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationList:
+  """
+  In-memory set of revoked, not yet expired token ids.
+
+  Entries are kept in a min-heap ordered by expiry so expired ids are
+  dropped in O(log n) without scanning; lookups are a dict hit.
+  """
+
+  def __init__(self):
+    self._expiry: Dict[str, float] = {}
+    self._heap: List[Tuple[float, str]] = []
+    self.last_revoked_at: Optional[datetime] = None
+
+  def add(self, jti: str, expires_at: float) -> None:
+    if expires_at <= time.time() or jti in self._expiry:
+      return
+    self._expiry[jti] = expires_at
+    heapq.heappush(self._heap, (expires_at, jti))
+
+  def is_revoked(self, jti: Optional[str]) -> bool:
+    self._prune()
+    return jti in self._expiry
+
+  def __len__(self) -> int:
+    return len(self._expiry)
+
+  def _prune(self) -> None:
+    now = time.time()
+    while self._heap and self._heap[0][0] <= now:
+      _, jti = heapq.heappop(self._heap)
+      self._expiry.pop(jti, None)
+
+
+class TokenService:
+  def __init__(self):
+    self.revocation_list = RevocationList()
+
+  async def revoke_token(self, db: AsyncSession, payload: dict) -> bool:
+    """
+    Persist a token's jti as revoked and add it to the local list.
+
+    Returns False if the token was already revoked. The primary key on jti
+    makes this the atomic check that stops a refresh token being rotated
+    twice by concurrent requests.
+    """
+    expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc)
+    db.add(RevokedToken(
+      jti=payload["jti"],
+      doctor_id=payload["doctor_id"],
+      token_type=payload["type"],
+      expires_at=expires_at,
+    ))
+    try:
+      await db.commit()
+    except IntegrityError:
+      await db.rollback()
+      return False
+    finally:
+      self.revocation_list.add(payload["jti"], payload["exp"])
+    return True
+
+  async def sync_revocations(self, db: AsyncSession) -> int:
+    """
+    Load tokens revoked since the last sync (by any worker) into memory.
+
+    revoked_at is stamped when the revoking transaction starts, so a row
+    can commit after a later-stamped one was already read. Each sync
+    re-reads an overlap window before the watermark to pick those up;
+    ids already in the list are skipped.
+    """
+    query = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at).where(
+      RevokedToken.expires_at > datetime.now(timezone.utc)
+    )
+    revocations = self.revocation_list
+    if revocations.last_revoked_at is not None:
+      overlap = timedelta(seconds=settings.token_revocation_sync_overlap_seconds)
+      query = query.where(RevokedToken.revoked_at >= revocations.last_revoked_at - overlap)
+    result = await db.execute(query)
+    rows = result.all()
+    for jti, expires_at, revoked_at in rows:
+      revocations.add(jti, expires_at.timestamp())
+      if revocations.last_revoked_at is None or revoked_at > revocations.last_revoked_at:
+        revocations.last_revoked_at = revoked_at
+    return len(rows)
+
+  async def run_revocation_sync(self, interval: int) -> None:
+    while True:
+      try:
+        async for db in db_manager.get_session(read_only=True):
+          await self.sync_revocations(db)
+      except Exception:
+        logger.exception("Token revocation sync failed")
+      await asyncio.sleep(interval)
+
+token_service = TokenService()
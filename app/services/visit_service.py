@@ -1,26 +1,89 @@
+from typing import AsyncGenerator, Awaitable, Callable, List, Optional
+from sqlalchemy import func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from app.models.attachment import Attachment
 from app.models.visit import Visit
-from app.models.patient import Patient
+from app.models.patient import Patient, PatientStatusEnum
+from app.models.prescription import Prescription
 from app.schemas.visit_schema import VisitCreate, VisitUpdate
 from app.models.doctor import Doctor
+from app.services.attachment_service import attachment_service
+from app.services.audit_service import audit_service
+from app.services.change_service import change_service
 
 class VisitService:
   
-  async def create_visit(self,db: AsyncSession, patient_id: int, visit_data: VisitCreate, doctor: Doctor) -> Visit | None:
+  async def create_visit(
+      self,
+      db: AsyncSession,
+      patient_id: int,
+      visit_data: VisitCreate,
+      doctor: Doctor,
+      before_commit: Optional[Callable[[Visit], Awaitable[None]]] = None
+  ) -> Visit | None:
+      """Add a visit; ``before_commit`` runs after the flush, inside the transaction."""
       # Verify patient belongs to this doctor
-      q = await db.execute(
-          select(Patient).where(Patient.id == patient_id, Patient.doctor_id == doctor.id)
-      )
-      patient = q.scalars().first()
+      patient = await self._lock_patient(db, patient_id, doctor.id)
       if not patient:
           return None
-      visit = Visit(patient_id=patient_id, **visit_data.model_dump())
+      visit = self._build_visit(patient_id, visit_data)
       db.add(visit)
+      await db.flush()
+      self._add_to_visit_summary(patient, [visit])
+      change_service.track(db, doctor, "insert", "visit", visit.id, patient_id)
+      change_service.track(db, doctor, "update", "patient", patient_id, patient_id)
+      if before_commit is not None:
+          await before_commit(visit)
       await db.commit()
       await db.refresh(visit)
+      await audit_service.record(doctor, "create", "visit", visit.id, patient_id)
       return visit
 
+  async def create_visits_bulk(self,db: AsyncSession, patient_id: int, visits_data: List[VisitCreate], doctor: Doctor) -> List[Visit] | None:
+      patient = await self._lock_patient(db, patient_id, doctor.id)
+      if not patient:
+          return None
+      visits = [self._build_visit(patient_id, data) for data in visits_data]
+      db.add_all(visits)
+      await db.flush()
+      self._add_to_visit_summary(patient, visits)
+      for visit in visits:
+          change_service.track(db, doctor, "insert", "visit", visit.id, patient_id)
+      change_service.track(db, doctor, "update", "patient", patient_id, patient_id)
+      await db.commit()
+      for visit in visits:
+          await audit_service.record(doctor, "create", "visit", visit.id, patient_id)
+      return visits
+
+  async def list_visits(
+      self,
+      db: AsyncSession,
+      patient_id: int,
+      doctor: Doctor,
+      skip: int = 0,
+      limit: int = 50,
+      fields: Optional[List[str]] = None
+  ) -> List[Visit] | List[dict]:
+      """List a patient's visits, newest first; with ``fields``, select only those columns."""
+      query = (
+          select(Visit).join(Patient)
+          .where(Visit.patient_id == patient_id, Patient.doctor_id == doctor.id)
+          .order_by(Visit.date_of_visit.desc(), Visit.id.desc())
+          .offset(skip).limit(limit)
+      )
+      if fields:
+          result = await db.execute(query.with_only_columns(*[getattr(Visit, f) for f in fields]))
+          visits = [dict(row) for row in result.mappings()]
+          visit_ids = [visit["id"] for visit in visits]
+      else:
+          result = await db.execute(query)
+          visits = list(result.scalars().all())
+          visit_ids = [visit.id for visit in visits]
+      for visit_id in visit_ids:
+          await audit_service.record(doctor, "view", "visit", visit_id, patient_id)
+      return visits
+
   async def update_visit(self,db: AsyncSession, visit_id: int, visit_update: VisitUpdate, doctor: Doctor) -> Visit | None:
       q = await db.execute(
           select(Visit).join(Patient).where(
@@ -33,22 +96,109 @@ class VisitService:
           return None
       for field, value in visit_update.model_dump(exclude_unset=True).items():
           setattr(visit, field, value)
+      change_service.track(db, doctor, "update", "visit", visit.id, visit.patient_id)
       await db.commit()
       await db.refresh(visit)
+      await audit_service.record(doctor, "update", "visit", visit.id, visit.patient_id)
       return visit
 
   async def delete_visit(self,db: AsyncSession, visit_id: int, doctor: Doctor) -> bool:
-      q = await db.execute(
-          select(Visit).join(Patient).where(
+      patient_id = await db.scalar(
+          select(Visit.patient_id).join(Patient).where(
               Visit.id == visit_id,
               Patient.doctor_id == doctor.id,
           )
       )
+      if patient_id is None:
+          return False
+      patient = await self._lock_patient(db, patient_id, doctor.id)
+      # Read the visit under the patient's lock: a concurrent delete of it
+      # may have committed while this one waited, and must not be counted
+      # twice.
+      q = await db.execute(
+          select(Visit)
+          .where(Visit.id == visit_id, Visit.patient_id == patient_id)
+          .execution_options(populate_existing=True)
+      )
       visit = q.scalars().first()
-      if not visit:
+      if not patient or not visit:
+          await db.rollback()
           return False
+      # Attachment rows go with the visit (ON DELETE CASCADE); their blobs
+      # are released once the delete has committed.
+      result = await db.execute(select(Attachment.sha256).where(Attachment.visit_id == visit.id))
+      sha256s = set(result.scalars())
       await db.delete(visit)
+      await db.flush()
+      patient.visit_count = max((patient.visit_count or 0) - 1, 0)
+      if patient.last_visit_at is not None and visit.date_of_visit >= patient.last_visit_at:
+          result = await db.execute(
+              select(func.max(Visit.date_of_visit)).where(Visit.patient_id == patient.id)
+          )
+          patient.last_visit_at = result.scalar()
+      change_service.track(db, doctor, "delete", "visit", visit.id, visit.patient_id)
+      change_service.track(db, doctor, "update", "patient", patient.id, patient.id)
       await db.commit()
+      await audit_service.record(doctor, "delete", "visit", visit.id, visit.patient_id)
+      await attachment_service.release_blobs(db, doctor, sha256s)
       return True
 
+  def _build_visit(self, patient_id: int, visit_data: VisitCreate) -> Visit:
+      visit = Visit(patient_id=patient_id, **visit_data.model_dump(exclude={"prescriptions"}))
+      visit.prescriptions = [Prescription(**item.model_dump()) for item in visit_data.prescriptions]
+      return visit
+
+  async def _lock_patient(self, db: AsyncSession, patient_id: int, doctor_id: int) -> Patient | None:
+      # The row lock serializes visit writes per patient, so the summary
+      # columns can be adjusted in place instead of recounted. Merged
+      # duplicates take no new visits; they belong on the survivor.
+      q = await db.execute(
+          select(Patient)
+          .where(
+              Patient.id == patient_id,
+              Patient.doctor_id == doctor_id,
+              Patient.status != PatientStatusEnum.MERGED,
+          )
+          .with_for_update()
+          .execution_options(populate_existing=True)
+      )
+      return q.scalars().first()
+
+  def _add_to_visit_summary(self, patient: Patient, visits: List[Visit]) -> None:
+      if not visits:
+          return
+      patient.visit_count = (patient.visit_count or 0) + len(visits)
+      latest = max(visit.date_of_visit for visit in visits)
+      if patient.last_visit_at is None or latest > patient.last_visit_at:
+          patient.last_visit_at = latest
+
+  async def backfill_visit_summary(self, db: AsyncSession, batch_size: int = 1000) -> AsyncGenerator[int, None]:
+      """Recompute visit_count/last_visit_at for all patients in id-ordered batches.
+
+      Commits after each batch and yields the number of patients updated so far.
+      """
+      last_id = 0
+      done = 0
+      while True:
+          result = await db.execute(
+              select(Patient.id).where(Patient.id > last_id).order_by(Patient.id).limit(batch_size)
+          )
+          ids = result.scalars().all()
+          if not ids:
+              return
+          visits_of_patient = Visit.patient_id == Patient.id
+          await db.execute(
+              update(Patient)
+              .where(Patient.id.between(ids[0], ids[-1]))
+              .values(
+                  visit_count=select(func.count(Visit.id)).where(visits_of_patient).scalar_subquery(),
+                  last_visit_at=select(func.max(Visit.date_of_visit)).where(visits_of_patient).scalar_subquery(),
+              )
+              .execution_options(synchronize_session=False)
+          )
+          await db.commit()
+          last_id = ids[-1]
+          done += len(ids)
+          yield done
+
 visit_service = VisitService()
\ No newline at end of file
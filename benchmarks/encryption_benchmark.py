@@ -0,0 +1,115 @@
+"""
+Cost of field encryption on the patient list and visit export paths.
+
+Runs the EncryptedText column processors directly (no database), so the
+numbers are the CPU added per request on top of the query itself:
+
+  list    decrypt one page of patients (contact, email, disease)
+  export  decrypt every visit note (observation, medicines, comments)
+  write   encrypt a patient and compute its blind indexes
+
+Each path is timed on plaintext rows, with cached data keys, and with
+the key cache cleared per row to show what the caching saves.
+
+Usage:
+    python -m benchmarks.encryption_benchmark [--page-size 50] [--export-rows 10000] [--repeat 20]
+"""
+import argparse
+import base64
+import json
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/bench")
+os.environ.setdefault("SYNC_DATABASE_URL", "postgresql://localhost/bench")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("FIELD_ENCRYPTION_KEYS", json.dumps({"bench": base64.b64encode(os.urandom(32)).decode()}))
+os.environ.setdefault("FIELD_ENCRYPTION_ACTIVE_KEY", "bench")
+os.environ.setdefault("BLIND_INDEX_KEY", base64.b64encode(os.urandom(32)).decode())
+
+from app.core.config import settings
+from app.core.encryption import contact_blind_index, current_tenant_id, data_key, email_blind_index, text_blind_index
+from app.models.patient import Patient
+from app.models.visit import Visit
+
+PATIENT_VALUES = {
+  "contact": "+1 (555) 010-2030",
+  "email": "jane.doe@example.com",
+  "disease": "Type 2 diabetes mellitus",
+}
+VISIT_VALUES = {
+  "observation": "BP 128/82, HbA1c 7.1%. Reports improved diet adherence; mild fatigue in the evenings.",
+  "medicines_prescribed": "Metformin 500mg twice daily; Atorvastatin 20mg at night",
+  "comments": "Review labs in three months. Refer to dietician.",
+}
+
+
+def column_types(model, names):
+  return {name: model.__table__.c[name].type for name in names}
+
+
+def stored_rows(types, values, count, encrypted):
+  row = {
+    name: column.process_bind_param(values[name], None) if encrypted else values[name]
+    for name, column in types.items()
+  }
+  return [dict(row) for _ in range(count)]
+
+
+def decrypt_rows(types, rows, cold=False):
+  for row in rows:
+    if cold:
+      data_key.cache_clear()
+    for name, column in types.items():
+      column.process_result_value(row[name], None)
+
+
+def write_patient(types):
+  for name, column in types.items():
+    column.process_bind_param(PATIENT_VALUES[name], None)
+  email_blind_index(PATIENT_VALUES["email"])
+  contact_blind_index(PATIENT_VALUES["contact"])
+  text_blind_index(PATIENT_VALUES["disease"])
+
+
+def timed_ms(func, repeat):
+  start = time.perf_counter()
+  for _ in range(repeat):
+    func()
+  return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument("--page-size", type=int, default=50)
+  parser.add_argument("--export-rows", type=int, default=10000)
+  parser.add_argument("--repeat", type=int, default=20)
+  args = parser.parse_args()
+
+  current_tenant_id.set(1)
+  patient_types = column_types(Patient, PATIENT_VALUES)
+  visit_types = column_types(Visit, VISIT_VALUES)
+  paths = [
+    ("list", patient_types, PATIENT_VALUES, args.page_size),
+    ("export", visit_types, VISIT_VALUES, args.export_rows),
+  ]
+
+  print(f"{'path':<8} {'rows':>7} {'plaintext ms':>13} {'cached keys ms':>15} {'cold keys ms':>13} {'us/value':>9}")
+  for name, types, values, count in paths:
+    plain = stored_rows(types, values, count, encrypted=False)
+    sealed = stored_rows(types, values, count, encrypted=True)
+    plain_ms = timed_ms(lambda: decrypt_rows(types, plain), args.repeat)
+    cached_ms = timed_ms(lambda: decrypt_rows(types, sealed), args.repeat)
+    cold_ms = timed_ms(lambda: decrypt_rows(types, sealed, cold=True), max(1, args.repeat // 10))
+    per_value_us = (cached_ms - plain_ms) * 1000 / (count * len(types))
+    print(f"{name:<8} {count:>7} {plain_ms:>13.2f} {cached_ms:>15.2f} {cold_ms:>13.2f} {per_value_us:>9.2f}")
+
+  write_ms = timed_ms(lambda: write_patient(patient_types), args.page_size * args.repeat)
+  print(f"\nwrite: {write_ms * 1000:.1f} us per patient (3 encrypts + 3 blind indexes)")
+  settings.field_encryption_active_key = None
+  passthrough_ms = timed_ms(lambda: write_patient(patient_types), args.page_size * args.repeat)
+  print(f"write without an active key: {passthrough_ms * 1000:.1f} us per patient (blind indexes only)")
+
+
+if __name__ == "__main__":
+  main()
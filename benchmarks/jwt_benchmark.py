@@ -0,0 +1,89 @@
+"""
+Micro-benchmark of JWT encode/decode throughput per backend and algorithm.
+
+Usage:
+    python -m benchmarks.jwt_benchmark [--iterations 5000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/bench")
+os.environ.setdefault("SYNC_DATABASE_URL", "postgresql://localhost/bench")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key")
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from app.services.auth import JWT_BACKENDS, create_jwt_backend
+
+ALGORITHMS = ["HS256", "ES256", "EdDSA"]
+
+
+def write_key_pair(directory, algorithm):
+  if algorithm == "ES256":
+    private_key = ec.generate_private_key(ec.SECP256R1())
+  else:
+    private_key = ed25519.Ed25519PrivateKey.generate()
+  private_path = os.path.join(directory, f"{algorithm}.pem")
+  public_path = os.path.join(directory, f"{algorithm}.pub.pem")
+  with open(private_path, "wb") as f:
+    f.write(private_key.private_bytes(
+      serialization.Encoding.PEM,
+      serialization.PrivateFormat.PKCS8,
+      serialization.NoEncryption(),
+    ))
+  with open(public_path, "wb") as f:
+    f.write(private_key.public_key().public_bytes(
+      serialization.Encoding.PEM,
+      serialization.PublicFormat.SubjectPublicKeyInfo,
+    ))
+  return private_path, public_path
+
+
+def ops_per_second(func, iterations):
+  start = time.perf_counter()
+  for _ in range(iterations):
+    func()
+  return iterations / (time.perf_counter() - start)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument("--iterations", type=int, default=5000)
+  args = parser.parse_args()
+
+  claims = {
+    "sub": "drjohnsmith",
+    "doctor_id": 1,
+    "type": "access_token",
+    "jti": uuid.uuid4().hex,
+    "exp": datetime.now(timezone.utc) + timedelta(minutes=15),
+  }
+  print(f"{'backend':<8} {'algorithm':<8} {'encode/s':>12} {'decode/s':>12}")
+  with tempfile.TemporaryDirectory() as key_dir:
+    for algorithm in ALGORITHMS:
+      private_path = public_path = None
+      if algorithm != "HS256":
+        private_path, public_path = write_key_pair(key_dir, algorithm)
+      for name in JWT_BACKENDS:
+        try:
+          backend = create_jwt_backend(
+            name, algorithm,
+            secret_key=os.environ["JWT_SECRET_KEY"],
+            private_key_path=private_path,
+            public_key_path=public_path,
+          )
+          token = backend.encode(claims)
+        except Exception as e:
+          print(f"{name:<8} {algorithm:<8} {'unsupported':>12} ({type(e).__name__})")
+          continue
+        encode_rate = ops_per_second(lambda: backend.encode(claims), args.iterations)
+        decode_rate = ops_per_second(lambda: backend.decode(token), args.iterations)
+        print(f"{name:<8} {algorithm:<8} {encode_rate:>12,.0f} {decode_rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+  main()
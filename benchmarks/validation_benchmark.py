@@ -0,0 +1,71 @@
+"""
+Validation throughput for bulk patient and visit payloads.
+
+Compares validating each row with Model.model_validate() in a Python loop
+against a single TypeAdapter call, from Python objects and from raw JSON.
+
+Usage:
+    python -m benchmarks.validation_benchmark [--rows 100000]
+"""
+import argparse
+import json
+import time
+
+from app.schemas.patient_schema import PatientCreate, patient_create_list_adapter
+from app.schemas.visit_schema import VisitCreate, visit_create_list_adapter
+
+
+def patient_rows(count):
+  return [
+    {
+      "name": f"Patient {i}",
+      "contact": f"+1-555-{i:07d}",
+      "email": f"patient{i}@example.com",
+      "age": 20 + i % 60,
+      "gender": ("male", "female", "other")[i % 3],
+      "disease": "Hypertension",
+    }
+    for i in range(count)
+  ]
+
+
+def visit_rows(count):
+  return [
+    {
+      "observation": f"Routine check-up {i}",
+      "medicines_prescribed": "Amlodipine 5mg once daily",
+      "comments": None,
+    }
+    for i in range(count)
+  ]
+
+
+def rows_per_second(func, rows):
+  start = time.perf_counter()
+  func()
+  return rows / (time.perf_counter() - start)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument("--rows", type=int, default=100_000)
+  args = parser.parse_args()
+
+  print(f"{'payload':<9} {'method':<28} {'rows/s':>12}")
+  for label, model, adapter, rows in (
+    ("patients", PatientCreate, patient_create_list_adapter, patient_rows(args.rows)),
+    ("visits", VisitCreate, visit_create_list_adapter, visit_rows(args.rows)),
+  ):
+    body = json.dumps(rows).encode()
+    results = {
+      "model_validate per row": lambda: [model.model_validate(row) for row in rows],
+      "TypeAdapter.validate_python": lambda: adapter.validate_python(rows),
+      "json.loads + validate_python": lambda: adapter.validate_python(json.loads(body)),
+      "TypeAdapter.validate_json": lambda: adapter.validate_json(body),
+    }
+    for method, func in results.items():
+      print(f"{label:<9} {method:<28} {rows_per_second(func, args.rows):>12,.0f}")
+
+
+if __name__ == "__main__":
+  main()
@@ -1,8 +1,13 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from app.db.database import db_manager
+from app.core.compression import CompressionMiddleware
+from app.core.encryption import check_configuration as check_encryption_configuration
+from app.core.single_flight import single_flight_stats
 from app.api.auth import router as auth_router
 from app.core.config import settings
 from app.core.exceptions import (
@@ -12,17 +17,38 @@ from app.core.exceptions import (
     DoctorNotFoundError,
     DuplicateError,
     ValidationError,
-    DatabaseError
+    DatabaseError,
+    PayloadTooLargeError,
+    RateLimitExceededError
 )
-from app.api import patient_api, visit_api
+from app.api import patient_api, visit_api, change_api, event_api, analytics_api, attachment_api
+from app.services.auth import auth_service
+from app.services.token_service import token_service
+from app.services.audit_service import audit_service
+from app.services.event_broker import event_broker
+from app.services.idempotency_service import idempotency_service
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan events."""
     # Startup
+    check_encryption_configuration()
+    await run_in_threadpool(auth_service.build_dummy_hash)
     db_manager.init_db()
+    await audit_service.start()
+    await event_broker.start()
+    revocation_sync = asyncio.create_task(
+        token_service.run_revocation_sync(settings.token_revocation_sync_seconds)
+    )
+    idempotency_eviction = asyncio.create_task(
+        idempotency_service.run_eviction(settings.idempotency_eviction_interval_seconds)
+    )
     yield
     # Shutdown
+    idempotency_eviction.cancel()
+    revocation_sync.cancel()
+    await event_broker.stop()
+    await audit_service.stop()
     await db_manager.close()
 
 
@@ -46,11 +72,19 @@ def create_application() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size
+    )
     
     # Include routers
     app.include_router(auth_router, prefix=settings.api_v1_str)
     app.include_router(patient_api.router, prefix=settings.api_v1_str)
     app.include_router(visit_api.router, prefix=settings.api_v1_str)
+    app.include_router(change_api.router, prefix=settings.api_v1_str)
+    app.include_router(event_api.router, prefix=settings.api_v1_str)
+    app.include_router(analytics_api.router, prefix=settings.api_v1_str)
+    app.include_router(attachment_api.router, prefix=settings.api_v1_str)
     
     # Exception handlers
     @app.exception_handler(DuplicateError)
@@ -89,6 +123,21 @@ def create_application() -> FastAPI:
             content={"detail": str(exc), "type": "validation_error"}
         )
     
+    @app.exception_handler(PayloadTooLargeError)
+    async def payload_too_large_handler(request: Request, exc: PayloadTooLargeError):
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"detail": str(exc), "type": "payload_too_large_error"}
+        )
+    
+    @app.exception_handler(RateLimitExceededError)
+    async def rate_limit_error_handler(request: Request, exc: RateLimitExceededError):
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": str(exc), "type": "rate_limit_error"},
+            headers={"Retry-After": str(max(1, int(exc.retry_after + 0.999)))}
+        )
+    
     @app.exception_handler(DatabaseError)
     async def database_error_handler(request: Request, exc: DatabaseError):
         return JSONResponse(
@@ -109,6 +158,11 @@ def create_application() -> FastAPI:
         """Health check endpoint."""
         return {"status": "healthy", "version": settings.app_version}
     
+    @app.get("/metrics/coalescing", tags=["health"])
+    async def coalescing_metrics():
+        """Per-worker counts of executed and coalesced single-flight reads."""
+        return single_flight_stats()
+    
     # Root endpoint
     @app.get("/", tags=["root"])
     async def root():
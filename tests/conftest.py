@@ -0,0 +1,80 @@
+import os
+import tempfile
+
+# Settings are read at import time, so configure them before any app import.
+_scratch = tempfile.mkdtemp(prefix="doctor-dashboard-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_scratch}/app.db")
+os.environ.setdefault("SYNC_DATABASE_URL", f"sqlite:///{_scratch}/app.db")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key")
+os.environ.setdefault("BLOB_STORE_PATH", os.path.join(_scratch, "blobs"))
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest
+
+import main  # noqa: F401  configures every model before the fixtures use them
+from app.db.database import Base, DatabaseManager
+
+
+@pytest.fixture
+async def db_manager(tmp_path):
+  """A DatabaseManager on a fresh SQLite file with all tables created."""
+  manager = DatabaseManager()
+  manager.init_db(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+  async with manager.engine.begin() as connection:
+    await connection.run_sync(Base.metadata.create_all)
+  yield manager
+  await manager.close()
+
+
+@pytest.fixture
+async def db(db_manager):
+  async with db_manager.get_session_factory()() as session:
+    yield session
+
+
+@pytest.fixture
+async def doctor(db):
+  from app.models.doctor import Doctor
+  doctor = Doctor(
+    username="drtest",
+    email="drtest@example.com",
+    hashed_password="not-a-real-hash",
+    first_name="Test",
+    last_name="Doctor",
+    specialization="General",
+  )
+  db.add(doctor)
+  await db.commit()
+  return doctor
+
+
+@pytest.fixture
+async def client(tmp_path):
+  """An API client signed in as a fresh doctor, on a scratch SQLite database."""
+  from httpx import ASGITransport, AsyncClient
+  from app.db.database import db_manager
+  from app.models.doctor import Doctor
+  from app.services.auth import auth_service
+  db_manager.init_db(f"sqlite+aiosqlite:///{tmp_path}/api.db")
+  async with db_manager.engine.begin() as connection:
+    await connection.run_sync(Base.metadata.create_all)
+  async with db_manager.get_session_factory()() as session:
+    doctor = Doctor(
+      username="drapi",
+      email="drapi@example.com",
+      hashed_password="not-a-real-hash",
+      first_name="Api",
+      last_name="Doctor",
+      specialization="General",
+    )
+    session.add(doctor)
+    await session.commit()
+    token = auth_service.create_token_for_doctor(doctor.id, doctor.username)
+  async with AsyncClient(
+    transport=ASGITransport(app=main.app),
+    base_url="http://test/app/v1",
+    headers={"Authorization": f"Bearer {token}"},
+  ) as api_client:
+    yield api_client
+  await db_manager.close()
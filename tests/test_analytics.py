@@ -0,0 +1,50 @@
+from app.schemas.patient_schema import PatientCreate
+from app.services.analytics_service import AnalyticsService, analytics_service
+from app.services.patient_service import patient_service
+
+
+def patient_create(name, gender="female"):
+  return PatientCreate(name=name, contact=None, email=None, age=40, gender=gender, disease=None)
+
+
+async def test_breakdown_is_cached_until_the_doctor_writes(db, doctor):
+  analytics_service.invalidate(doctor.id)  # ids repeat across test databases
+  await patient_service.create_patient(db, patient_create("Jane"), doctor)
+  first = await analytics_service.patient_breakdown(db, doctor)
+  assert first["total"] == 1
+  assert await analytics_service.patient_breakdown(db, doctor) is first
+
+  # The committed write reaches the cache through the event broker.
+  await patient_service.create_patient(db, patient_create("John", gender="male"), doctor)
+  second = await analytics_service.patient_breakdown(db, doctor)
+  assert second["total"] == 2
+  assert second["gender"] == {"keys": ["female", "male"], "counts": [1, 1]}
+
+
+async def test_result_computed_across_a_write_is_not_cached():
+  service = AnalyticsService()
+  calls = []
+
+  async def compute():
+    calls.append(len(calls))
+    if len(calls) == 1:
+      service.invalidate(7)  # a write commits while this query runs
+    return {"call": len(calls)}
+
+  assert await service._cached(7, ("patients",), compute) == {"call": 1}
+  assert await service._cached(7, ("patients",), compute) == {"call": 2}
+  assert await service._cached(7, ("patients",), compute) == {"call": 2}
+  assert len(calls) == 2
+
+
+async def test_invalidation_is_per_doctor():
+  service = AnalyticsService()
+
+  async def compute():
+    return {}
+
+  for doctor_id in (1, 2):
+    await service._cached(doctor_id, ("patients",), compute)
+  service._on_change({"doctor_id": 1})
+  assert 1 not in service._cache
+  assert 2 in service._cache
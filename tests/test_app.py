@@ -0,0 +1,30 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_app_imports_and_routes_resolve():
+  import main
+  paths = {route.path for route in main.app.routes}
+  assert "/app/v1/patients/" in paths
+  assert "/app/v1/visits/{visit_id}/attachments/{attachment_id}" in paths
+
+
+def test_health_starts_the_app():
+  import main
+  with TestClient(main.app) as client:
+    assert client.get("/health").json()["status"] == "healthy"
+
+
+def test_import_does_not_load_crypto_libraries():
+  # Checked in a fresh interpreter: this one has loaded them already.
+  code = (
+    "import sys, main; "
+    "print(sorted({m.split('.')[0] for m in sys.modules} & {'cryptography', 'bcrypt', 'passlib', 'jose', 'jwt'}))"
+  )
+  result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+  assert result.stdout.strip() == "[]"
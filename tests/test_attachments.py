@@ -0,0 +1,102 @@
+import hashlib
+import pytest
+from app.core.file_response import RangeNotSatisfiable, parse_range
+
+PATIENT = {"name": "Jane", "contact": None, "email": None, "age": 40, "gender": "female", "disease": None}
+VISIT = {"observation": "ok", "medicines_prescribed": None, "comments": None}
+
+
+@pytest.mark.parametrize("header, expected", [
+  (None, None),
+  ("bytes=0-99", (0, 99)),
+  ("bytes=500-", (500, 999)),
+  ("bytes=-100", (900, 999)),
+  ("bytes=900-2000", (900, 999)),
+  ("bytes=5-1", None),
+  ("bytes=0-1,5-6", None),
+  ("items=0-1", None),
+  ("bytes=a-b", None),
+])
+def test_parse_range(header, expected):
+  assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header, size", [("bytes=1000-", 1000), ("bytes=-0", 1000), ("bytes=-5", 0)])
+def test_parse_range_unsatisfiable(header, size):
+  with pytest.raises(RangeNotSatisfiable):
+    parse_range(header, size)
+
+
+async def create_visit(client):
+  patient = (await client.post("/patients/", json=PATIENT)).json()
+  return (await client.post(f"/visits/patient/{patient['id']}", json=VISIT)).json()
+
+
+async def test_upload_and_range_download(client):
+  visit = await create_visit(client)
+  body = bytes(range(256)) * 40
+  response = await client.post(
+    f"/visits/{visit['id']}/attachments?filename=report.bin",
+    content=body,
+    headers={"Content-Type": "application/octet-stream"},
+  )
+  assert response.status_code == 201
+  attachment = response.json()
+  assert attachment["sha256"] == hashlib.sha256(body).hexdigest()
+  assert attachment["size"] == len(body)
+  url = f"/visits/{visit['id']}/attachments/{attachment['id']}"
+
+  full = await client.get(url, headers={"Accept-Encoding": "gzip"})
+  assert full.status_code == 200
+  assert full.content == body
+  assert "content-encoding" not in full.headers
+
+  partial = await client.get(url, headers={"Range": "bytes=10-19", "Accept-Encoding": "gzip"})
+  assert partial.status_code == 206
+  assert partial.content == body[10:20]
+  assert partial.headers["content-range"] == f"bytes 10-19/{len(body)}"
+
+  stale = await client.get(url, headers={"Range": "bytes=10-19", "If-Range": '"other"'})
+  assert stale.status_code == 200
+
+  outside = await client.get(url, headers={"Range": f"bytes={len(body)}-"})
+  assert outside.status_code == 416
+
+  cached = await client.get(url, headers={"If-None-Match": full.headers["etag"]})
+  assert cached.status_code == 304
+
+
+async def test_identical_uploads_share_a_blob(client):
+  from app.core.blob_store import blob_store
+  visit = await create_visit(client)
+  url = f"/visits/{visit['id']}/attachments"
+  first = (await client.post(url, content=b"same bytes")).json()
+  second = (await client.post(url, content=b"same bytes")).json()
+  path = blob_store.local_path("default", first["sha256"])
+
+  assert (await client.delete(f"{url}/{first['id']}")).status_code == 204
+  assert (await client.get(f"{url}/{second['id']}")).content == b"same bytes"
+  assert len((await client.get(url)).json()) == 1
+  import os
+  assert os.path.exists(path)
+
+
+async def test_upload_to_unknown_visit_is_404(client):
+  response = await client.post("/visits/999/attachments", content=b"x")
+  assert response.status_code == 404
+
+
+async def test_deleting_a_visit_releases_its_blobs(client, monkeypatch):
+  import os
+  from app.core.blob_store import blob_store
+  from app.core.config import settings
+  monkeypatch.setattr(settings, "blob_delete_grace_seconds", 0)
+  visit = await create_visit(client)
+  kept = await create_visit(client)
+  only_here = (await client.post(f"/visits/{visit['id']}/attachments", content=b"only here")).json()
+  shared = (await client.post(f"/visits/{visit['id']}/attachments", content=b"shared")).json()
+  await client.post(f"/visits/{kept['id']}/attachments", content=b"shared")
+
+  assert (await client.delete(f"/visits/{visit['id']}")).status_code == 204
+  assert not os.path.exists(blob_store.local_path("default", only_here["sha256"]))
+  assert os.path.exists(blob_store.local_path("default", shared["sha256"]))
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from app.services.audit_service import audit_service
+
+
+class FakeSession:
+  """Records statements; answers to_regclass and count(*) queries from its fields."""
+
+  def __init__(self, existing=(), stranded=0):
+    self.bind = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+    self.existing = set(existing)
+    self.stranded = stranded
+    self.statements = []
+    self.committed = False
+
+  async def scalar(self, statement, params=None):
+    sql = str(statement)
+    if "to_regclass" in sql:
+      return params["name"] if params["name"] in self.existing else None
+    return self.stranded
+
+  async def execute(self, statement, params=None):
+    self.statements.append(str(statement))
+
+  async def commit(self):
+    self.committed = True
+
+
+async def test_existing_partitions_are_skipped():
+  names = await audit_service.create_partitions(FakeSession(), 0)
+  db = FakeSession(existing=names)
+  assert await audit_service.create_partitions(db, 0) == names
+  assert db.statements == []
+
+
+async def test_rows_in_the_default_partition_are_moved():
+  db = FakeSession(stranded=3)
+  [name] = await audit_service.create_partitions(db, 0)
+  assert [statement.split(" WHERE")[0] for statement in db.statements] == [
+    "ALTER TABLE audit_events DETACH PARTITION audit_events_default",
+    db.statements[1],
+    f"INSERT INTO {name} SELECT * FROM audit_events_default",
+    "DELETE FROM audit_events_default",
+    "ALTER TABLE audit_events ATTACH PARTITION audit_events_default DEFAULT",
+  ]
+  assert db.statements[1].startswith(f"CREATE TABLE {name} PARTITION OF audit_events")
+  assert db.committed
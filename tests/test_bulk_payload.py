@@ -0,0 +1,39 @@
+import json
+from typing import Annotated, List
+
+import pytest
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from pydantic import Field, TypeAdapter
+from starlette.requests import Request
+
+from app.core.dependencies import parse_bulk_payload
+from app.schemas.patient_schema import PatientCreate
+
+adapter = TypeAdapter(Annotated[List[PatientCreate], Field(max_length=2)])
+PATIENT = {
+  "name": "Jane Roe", "contact": "5550100000", "email": "jane@example.com",
+  "age": 40, "gender": "female", "disease": "Asthma",
+}
+
+
+def _request(body):
+  async def receive():
+    return {"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}
+  return Request({"type": "http", "method": "POST", "headers": []}, receive)
+
+
+async def test_parses_items():
+  items = await parse_bulk_payload(_request([PATIENT, PATIENT]), adapter)
+  assert [item.name for item in items] == ["Jane Roe", "Jane Roe"]
+
+
+async def test_oversized_body_is_413_even_with_invalid_items():
+  with pytest.raises(HTTPException) as exc:
+    await parse_bulk_payload(_request([PATIENT, PATIENT, {}, {}]), adapter)
+  assert exc.value.status_code == 413
+
+
+async def test_invalid_item_is_422():
+  with pytest.raises(RequestValidationError):
+    await parse_bulk_payload(_request([PATIENT, {"name": "x"}]), adapter)
@@ -0,0 +1,31 @@
+from app.schemas.patient_schema import PatientCreate
+from app.services.change_service import change_service
+from app.services.patient_service import patient_service
+
+
+async def create_patients(db, doctor, count):
+  for i in range(count):
+    await patient_service.create_patient(db, PatientCreate(name=f"Patient {i}", contact=None, email=None, age=40, gender="female", disease=None), doctor)
+
+
+async def test_cursor_pages_through_every_change_once(db, doctor):
+  await create_patients(db, doctor, 5)
+
+  seen = []
+  cursor, has_more = 0, True
+  while has_more:
+    changes, cursor, has_more = await change_service.list_changes(db, doctor, since=cursor, limit=2)
+    seen.extend(change["seq"] for change in changes)
+
+  assert len(seen) == 5
+  assert seen == sorted(set(seen))
+  changes, next_cursor, has_more = await change_service.list_changes(db, doctor, since=cursor)
+  assert changes == [] and next_cursor == cursor and not has_more
+
+
+async def test_changes_carry_current_state(db, doctor):
+  await create_patients(db, doctor, 1)
+  changes, _, _ = await change_service.list_changes(db, doctor)
+  assert changes[0]["operation"] == "insert"
+  assert changes[0]["entity_type"] == "patient"
+  assert changes[0]["data"]["name"] == "Patient 0"
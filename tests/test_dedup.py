@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError as PydanticValidationError
+
+from app.core.exceptions import ValidationError
+from app.models.patient import PatientStatusEnum
+from app.schemas.patient_schema import PatientCreate, PatientUpdate
+from app.schemas.visit_schema import VisitCreate
+from app.services.analytics_service import AnalyticsService
+from app.services.dedup_service import dedup_service
+from app.services.patient_service import patient_service
+from app.services.visit_service import visit_service
+
+
+def _person(id, name, email=None, contact=None, age=None, gender=None):
+  return SimpleNamespace(id=id, name=name, email=email, contact=contact, age=age, gender=gender)
+
+
+def test_candidate_pairs_share_a_blocking_key():
+  patients = [
+    _person(1, "John Smith", email="John.Smith+clinic@example.com"),
+    _person(2, "Jon Smyth", email="john.smith@example.com"),
+    _person(3, "Smith John"),
+    _person(4, "Alice Jones", contact="+91 98765 43210"),
+    _person(5, "A. Jones", contact="098765 43210"),
+    _person(6, "Unrelated Person"),
+  ]
+  pairs = dedup_service.candidate_pairs(patients)
+  assert {(1, 2), (1, 3), (2, 3), (4, 5)} <= pairs
+  assert not any(6 in pair for pair in pairs)
+
+
+def test_score_weighs_signals_and_conflicts():
+  a = _person(1, "John Smith", email="john@example.com", contact="5550100000", age=40, gender="male")
+  b = _person(2, "John Smith", email="JOHN@example.com", contact="(555) 010-0000", age=41, gender="male")
+  score, reasons = dedup_service.score(a, b)
+  assert score == 1.0
+  assert reasons == ["email", "phone", "name"]
+
+  older = _person(3, "John Smith", email="john@example.com", age=70, gender="male")
+  conflicted, reasons = dedup_service.score(a, older)
+  assert "age_conflict" in reasons
+  assert conflicted < 0.5
+
+
+async def _patient(db, doctor, name, visits=0, email=None):
+  patient = await patient_service.create_patient(
+    db, PatientCreate(name=name, contact=None, email=email, age=40, gender="female", disease="Asthma"), doctor
+  )
+  for _ in range(visits):
+    await visit_service.create_visit(
+      db, patient.id, VisitCreate(observation=None, medicines_prescribed=None, comments=None), doctor
+    )
+  return patient
+
+
+async def test_merge_moves_visits_and_retires_duplicates(db, doctor):
+  survivor = await _patient(db, doctor, "Jane Roe", visits=1)
+  duplicate = await _patient(db, doctor, "Jane Row", visits=2, email="jane@example.com")
+
+  merged = await dedup_service.merge_patients(db, doctor, survivor.id, [duplicate.id])
+  assert merged.visit_count == 3
+  assert merged.email == "jane@example.com"
+  visits = await visit_service.list_visits(db, survivor.id, doctor)
+  assert len(visits) == 3
+
+  await db.refresh(duplicate)
+  assert duplicate.status == PatientStatusEnum.MERGED
+  assert duplicate.merged_into_id == survivor.id
+  assert duplicate.visit_count == 0
+
+  with pytest.raises(ValidationError):
+    await dedup_service.merge_patients(db, doctor, survivor.id, [duplicate.id])
+
+
+async def test_merged_duplicate_is_read_only(db, doctor):
+  survivor = await _patient(db, doctor, "Jane Roe")
+  duplicate = await _patient(db, doctor, "Jane Row")
+  await dedup_service.merge_patients(db, doctor, survivor.id, [duplicate.id])
+
+  update = PatientUpdate(name="Jane", contact=None, email=None, age=None, gender=None, disease=None, status="active")
+  assert await patient_service.update_patient(db, duplicate.id, update, doctor) is None
+  assert not await patient_service.soft_delete_patient(db, duplicate.id, doctor)
+  visit = VisitCreate(observation=None, medicines_prescribed=None, comments=None)
+  assert await visit_service.create_visit(db, duplicate.id, visit, doctor) is None
+
+  breakdown = await AnalyticsService().patient_breakdown(db, doctor)
+  assert breakdown["total"] == 1
+
+
+def test_update_cannot_set_merged():
+  with pytest.raises(PydanticValidationError):
+    PatientUpdate(name="Jane", contact=None, email=None, age=None, gender=None, disease=None, status="merged")
@@ -0,0 +1,41 @@
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.doctor_schema import DoctorCreate
+
+
+def _doctor(**overrides):
+  data = {
+    "username": "drjohnsmith",
+    "email": "john.smith@hospital.com",
+    "password": "SecurePass123!",
+    "first_name": "John",
+    "last_name": "Smith",
+    "specialization": "Cardiology",
+  }
+  data.update(overrides)
+  return DoctorCreate(**data)
+
+
+@pytest.mark.parametrize("username, expected", [
+  ("DrJohn", "drjohn"),
+  ("dr-john_smith", "dr-john_smith"),
+  ("_dr_", "_dr_"),
+  ("drémile", "drémile"),
+])
+def test_valid_usernames(username, expected):
+  assert _doctor(username=username).username == expected
+
+
+@pytest.mark.parametrize("username", ["abc\n", "dr john", "dr.john", "___", "--_", "dr‿john"])
+def test_invalid_usernames(username):
+  with pytest.raises(ValidationError):
+    _doctor(username=username)
+
+
+def test_password_case_checks_are_unicode_aware():
+  assert _doctor(password="École123!").password == "École123!"
+  with pytest.raises(ValidationError, match="uppercase"):
+    _doctor(password="école123!")
+  with pytest.raises(ValidationError, match="lowercase"):
+    _doctor(password="ÉCOLE123!")
@@ -0,0 +1,66 @@
+import base64
+import os
+import pytest
+from sqlalchemy import text
+from app.core import encryption
+from app.core.config import settings
+from app.schemas.patient_schema import PatientCreate
+from app.services.patient_service import patient_service
+
+
+def new_key() -> str:
+  return base64.b64encode(os.urandom(32)).decode()
+
+
+@pytest.fixture
+def keys(monkeypatch):
+  monkeypatch.setattr(settings, "field_encryption_keys", {"k1": new_key()})
+  monkeypatch.setattr(settings, "field_encryption_active_key", "k1")
+  monkeypatch.setattr(settings, "blind_index_key", new_key())
+  encryption.data_key.cache_clear()
+  encryption._blind_index_key.cache_clear()
+  yield
+  encryption.data_key.cache_clear()
+  encryption._blind_index_key.cache_clear()
+
+
+def test_round_trip_is_bound_to_column(keys):
+  stored = encryption.encrypt("jane@example.com", b"patients.email")
+  assert stored.startswith("enc1:k1:default:")
+  assert encryption.decrypt(stored, b"patients.email") == "jane@example.com"
+  with pytest.raises(Exception):
+    encryption.decrypt(stored, b"patients.contact")
+
+
+def test_blind_index_requires_a_key_when_encrypting(keys, monkeypatch):
+  monkeypatch.setattr(settings, "blind_index_key", None)
+  encryption._blind_index_key.cache_clear()
+  with pytest.raises(RuntimeError):
+    encryption.email_blind_index("jane@example.com")
+  with pytest.raises(RuntimeError):
+    encryption.check_configuration()
+
+
+def test_blind_index_normalizes(keys):
+  assert encryption.email_blind_index(" Jane@Example.com ") == encryption.email_blind_index("jane@example.com")
+  assert encryption.contact_blind_index("+1 (555) 010-2030") == encryption.contact_blind_index("15550102030")
+
+
+async def test_reencrypt_converts_plaintext_rows(db, doctor, monkeypatch, keys):
+  monkeypatch.setattr(settings, "field_encryption_active_key", None)
+  patient = await patient_service.create_patient(
+    db,
+    PatientCreate(name="Jane", contact="555-0102", email="jane@example.com", age=40, gender="female", disease="Asthma"),
+    doctor,
+  )
+  raw = (await db.execute(text("SELECT email FROM patients WHERE id = :id"), {"id": patient.id})).scalar()
+  assert raw == "jane@example.com"
+
+  monkeypatch.setattr(settings, "field_encryption_active_key", "k1")
+  async for _ in patient_service.reencrypt(db, batch_size=10):
+    assert not db.identity_map
+  raw = (await db.execute(text("SELECT email, email_bidx FROM patients WHERE id = :id"), {"id": patient.id})).one()
+  assert raw[0].startswith("enc1:")
+  assert raw[1] == encryption.email_blind_index("jane@example.com")
+  found = await patient_service.list_patients(db, doctor, email="JANE@example.com")
+  assert [p.email for p in found] == ["jane@example.com"]
@@ -0,0 +1,130 @@
+import asyncio
+import sys
+import types
+
+from app.core.config import settings
+from app.schemas.patient_schema import PatientCreate
+from app.services.auth import auth_service
+from app.services.change_service import change_service
+from app.services.event_broker import EventBroker, event_broker
+from app.services.patient_service import patient_service
+from app.services.token_service import token_service
+
+
+def patient_create(name="Patient"):
+  return PatientCreate(name=name, contact=None, email=None, age=40, gender="female", disease=None)
+
+
+async def test_publish_local_reaches_only_that_doctors_subscribers():
+  broker = EventBroker()
+  seen = []
+  broker.on_publish(seen.append)
+  async with broker.subscribe(1) as mine, broker.subscribe(2) as theirs:
+    assert broker.subscriber_count == 2
+    broker.publish_local({"id": 1, "doctor_id": 1})
+    assert mine.get_nowait()["id"] == 1
+    assert theirs.empty()
+  assert broker.subscriber_count == 0
+  assert seen == [{"id": 1, "doctor_id": 1}]
+
+
+async def test_full_queue_drops_oldest_event(monkeypatch):
+  monkeypatch.setattr(settings, "event_stream_queue_size", 2)
+  broker = EventBroker()
+  async with broker.subscribe(1) as queue:
+    for seq in range(3):
+      broker.publish_local({"id": seq, "doctor_id": 1})
+    assert [queue.get_nowait()["id"], queue.get_nowait()["id"]] == [1, 2]
+
+
+async def test_events_publish_after_commit(db, doctor):
+  async with event_broker.subscribe(doctor.id) as queue:
+    patient = await patient_service.create_patient(db, patient_create(), doctor)
+    payload = queue.get_nowait()
+  assert payload["entity_type"] == "patient"
+  assert payload["entity_id"] == patient.id
+  assert payload["operation"] == "insert"
+
+
+async def test_rolled_back_events_are_discarded(db, doctor):
+  doctor_id = doctor.id
+  async with event_broker.subscribe(doctor_id) as queue:
+    change_service.track(db, doctor, "insert", "patient", 1)
+    await db.flush()
+    await db.rollback()
+    assert queue.empty()
+    # A later commit in the same session must not publish the stale event.
+    await db.commit()
+    assert queue.empty()
+
+
+class FakeConnection:
+  def __init__(self):
+    self.termination_listeners = []
+    self.closed = False
+
+  async def add_listener(self, channel, callback):
+    pass
+
+  def add_termination_listener(self, callback):
+    self.termination_listeners.append(callback)
+
+  def terminate(self):
+    for callback in self.termination_listeners:
+      callback(self)
+
+  async def close(self):
+    self.closed = True
+    self.terminate()
+
+
+async def test_listener_reconnects_with_backoff(monkeypatch):
+  connections = []
+  failures = []
+
+  async def connect(dsn):
+    if failures:
+      raise failures.pop()
+    connections.append(FakeConnection())
+    return connections[-1]
+
+  monkeypatch.setitem(sys.modules, "asyncpg", types.SimpleNamespace(connect=connect))
+  monkeypatch.setattr(settings, "event_broker_backend", "postgres")
+  monkeypatch.setattr(settings, "database_url", "postgresql+asyncpg://user:pw@db/app")
+  monkeypatch.setattr(settings, "tenant_database_urls", {})
+  monkeypatch.setattr(settings, "event_listener_reconnect_min_seconds", 0.01)
+  broker = EventBroker()
+
+  await broker.start()
+  assert len(connections) == 1
+
+  failures.append(OSError("connection refused"))
+  connections[0].terminate()
+  for _ in range(100):
+    if len(connections) == 2:
+      break
+    await asyncio.sleep(0.01)
+  assert len(connections) == 2
+  assert list(broker._listeners.values()) == [connections[1]]
+
+  await broker.stop()
+  assert connections[1].closed
+  await asyncio.sleep(0.05)
+  assert len(connections) == 2  # closing on stop does not reconnect
+
+
+async def test_stream_ends_when_token_is_revoked(client, monkeypatch):
+  monkeypatch.setattr(settings, "event_stream_heartbeat_seconds", 0.01)
+  claims = auth_service.verify_token(client.headers["Authorization"].split()[1])
+
+  async def revoke_soon():
+    await asyncio.sleep(0.05)
+    token_service.revocation_list.add(claims["jti"], claims["exp"])
+
+  revoker = asyncio.create_task(revoke_soon())
+  response = await asyncio.wait_for(client.get("/events/stream"), 5)
+  await revoker
+
+  # Authenticated at open, then closed by the in-loop check.
+  assert response.status_code == 200
+  assert response.text.startswith("retry: 3000")
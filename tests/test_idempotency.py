@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+
+from app.db.database import db_manager
+from app.models.idempotency import IdempotencyKey
+from app.models.patient import Patient
+from app.schemas.patient_schema import PatientCreate, PatientResponse
+from app.services.patient_service import patient_service
+from app.services.idempotency_service import idempotency_service
+
+PATIENT = {"name": "Jane Roe", "contact": None, "email": None, "age": 40, "gender": "female", "disease": None}
+
+
+async def test_retry_replays_stored_response(client):
+  headers = {"Idempotency-Key": "create-jane"}
+  first = await client.post("/patients/", json=PATIENT, headers=headers)
+  assert first.status_code == 201
+
+  retry = await client.post("/patients/", json=PATIENT, headers=headers)
+  assert retry.status_code == 201
+  assert retry.headers["Idempotent-Replayed"] == "true"
+  assert retry.json() == first.json()
+  assert len((await client.get("/patients/")).json()) == 1
+
+  changed = await client.post("/patients/", json={**PATIENT, "age": 41}, headers=headers)
+  assert changed.status_code == 422
+
+
+async def _abandoned_claim(client, claimed_at):
+  doctor_id = (await client.get("/auth/me")).json()["id"]
+  async with db_manager.get_session_factory()() as session:
+    session.add(IdempotencyKey(
+      doctor_id=doctor_id,
+      key="crashed",
+      request_hash=idempotency_service.fingerprint("/app/v1/patients/", PatientCreate(**PATIENT)),
+      created_at=claimed_at,
+      expires_at=claimed_at + timedelta(hours=1),
+    ))
+    await session.commit()
+
+
+async def test_claim_in_progress_is_409(client):
+  await _abandoned_claim(client, datetime.now(timezone.utc))
+  response = await client.post("/patients/", json=PATIENT, headers={"Idempotency-Key": "crashed"})
+  assert response.status_code == 409
+
+
+async def test_stale_claim_is_taken_over(client):
+  await _abandoned_claim(client, datetime.now(timezone.utc) - timedelta(minutes=30))
+  response = await client.post("/patients/", json=PATIENT, headers={"Idempotency-Key": "crashed"})
+  assert response.status_code == 201
+
+  retry = await client.post("/patients/", json=PATIENT, headers={"Idempotency-Key": "crashed"})
+  assert retry.headers["Idempotent-Replayed"] == "true"
+  assert retry.json() == response.json()
+
+
+async def test_create_is_rolled_back_when_the_claim_was_taken_over(db, doctor):
+  async def create(store_response):
+    async def before_commit(patient):
+      # A retry took the claim over while this request was still running.
+      await db.execute(update(IdempotencyKey).values(created_at=datetime.now(timezone.utc) + timedelta(seconds=1)))
+      await store_response(PatientResponse.model_validate(patient))
+    return await patient_service.create_patient(db, PatientCreate(**PATIENT), doctor, before_commit)
+
+  with pytest.raises(HTTPException) as exc:
+    await idempotency_service.run(db, doctor, "slow", "hash", create)
+  assert exc.value.status_code == 409
+  assert await db.scalar(select(func.count()).select_from(Patient)) == 0
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from app.db.migrations import MigrationPreflight
+
+
+class FakeConnection:
+  """Answers the preflight's pg_locks query with a scripted lock set."""
+
+  def __init__(self):
+    self.locks = []
+
+  def execute(self, statement):
+    return list(self.locks)
+
+
+def _run(preflight, connection, sql, locks, clock, duration):
+  connection.locks = locks
+  preflight._before(connection, None, sql, None, None, False)
+  clock.now += duration
+  preflight._after(connection, None, sql, None, None, False)
+
+
+def test_blocking_locks_are_charged_to_the_end_of_their_revision(monkeypatch):
+  clock = SimpleNamespace(now=100.0)
+  monkeypatch.setattr("app.db.migrations.time.monotonic", lambda: clock.now)
+  preflight = MigrationPreflight("postgresql://unused")
+  connection = FakeConnection()
+
+  _run(preflight, connection, "ALTER TABLE patients ADD COLUMN x int", [("patients", "AccessExclusiveLock")], clock, 0.002)
+  _run(preflight, connection, "UPDATE patients SET x = 1", [("patients", "AccessExclusiveLock")], clock, 0.5)
+  clock.now += 0.1
+  preflight._mark_revision(SimpleNamespace(up_revision_id="rev1"))
+
+  # Only new or stronger locks are reported; the UPDATE is kept for its time.
+  first, second = preflight.statements
+  assert first["locks"] == {"patients": "AccessExclusiveLock"} and first["blocking"]
+  assert second["locks"] == {} and not second["blocking"]
+  assert first["revision"] == second["revision"] == "rev1"
+  assert round(first["held_ms"]) == 602
+  assert second["held_ms"] is None
+
+  _run(preflight, connection, "CREATE INDEX ix ON visits (x)", [("visits", "ShareLock")], clock, 0.001)
+  preflight._mark_revision(SimpleNamespace(up_revision_id="rev2"))
+  assert preflight.statements[-1]["revision"] == "rev2"
+  assert preflight.statements[-1]["locks"] == {"visits": "ShareLock"}
+
+
+def test_fast_statements_without_new_locks_are_dropped(monkeypatch):
+  clock = SimpleNamespace(now=0.0)
+  monkeypatch.setattr("app.db.migrations.time.monotonic", lambda: clock.now)
+  preflight = MigrationPreflight("postgresql://unused")
+  _run(preflight, FakeConnection(), "SELECT 1", [], clock, 0.0001)
+  assert preflight.statements == []
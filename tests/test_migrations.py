@@ -0,0 +1,43 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _run(connection, action, *args):
+  config = Config(str(ROOT / "alembic.ini"))
+  config.set_main_option("script_location", str(ROOT / "alembic"))
+  config.attributes["connection"] = connection
+  action(config, *args)
+  return ScriptDirectory.from_config(config)
+
+
+def _version(connection):
+  return connection.execute(text("SELECT version_num FROM alembic_version")).scalar_one()
+
+
+def test_sqlite_upgrade_is_repeatable_and_reversible(tmp_path):
+  engine = create_engine(f"sqlite:///{tmp_path}/migrations.db")
+  with engine.connect() as connection:
+    script = _run(connection, command.upgrade, "head")
+    head = script.get_current_head()
+    assert _version(connection) == head
+    assert inspect(connection).has_table("attachments")
+
+    # A second run finds the stamp and has nothing to do.
+    _run(connection, command.upgrade, "head")
+    assert _version(connection) == head
+
+    # Back past the SQLite-portable revisions and forward again.
+    _run(connection, command.downgrade, "e1a3c5e7b9d2")
+    assert _version(connection) == "e1a3c5e7b9d2"
+    assert not inspect(connection).has_table("attachments")
+    _run(connection, command.upgrade, "head")
+    assert _version(connection) == head
+    columns = {column["name"] for column in inspect(connection).get_columns("patients")}
+    assert {"email_bidx", "contact_bidx", "disease_bidx"} <= columns
+  engine.dispose()
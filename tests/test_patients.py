@@ -0,0 +1,26 @@
+import pytest
+
+PATIENT = {"name": "Jane", "contact": None, "email": None, "age": 40, "gender": "female", "disease": None}
+
+
+async def test_list_defaults_to_active_patients(client):
+  kept = (await client.post("/patients/", json=PATIENT)).json()
+  removed = (await client.post("/patients/", json={**PATIENT, "name": "John"})).json()
+  assert (await client.delete(f"/patients/{removed['id']}")).status_code == 204
+
+  active = (await client.get("/patients/")).json()
+  assert [patient["id"] for patient in active] == [kept["id"]]
+  inactive = (await client.get("/patients/", params={"status": "inactive"})).json()
+  assert [patient["id"] for patient in inactive] == [removed["id"]]
+
+
+@pytest.mark.parametrize("sent", ["female", "FEMALE", "Female"])
+async def test_gender_is_case_insensitive(client, sent):
+  response = await client.post("/patients/", json={**PATIENT, "gender": sent})
+  assert response.status_code == 201
+  assert response.json()["gender"] == "female"
+
+
+async def test_unknown_gender_is_rejected(client):
+  response = await client.post("/patients/", json={**PATIENT, "gender": "unknown"})
+  assert response.status_code == 422
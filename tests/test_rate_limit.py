@@ -0,0 +1,63 @@
+import pytest
+
+from app.core.config import settings
+from app.core.exceptions import RateLimitExceededError
+from app.core.rate_limit import (
+  InMemoryRateLimitStore, LocalKeyValueClient, LoginRateLimiter, SharedRateLimitStore,
+)
+
+
+@pytest.fixture(params=["memory", "shared"])
+def limiter(request, monkeypatch):
+  monkeypatch.setattr(settings, "rate_limit_enabled", True)
+  monkeypatch.setattr(settings, "login_failure_limit", 3)
+  monkeypatch.setattr(settings, "login_username_burst", 100)
+  if request.param == "shared":
+    return LoginRateLimiter(SharedRateLimitStore(LocalKeyValueClient()))
+  return LoginRateLimiter(InMemoryRateLimitStore())
+
+
+async def _fail(limiter, ip, username, times):
+  for _ in range(times):
+    await limiter.check(ip, username)
+    await limiter.record_failure(ip, username)
+
+
+async def test_failures_lock_out_only_the_failing_client(limiter):
+  await _fail(limiter, "10.0.0.1", "DrJohn", 3)
+
+  with pytest.raises(RateLimitExceededError):
+    await limiter.check("10.0.0.1", "drjohn")
+  # The account owner on another address can still sign in.
+  await limiter.check("10.0.0.2", "drjohn")
+
+
+async def test_success_clears_failures(limiter):
+  await _fail(limiter, "10.0.0.1", "drjohn", 2)
+  await limiter.record_success("10.0.0.1", "drjohn")
+
+  await _fail(limiter, "10.0.0.1", "drjohn", 2)
+  await limiter.check("10.0.0.1", "drjohn")
+
+
+async def test_only_failures_drain_the_username_bucket(limiter, monkeypatch):
+  monkeypatch.setattr(settings, "login_username_burst", 2)
+  monkeypatch.setattr(settings, "login_username_refill_per_second", 0.001)
+  for _ in range(5):
+    await limiter.check("10.0.0.1", "drjohn")
+
+  await _fail(limiter, "10.0.0.2", "drjohn", 1)
+  await _fail(limiter, "10.0.0.3", "drjohn", 1)
+  with pytest.raises(RateLimitExceededError):
+    await limiter.check("10.0.0.4", "drjohn")
+
+
+async def test_in_memory_store_evicts_least_recently_used_key():
+  store = InMemoryRateLimitStore(max_keys=2)
+  await store.take_token("a", 5, 1)
+  await store.take_token("b", 5, 1)
+  await store.take_token("a", 5, 1)
+  assert list(store._buckets) == ["b", "a"]
+
+  await store.take_token("c", 5, 1)
+  assert list(store._buckets) == ["a", "c"]
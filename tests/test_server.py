@@ -0,0 +1,56 @@
+import signal
+
+import pytest
+
+from app.core import server
+from app.core.config import settings
+
+
+def test_sqlite_defaults_to_one_worker(monkeypatch):
+  monkeypatch.setattr(settings, "database_url", "sqlite+aiosqlite:///app.db")
+  monkeypatch.setattr(settings, "web_workers", None)
+  assert server.default_worker_count() == 1
+
+
+def test_sqlite_refuses_several_workers(monkeypatch):
+  monkeypatch.setattr(settings, "database_url", "sqlite+aiosqlite:///app.db")
+  monkeypatch.setattr(server, "Server", None)  # never reached
+  with pytest.raises(ValueError, match="single worker"):
+    server.serve(workers=4)
+
+
+def test_postgres_defaults_to_cpu_count(monkeypatch):
+  monkeypatch.setattr(settings, "database_url", "postgresql+asyncpg://user:pw@db/app")
+  monkeypatch.setattr(settings, "web_workers", None)
+  monkeypatch.setattr(server.os, "cpu_count", lambda: 8)
+  assert server.default_worker_count() == 8
+
+
+def test_pool_budget_is_per_database_server(monkeypatch):
+  monkeypatch.setattr(settings, "database_url", "postgresql+asyncpg://user:pw@main/app")
+  monkeypatch.setattr(settings, "db_connection_budget", 80)
+  monkeypatch.setattr(settings, "db_max_overflow", 2)
+  monkeypatch.setattr(settings, "tenant_database_urls", {
+    1: "postgresql+asyncpg://user:pw@clinic/one",
+    2: "postgresql+asyncpg://user:pw@main/two",
+  })
+  # "main" hosts two databases: 4 workers x 2 pools x (8 + 2) = 80.
+  assert server.pool_size_per_worker(4) == 8
+
+
+def test_pool_budget_that_cannot_be_met_is_an_error(monkeypatch):
+  monkeypatch.setattr(settings, "database_url", "postgresql+asyncpg://user:pw@main/app")
+  monkeypatch.setattr(settings, "tenant_database_urls", {})
+  monkeypatch.setattr(settings, "db_connection_budget", 10)
+  monkeypatch.setattr(settings, "db_max_overflow", 2)
+  with pytest.raises(ValueError, match="db_connection_budget"):
+    server.pool_size_per_worker(8)
+
+
+def test_rolling_restart_adds_a_worker_before_retiring_one(monkeypatch):
+  sent = []
+  monkeypatch.setattr(server.os, "kill", lambda pid, sig: sent.append((pid, sig)))
+  monkeypatch.setattr(server.time, "sleep", lambda seconds: sent.append(("sleep", seconds)))
+  server.rolling_restart(1234, workers=2, step_seconds=3)
+  step = [(1234, signal.SIGTTIN), ("sleep", 3), (1234, signal.SIGTTOU)]
+  assert sent == step * 2
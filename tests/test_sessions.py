@@ -0,0 +1,53 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import DatabaseManager, db_manager
+
+
+async def test_postgres_read_only_sessions_bind_the_read_only_engine():
+  manager = DatabaseManager()
+  manager.init_db("postgresql+asyncpg://user:pw@db/app")  # never connects
+  try:
+    engine = manager.get_read_only_engine()
+    assert engine.get_execution_options()["postgresql_readonly"] is True
+    assert manager.get_read_only_engine() is engine
+    async for session in manager.get_session(read_only=True):
+      assert session.bind is engine
+    async for session in manager.get_session():
+      assert session.bind is manager.engine
+  finally:
+    await manager.close()
+
+
+async def test_sqlite_has_no_read_only_engine(db_manager):
+  assert db_manager.get_read_only_engine() is None
+
+
+async def test_get_requests_ask_for_read_only_sessions(client, monkeypatch):
+  get_session = db_manager.get_session
+  requested = []
+
+  def recording_get_session(tenant_id=None, read_only=False):
+    requested.append(read_only)
+    return get_session(tenant_id, read_only)
+
+  monkeypatch.setattr(db_manager, "get_session", recording_get_session)
+  assert (await client.get("/patients/")).status_code == 200
+  patient = {"name": "Jane", "contact": None, "email": None, "age": 40, "gender": "female", "disease": None}
+  assert (await client.post("/patients/", json=patient)).status_code == 201
+  assert requested == [True, False]
+
+
+async def test_session_is_closed_when_the_endpoint_raises(client, monkeypatch):
+  close = AsyncSession.close
+  closed = []
+
+  async def recording_close(self):
+    closed.append(self)
+    await close(self)
+
+  monkeypatch.setattr(AsyncSession, "close", recording_close)
+  response = await client.delete("/patients/999")
+  assert response.status_code == 404
+  # Closed while the request unwound, not left to the garbage collector.
+  assert closed
+  assert not any(session.in_transaction() for session in closed)
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight
+
+
+@pytest.fixture
+def flight(monkeypatch):
+  monkeypatch.setattr(SingleFlight, "registry", [])
+  return SingleFlight("test")
+
+
+async def test_concurrent_calls_share_one_execution(flight):
+  release = asyncio.Event()
+
+  async def query():
+    await release.wait()
+    return {"rows": 3}
+
+  callers = [asyncio.create_task(flight.do(1, "list", query)) for _ in range(5)]
+  await asyncio.sleep(0)
+  release.set()
+  results = await asyncio.gather(*callers)
+
+  assert results == [{"rows": 3}] * 5
+  assert flight.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+async def test_leader_exception_reaches_every_caller(flight):
+  release = asyncio.Event()
+
+  async def query():
+    await release.wait()
+    raise RuntimeError("boom")
+
+  callers = [asyncio.create_task(flight.do(1, "list", query)) for _ in range(3)]
+  await asyncio.sleep(0)
+  release.set()
+  results = await asyncio.gather(*callers, return_exceptions=True)
+
+  assert all(isinstance(result, RuntimeError) for result in results)
+  assert flight.executions == 1
+  assert flight.stats()["in_flight"] == 0
+
+
+async def test_follower_reruns_when_the_leader_is_cancelled(flight):
+  started = asyncio.Event()
+  runs = []
+
+  async def query():
+    runs.append(len(runs))
+    started.set()
+    await asyncio.sleep(0 if len(runs) > 1 else 10)
+    return len(runs)
+
+  leader = asyncio.create_task(flight.do(1, "list", query))
+  await started.wait()
+  follower = asyncio.create_task(flight.do(1, "list", query))
+  await asyncio.sleep(0)
+  leader.cancel()
+
+  assert await follower == 2
+  with pytest.raises(asyncio.CancelledError):
+    await leader
+  assert flight.stats() == {"executions": 2, "coalesced": 0, "in_flight": 0}
+
+
+async def test_forget_makes_later_callers_start_fresh(flight):
+  release = asyncio.Event()
+  runs = []
+
+  async def query():
+    runs.append(None)
+    await release.wait()
+    return len(runs)
+
+  before_write = asyncio.create_task(flight.do(1, "list", query))
+  await asyncio.sleep(0)
+  flight.forget(1)
+  after_write = asyncio.create_task(flight.do(1, "list", query))
+  await asyncio.sleep(0)
+  release.set()
+
+  await asyncio.gather(before_write, after_write)
+  assert len(runs) == 2
@@ -0,0 +1,82 @@
+import base64
+import os
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.cli import migrate_tenants
+from app.core import encryption
+from app.core.config import settings
+from app.core.exceptions import ValidationError
+from app.models.tenant import Tenant
+from app.schemas.doctor_schema import DoctorCreate
+from app.schemas.patient_schema import PatientCreate
+from app.services.doctor import doctor_service
+from app.services.patient_service import patient_service
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_registration_cannot_choose_a_tenant():
+  doctor = DoctorCreate(
+    username="drjohn", email="john@example.com", password="SecurePass123!",
+    first_name="John", last_name="Smith", specialization="Cardiology", tenant_id=1,
+  )
+  assert "tenant_id" not in doctor.model_dump()
+
+
+async def test_assign_tenant(db, doctor):
+  tenant = Tenant(name="North Clinic", slug="north")
+  db.add(tenant)
+  await db.commit()
+
+  assigned = await doctor_service.assign_tenant(db, doctor.id, tenant.id)
+  assert assigned.tenant_id == tenant.id
+
+  with pytest.raises(ValidationError):
+    await doctor_service.assign_tenant(db, doctor.id, tenant.id + 100)
+
+
+def test_migrate_tenants_targets_each_tenant_database(tmp_path, monkeypatch):
+  monkeypatch.chdir(ROOT)
+  urls = {7: f"sqlite:///{tmp_path}/tenant7.db", 8: f"sqlite:///{tmp_path}/tenant8.db"}
+  monkeypatch.setattr(settings, "tenant_sync_database_urls", urls)
+  monkeypatch.setattr(settings, "tenant_database_urls", {7: "unused", 8: "unused"})
+
+  migrate_tenants("head", None)
+
+  for url in urls.values():
+    engine = create_engine(url)
+    with engine.connect() as connection:
+      assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar_one()
+    engine.dispose()
+
+
+async def test_assign_tenant_rekeys_the_doctors_patients(db, doctor, monkeypatch):
+  monkeypatch.setattr(settings, "field_encryption_keys", {"k1": base64.b64encode(os.urandom(32)).decode()})
+  monkeypatch.setattr(settings, "field_encryption_active_key", "k1")
+  monkeypatch.setattr(settings, "blind_index_key", base64.b64encode(os.urandom(32)).decode())
+  encryption.data_key.cache_clear()
+  encryption._blind_index_key.cache_clear()
+  patient = await patient_service.create_patient(
+    db,
+    PatientCreate(name="Jane", contact="555-0102", email="jane@example.com", age=40, gender="female", disease="Asthma"),
+    doctor,
+  )
+  tenant = Tenant(name="North Clinic", slug="north")
+  db.add(tenant)
+  await db.commit()
+
+  doctor = await doctor_service.assign_tenant(db, doctor.id, tenant.id)
+
+  raw = (await db.execute(text("SELECT email FROM patients WHERE id = :id"), {"id": patient.id})).scalar()
+  assert raw.startswith(f"enc1:k1:{tenant.id}:")
+  token = encryption.current_tenant_id.set(tenant.id)
+  try:
+    found = await patient_service.list_patients(db, doctor, email="jane@example.com")
+  finally:
+    encryption.current_tenant_id.reset(token)
+  assert [p.id for p in found] == [patient.id]
+  encryption.data_key.cache_clear()
+  encryption._blind_index_key.cache_clear()
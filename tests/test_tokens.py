@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings
+from app.models.token import RevokedToken
+from app.services.auth import auth_service
+from app.services.token_service import TokenService
+
+
+async def test_logout_revokes_access_token(client):
+  me = await client.get("/auth/me")
+  assert me.status_code == 200
+  refresh_token = auth_service.create_refresh_token_for_doctor(me.json()["id"], me.json()["username"])
+
+  response = await client.post("/auth/logout", json={"refresh_token": refresh_token})
+  assert response.status_code == 204
+
+  assert (await client.get("/auth/me")).status_code == 401
+  refreshed = await client.post("/auth/refresh", json={"refresh_token": refresh_token})
+  assert refreshed.status_code == 401
+
+
+async def test_sync_picks_up_late_committed_revocation(db, doctor):
+  service = TokenService()
+  now = datetime.now(timezone.utc)
+  expires_at = now + timedelta(hours=1)
+  db.add(RevokedToken(jti="early", doctor_id=doctor.id, token_type="access_token",
+                      expires_at=expires_at, revoked_at=now))
+  await db.commit()
+  assert await service.sync_revocations(db) == 1
+
+  # Stamped before the watermark, but committed after the last sync.
+  db.add(RevokedToken(jti="late", doctor_id=doctor.id, token_type="access_token",
+                      expires_at=expires_at, revoked_at=now - timedelta(seconds=5)))
+  await db.commit()
+  await service.sync_revocations(db)
+  assert service.revocation_list.is_revoked("late")
+
+
+def test_secret_key_is_only_required_for_hmac(monkeypatch):
+  monkeypatch.delenv("JWT_SECRET_KEY", raising=False)
+  settings = Settings(_env_file=None, jwt_algorithm="RS256", jwt_public_key_path="public.pem")
+  assert settings.jwt_secret_key is None
+  with pytest.raises(ValidationError, match="jwt_secret_key is required for HS256"):
+    Settings(_env_file=None, jwt_algorithm="HS256")
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.db.types import UTCDateTime
+from app.models.patient import Patient
+from app.models.visit import Visit
+from app.schemas.patient_schema import PatientCreate
+from app.schemas.visit_schema import VisitCreate
+from app.services.patient_service import patient_service
+from app.services.visit_service import visit_service
+
+IST = timezone(timedelta(hours=5, minutes=30))
+SQLITE = SimpleNamespace(name="sqlite")
+POSTGRES = SimpleNamespace(name="postgresql")
+
+
+def test_bind_converts_to_utc():
+  moment = datetime(2024, 1, 1, 10, 0, tzinfo=IST)
+  column = UTCDateTime()
+  assert column.process_bind_param(moment, SQLITE) == datetime(2024, 1, 1, 4, 30)
+  assert column.process_bind_param(moment, POSTGRES) == datetime(2024, 1, 1, 4, 30, tzinfo=timezone.utc)
+
+
+def test_naive_results_are_tagged_utc():
+  column = UTCDateTime()
+  assert column.process_result_value(datetime(2024, 1, 1, 4, 30), SQLITE).tzinfo is timezone.utc
+  assert column.process_result_value(None, SQLITE) is None
+
+
+async def test_stored_times_read_back_aware_in_utc(db, doctor):
+  patient = await patient_service.create_patient(
+    db, PatientCreate(name="Jane", contact=None, email=None, age=40, gender="female", disease=None), doctor
+  )
+  visit = await visit_service.create_visit(
+    db, patient.id, VisitCreate(observation="ok", medicines_prescribed=None, comments=None), doctor
+  )
+  local_moment = datetime(2024, 1, 1, 10, 0, tzinfo=IST)
+  patient.last_visit_at = local_moment
+  await db.commit()
+
+  patient = await db.get(Patient, patient.id, populate_existing=True)
+  visit = await db.get(Visit, visit.id, populate_existing=True)
+  assert patient.created_at.tzinfo is timezone.utc
+  assert visit.date_of_visit.tzinfo is timezone.utc
+  assert patient.last_visit_at == local_moment
+  assert patient.last_visit_at.utcoffset() == timedelta(0)
+  assert abs(datetime.now(timezone.utc) - patient.created_at) < timedelta(minutes=1)
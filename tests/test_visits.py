@@ -0,0 +1,29 @@
+from app.models.patient import Patient
+from app.schemas.patient_schema import PatientCreate
+from app.schemas.visit_schema import VisitCreate
+from app.services.patient_service import patient_service
+from app.services.visit_service import VisitService, visit_service
+
+
+async def test_concurrent_delete_counts_the_visit_once(db_manager, db, doctor, monkeypatch):
+  patient = await patient_service.create_patient(
+    db, PatientCreate(name="Jane", contact=None, email=None, age=40, gender="female", disease=None), doctor
+  )
+  patient_id = patient.id
+  visit = await visit_service.create_visit(db, patient_id, VisitCreate(observation="ok", medicines_prescribed=None, comments=None), doctor)
+  await visit_service.create_visit(db, patient_id, VisitCreate(observation="again", medicines_prescribed=None, comments=None), doctor)
+  visit_id = visit.id
+
+  lock_patient = VisitService._lock_patient
+
+  async def lock_after_a_rival_delete(self, session, *args):
+    # The rival delete commits while this one waits for the patient lock.
+    monkeypatch.setattr(VisitService, "_lock_patient", lock_patient)
+    async with db_manager.get_session_factory()() as rival:
+      assert await visit_service.delete_visit(rival, visit_id, doctor)
+    return await lock_patient(self, session, *args)
+
+  monkeypatch.setattr(VisitService, "_lock_patient", lock_after_a_rival_delete)
+  assert not await visit_service.delete_visit(db, visit_id, doctor)
+  patient = await db.get(Patient, patient_id, populate_existing=True)
+  assert patient.visit_count == 1